@@ -6,14 +6,20 @@ otherwise uses a built-in list.
 Usage:
   python examples/benchmark_suite.py
   python examples/benchmark_suite.py --cases N2_1p10A,LiH --ansatz all
+  python examples/benchmark_suite.py --checkpoint-dir ckpt   # rerun with --resume after a crash
+
+Runs cases one after another; `sqd bench-suite` runs them concurrently.
 """
 from __future__ import annotations
 import argparse
 import json
+import os
 import pathlib
 from typing import Dict, Any, Iterable, List
 
 from sqd.compare import run_sqd_benchmark
+from sqd.cache import IntegralCache
+from sqd.runner import SamplerSession
 
 DATA_JSON = pathlib.Path(__file__).resolve().parents[1] / "data" / "molecules.json"
 
@@ -74,10 +80,19 @@ def main():
     parser.add_argument("--max-iterations", type=int)
     parser.add_argument("--he-layers", type=int)
     parser.add_argument("--n-act-orb", type=int)
+    parser.add_argument("--workers", type=int, default=1, help="Parallel SQD jobs per molecule")
+    parser.add_argument("--cache-dir", help="Reuse SCF/integrals/CCSD across runs from this directory")
+    parser.add_argument("--record", help="Append one structured run record per case to this JSONL file")
+    parser.add_argument("--checkpoint-dir", help="Checkpoint each case in <checkpoint-dir>/<id>")
+    parser.add_argument("--resume", action="store_true", help="Continue the cases checkpointed in --checkpoint-dir")
     args = parser.parse_args()
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
 
     cases = load_cases()
     selected = select_cases(cases, args.cases.split(",") if args.cases else [])
+    cache = IntegralCache(args.cache_dir) if args.cache_dir else None
+    session = SamplerSession()  # one simulator/sampler + transpile cache for the whole suite
 
     for cfg in selected:
         print("\n" + "#" * 84)
@@ -94,6 +109,12 @@ def main():
             he_layers=args.he_layers or cfg.get("he_layers", 2),
             n_act_orb=args.n_act_orb or cfg.get("active_orbitals", 6),
             verbose=True,
+            cache=cache,
+            session=session,
+            workers=args.workers,
+            record_path=args.record,
+            checkpoint_dir=os.path.join(args.checkpoint_dir, cfg["id"]) if args.checkpoint_dir else None,
+            resume=args.resume,
         )
 
 if __name__ == "__main__":
@@ -1,58 +1,49 @@
-
-import matplotlib.pyplot as plt
-import pandas as pd
-import io
-
-data = """
-Method              | Energy (Ha)  | Δ vs FCI (mHa) | Runtime (s)
---------------------+--------------+----------------+------------
-RHF                 | -74.96294666 | +49.491        | 0.553
-MP2                 | -74.99844949 | +13.988        | 4.478
-CCSD                | -75.01232107 | +0.116         | 0.856
-CASCI (full)        | -75.01243743 | +0.000         | 1.120
-FCI (full)          | -75.01243743 | +0.000         | 0.0
-SQD (full) [ucj]    | -75.01235001 | +0.087         | 2.712
-SQD (active) [ucj]  | -75.01229993 | +0.138         | 1.811
-SQD (full) [lucj]   | -75.01239347 | +0.044         | 2.879
-SQD (active) [lucj] | -75.01229944 | +0.138         | 1.893
-SQD (full) [he]     | -75.01243743 | +0.000         | 2.970
-SQD (active) [he]   | -75.01235929 | +0.078         | 1.981
-SQD (full) [hf]     | -74.96294666 | +49.491        | 3.763
-SQD (active) [hf]   | -74.96294666 | +49.491        | 4.465
-CASCI (active)      | -75.01235929 | +0.078         | 0.587
 """
+Plot SQD runtimes per ansatz (full vs active space) from structured run records.
 
-df = pd.read_csv(io.StringIO(data), sep='|', skipinitialspace=True, header=0, skip_blank_lines=True)
+Usage:
+  python -m sqd.cli bench --geom "O 0 0 0; H 0 -0.757 0.586; H 0 0.757 0.586" --record results/runs.jsonl
+  python examples/plot_runtimes.py results/runs.jsonl [--run-id <id>] [--out examples/runtimes_comparison.png]
 
-df.columns = [col.strip() for col in df.columns]
+Plots the most recent run in the file unless --run-id is given.
+"""
+from __future__ import annotations
+import argparse
 
-df = df.iloc[1:].copy()
+import matplotlib.pyplot as plt
 
-df['Method'] = df['Method'].str.strip()
-df['Runtime (s)'] = pd.to_numeric(df['Runtime (s)'].astype(str).str.strip(), errors='coerce')
+from sqd.records import records_frame
 
-df_sqd = df[df['Method'].str.contains('SQD')].copy()
 
-if not df_sqd.empty:
-    
-    df_sqd['Ansatz'] = df_sqd['Method'].str.extract(r'\[(.*?)\]')
-    df_sqd['Type'] = df_sqd['Method'].str.extract(r'\((.*?)\)')[0].str.split(',').str[0]
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("records", help="JSONL file written with --record")
+    parser.add_argument("--run-id", help="Plot this run instead of the most recent one")
+    parser.add_argument("--out", default="examples/runtimes_comparison.png")
+    args = parser.parse_args()
 
-    
-    pivot_df = df_sqd.pivot(index='Ansatz', columns='Type', values='Runtime (s)')
+    df = records_frame(args.records)
+    if df.empty:
+        print("No SQD data found to plot.")
+        return
+    run_id = args.run_id or df["run_id"].iloc[-1]
+    df_run = df[df["run_id"] == run_id]
+    if df_run.empty:
+        raise SystemExit(f"run id {run_id!r} not found in {args.records}")
 
-    
-    pivot_df.plot(kind='bar', figsize=(12, 7))
+    pivot_df = df_run.pivot(index="ansatz", columns="space", values="runtime")
+    pivot_df.plot(kind="bar", figsize=(12, 7))
 
-    plt.title('SQD Ansatz Runtime Comparison')
-    plt.ylabel('Runtime (s)')
-    plt.xlabel('Ansatz')
-    plt.xticks(rotation=45, ha='right')
+    plt.title(f"SQD Ansatz Runtime Comparison ({df_run['geom'].iloc[0]})")
+    plt.ylabel("Runtime (s)")
+    plt.xlabel("Ansatz")
+    plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
-    plt.savefig('examples/runtimes_comparison.png')
+    plt.savefig(args.out)
     plt.close()
 
-    print("Graph saved to examples/runtimes_comparison.png")
-else:
-    print("No SQD data found to plot.")
+    print(f"Graph saved to {args.out}")
+
 
+if __name__ == "__main__":
+    main()
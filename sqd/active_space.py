@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Tuple, Optional
+from typing import List, Optional, Sequence, Tuple
 import numpy as np
 
 
@@ -33,3 +33,77 @@ def slice_t2_active_from_full(t2_full: np.ndarray, ncore: int, ncas: int) -> Opt
     if nact_vir > nvir_full:
         nact_vir = nvir_full
     return t2_full[ncore:nocc_full, ncore:nocc_full, :nact_vir, :nact_vir]
+
+
+def mp2_occupations(t2: np.ndarray) -> np.ndarray:
+    """
+    Orbital occupations (diagonal of the unrelaxed closed-shell MP2 one-particle density
+    in the canonical MO basis) from MP2 doubles t2[i, j, a, b]; length nocc + nvir.
+    """
+    doo = -(2 * np.einsum("kiab,kjab->ij", t2, t2) - np.einsum("kiab,kjba->ij", t2, t2))
+    dvv = 2 * np.einsum("ijca,ijcb->ab", t2, t2) - np.einsum("ijca,ijbc->ab", t2, t2)
+    return np.concatenate([2.0 + 2.0 * np.diag(doo), 2.0 * np.diag(dvv)])
+
+
+def select_active_orbitals(
+    occupations: np.ndarray,
+    nelec: Tuple[int, int],
+    threshold: float = 0.01,
+    max_orbitals: Optional[int] = None,
+) -> Tuple[List[int], Tuple[int, int]]:
+    """
+    Smallest set of (possibly non-contiguous) orbitals whose occupation deviates from the
+    reference (2 / 1 / 0) by at least `threshold`, strongest first, capped at max_orbitals.
+    Singly occupied orbitals are always active; at least one doubly occupied and one
+    virtual orbital are kept so the space has doubles.
+    Returns (sorted orbital indices, nelecas).
+    """
+    occ = np.asarray(occupations, dtype=float)
+    norb = occ.size
+    n_alpha, n_beta = nelec
+    n_docc, n_socc = min(n_alpha, n_beta), abs(n_alpha - n_beta)
+    ref = np.zeros(norb)
+    ref[:n_docc], ref[n_docc:n_docc + n_socc] = 2.0, 1.0
+    dev = np.abs(occ - ref)
+
+    singly = list(range(n_docc, n_docc + n_socc))
+    ranked = [int(p) for p in np.argsort(-dev, kind="stable") if not n_docc <= p < n_docc + n_socc]
+    docc = [p for p in ranked if p < n_docc]
+    virt = [p for p in ranked if p >= n_docc + n_socc]
+    chosen = [p for p in ranked if dev[p] >= threshold]
+    if docc and not any(p < n_docc for p in chosen):
+        chosen.append(docc[0])
+    if virt and not any(p >= n_docc + n_socc for p in chosen):
+        chosen.append(virt[0])
+    if max_orbitals is not None:
+        budget = max_orbitals - len(singly)
+        if budget < min(1, len(docc)) + min(1, len(virt)):
+            raise ValueError(f"max_orbitals={max_orbitals} leaves no room for an occupied/virtual pair")
+        keep = [docc[0]] if docc else []
+        keep += [virt[0]] if virt else []
+        rest = [p for p in chosen if p not in keep]
+        chosen = keep + rest[:budget - len(keep)]
+    active = sorted(set(chosen) | set(singly))
+    n_core = sum(1 for p in range(n_docc) if p not in active)
+    return active, (n_alpha - n_core, n_beta - n_core)
+
+
+def slice_t2_active(t2_full: np.ndarray, active: Sequence[int]) -> Optional[np.ndarray]:
+    """
+    Slice CCSD t2 (full) to an arbitrary, possibly non-contiguous orbital selection
+    (full MO indices, as from select_active_orbitals). Returns None if the selection has
+    no occupied or no virtual orbital.
+    """
+    nocc_full = t2_full.shape[0]
+    occ = [p for p in sorted(active) if p < nocc_full]
+    vir = [p - nocc_full for p in sorted(active) if p >= nocc_full]
+    if not occ or not vir:
+        return None
+    return t2_full[np.ix_(occ, occ, vir, vir)]
+
+
+def slice_orbsym(orbsym, orbitals) -> Optional[np.ndarray]:
+    """Irreps of the active orbitals (in active order); None passes through."""
+    if orbsym is None:
+        return None
+    return np.asarray(orbsym)[list(orbitals)]
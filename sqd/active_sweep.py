@@ -0,0 +1,128 @@
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Sequence
+import time
+
+from .active_space import choose_active_window, select_active_orbitals, slice_t2_active
+from .cache import IntegralCache
+from .compare import CachedChemistry
+from .jobs import run_sqd_job, run_jobs_parallel, sample_jobs_batched
+from .report import fmt_table, now
+from .runner import SamplerSession, BACKENDS
+from . import spans
+
+
+def active_orbitals_for(size: int, norb: int, nelec, selection: str = "window", occupations=None):
+    """(orbital indices, nelecas) of a `size`-orbital active space chosen by `selection`."""
+    if selection == "window":
+        ncore, ncas, nelecas = choose_active_window(norb, nelec, size)
+        return list(range(ncore, ncore + ncas)), nelecas
+    if selection == "mp2":
+        return select_active_orbitals(occupations, nelec, threshold=0.0, max_orbitals=size)
+    raise ValueError(f"invalid selection: {selection!r} (expected 'window' or 'mp2')")
+
+
+@spans.traced("active_sweep")
+def run_active_space_sweep(
+    atom_string: str,
+    basis: str = "sto-3g",
+    sizes: Sequence[int] = (2, 4, 6),
+    selection: str = "window",        # "window" | "mp2"
+    ansatz: str = "ucj",              # "ucj" | "lucj" | "he" | "hf"
+    shots: int = 100_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    he_layers: int = 2,
+    backend: str = "aer",
+    workers: int = 1,
+    reference_max_dets: Optional[int] = 50_000,
+    cache: Optional[IntegralCache] = None,
+    verbose: bool = False,
+    render: bool = True,
+    **sqd_kwargs,
+) -> List[Dict[str, Any]]:
+    """
+    "Which active size is good enough": SQD on one active space per entry of `sizes`
+    (orbital counts), all derived from a single full-space integral transform by folding
+    the core in NumPy (ChemistryContext.casci). The CASCI reference of a window is solved
+    only if it has at most reference_max_dets determinants (None: always).
+    Errors are against full-space FCI when feasible. With the Aer backend all circuits
+    are sampled in one batched job; diagonalizations run on `workers` processes.
+    render prints the banners and the sweep table; verbose adds the per-stage progress.
+    Returns one row per size, smallest first.
+    """
+    if ansatz not in ("ucj", "lucj", "he", "hf"):
+        raise ValueError(f"invalid ansatz: {ansatz!r}")
+    if backend not in BACKENDS:
+        raise ValueError(f"invalid backend: {backend!r} (expected one of {BACKENDS})")
+    if render:
+        print(f"=== ACTIVE-SPACE SWEEP START: {now()} ===")
+        print(f"  Molecule: {atom_string} ({basis}), selection: {selection}, ansatz: {ansatz}")
+
+    chem = CachedChemistry(atom_string, basis, cache=cache, verbose=verbose)
+    scf, _ = chem.scf()
+    norb, nelec = scf["mo_coeff"].shape[1], tuple(scf["nelec"])
+    sizes = sorted({min(int(n), norb) for n in sizes})
+    if render:
+        print(f"  Sizes (orbitals): {sizes} of {norb}\n")
+    t2_full = chem.ccsd()[0]["t2"] if ansatz in ("ucj", "lucj") else None
+    fci, _ = chem.fci()
+    e_fci = fci["e_tot"]
+    occupations = chem.mp2_occupations()[0]["occupations"] if selection == "mp2" else None
+
+    ctx = chem.ctx
+    jobs: List[Dict[str, Any]] = []
+    meta: List[Dict[str, Any]] = []
+    for size in sizes:
+        orbitals, nelecas = active_orbitals_for(size, norb, nelec, selection, occupations)
+        t0 = time.perf_counter()
+        h1, h2, e_core, e_cas = ctx.casci(orbitals, nelecas, max_dets=reference_max_dets)
+        t_ref = time.perf_counter() - t0
+        t2 = slice_t2_active(t2_full, orbitals) if t2_full is not None else None
+        kind, label = ansatz, ansatz
+        if ansatz in ("ucj", "lucj") and t2 is None:
+            kind, label = "he", f"{ansatz} (fallback)"
+        ncas = len(orbitals)
+        jobs.append({
+            "ansatz": ansatz, "space": "active", "label": f"{label}, ncas={ncas}", "kind": kind,
+            "norb": ncas, "nelec": nelecas, "t2": t2, "he_layers": he_layers, "he_seed": 19,
+            "h1": h1, "h2": h2, "e_core": e_core,
+        })
+        meta.append({"orbitals": orbitals, "nelecas": nelecas, "e_casci": e_cas, "fold_ci_s": t_ref})
+
+    run_kwargs = dict(shots=shots, samples_per_batch=samples_per_batch, max_iterations=max_iterations,
+                      verbose=verbose, backend=backend, **sqd_kwargs)
+    t0 = time.time()
+    if backend == "aer" and not sqd_kwargs.get("chunk_shots"):
+        sample_jobs_batched(jobs, shots, SamplerSession(), verbose)
+    if workers > 1 and len(jobs) > 1:
+        outputs = run_jobs_parallel(jobs, run_kwargs, workers)
+    else:
+        session = SamplerSession()
+        outputs = [run_sqd_job(job, run_kwargs, session) for job in jobs]
+    t_wall = time.time() - t0
+
+    rows: List[Dict[str, Any]] = []
+    for job, m, (e_sqd, info) in zip(jobs, meta, outputs):
+        rows.append({
+            "ncas": job["norb"], "qubits": 2 * job["norb"], "nelecas": m["nelecas"], "orbitals": m["orbitals"],
+            "label": job["label"], "e_sqd": float(e_sqd), "e_casci": m["e_casci"],
+            "sqd_vs_casci_mha": None if m["e_casci"] is None else (e_sqd - m["e_casci"]) * 1e3,
+            "error_mha": None if e_fci is None else (e_sqd - e_fci) * 1e3,
+            "fold_ci_s": m["fold_ci_s"],
+            "sqd_s": info["transpile"] + info["simulate"] + info["diag"],
+        })
+
+    if render:
+        def _f(x, fmt):
+            return "—" if x is None else format(x, fmt)
+
+        table = [[str(r["ncas"]), str(r["qubits"]), str(r["nelecas"]), str(r["orbitals"]),
+                  _f(r["e_casci"], ".8f"), f"{r['e_sqd']:.8f}", _f(r["sqd_vs_casci_mha"], "+.3f"),
+                  _f(r["error_mha"], "+.3f"), f"{r['fold_ci_s']:.3f}", f"{r['sqd_s']:.3f}"] for r in rows]
+        print("\n=== Active-space sweep ===")
+        print(fmt_table(["ncas", "qubits", "nelecas", "orbitals", "CASCI (Ha)", "SQD (Ha)",
+                         "ΔSQD-CASCI (mHa)", "ΔSQD-FCI (mHa)", "fold+CI (s)", "SQD (s)"], table))
+        print(f"\nFCI (full): {_f(e_fci, '.8f')} | one integral transform "
+              f"({ctx.timings.get('ao2mo', 0.0):.3f} s) | SQD wall {t_wall:.2f} s")
+        print(f"=== ACTIVE-SPACE SWEEP END: {now()} ===")
+    return rows
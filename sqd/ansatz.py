@@ -1,6 +1,7 @@
 from __future__ import annotations
 import numpy as np
 from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
 import ffsim
 
 
@@ -22,28 +23,21 @@ def build_ucj(norb: int, nelec, t2):
     return qc
 
 
+def local_t2(t2, k_occ: int = 1, k_vir: int = 1):
+    """t2 with only 'local' doubles kept: |i-j|<=k_occ, |a-b|<=k_vir (others zeroed)."""
+    nocc, _, nvir, _ = t2.shape
+    occ_ok = np.abs(np.arange(nocc)[:, None] - np.arange(nocc)[None, :]) <= k_occ
+    vir_ok = np.abs(np.arange(nvir)[:, None] - np.arange(nvir)[None, :]) <= k_vir
+    mask = occ_ok[..., None, None] & vir_ok[None, None, ...]
+    return np.where(mask, t2, 0.0)
+
+
 def build_lucj_proxy(norb: int, nelec, t2, k_occ: int = 1, k_vir: int = 1):
     """
     Local-UCJ proxy: keep only 'local' doubles by |i-j|<=k_occ, |a-b|<=k_vir.
     Deterministic, no optimizer.
     """
-    nocc, _, nvir, _ = t2.shape
-    occ_i = np.arange(nocc)[:, None]
-    occ_j = np.arange(nocc)[None, :]
-    vir_a = np.arange(nvir)[:, None]
-    vir_b = np.arange(nvir)[None, :]
-
-    occ_ok = (np.abs(occ_i - occ_j) <= k_occ)
-    vir_ok = (np.abs(vir_a - vir_b) <= k_vir)
-    mask = occ_ok[..., None, None] & vir_ok[None, None, ...]
-    t2_local = np.where(mask, t2, 0.0)
-
-    num_qubits = 2 * norb
-    qc = QuantumCircuit(num_qubits)
-    qc.append(ffsim.qiskit.PrepareHartreeFockJW(norb, nelec), range(num_qubits))
-    ucj_op = ffsim.UCJOpSpinBalanced.from_t_amplitudes(t2=t2_local)
-    qc.append(ffsim.qiskit.UCJOpSpinBalancedJW(ucj_op), range(num_qubits))
-    return qc
+    return build_ucj(norb, nelec, local_t2(t2, k_occ, k_vir))
 
 
 def build_he(norb: int, nelec, layers: int = 2, seed: int = 7):
@@ -63,3 +57,28 @@ def build_he(norb: int, nelec, layers: int = 2, seed: int = 7):
         for q in range(num_qubits):
             qc.cx(q, (q + 1) % num_qubits)
     return qc
+
+
+def he_angles(norb: int, layers: int = 2, seed: int = 7):
+    """The Ry angles build_he(norb, nelec, layers, seed) draws, flattened layer by layer."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.2, 1.3, size=(layers, 2 * norb)).ravel()
+
+
+def build_he_parametric(norb: int, nelec, layers: int = 2):
+    """
+    build_he with a ParameterVector θ (layers * 2*norb angles) in place of drawn angles,
+    so one transpiled circuit serves every seed: bind he_angles(norb, layers, seed).
+    Returns (circuit, θ).
+    """
+    num_qubits = 2 * norb
+    theta = ParameterVector("θ", layers * num_qubits)
+    qc = QuantumCircuit(num_qubits)
+    qc.append(ffsim.qiskit.PrepareHartreeFockJW(norb, nelec), range(num_qubits))
+
+    for layer in range(layers):
+        for q in range(num_qubits):
+            qc.ry(theta[layer * num_qubits + q], q)
+        for q in range(num_qubits):
+            qc.cx(q, (q + 1) % num_qubits)
+    return qc, theta
@@ -0,0 +1,303 @@
+from __future__ import annotations
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import fnmatch
+import functools
+import json
+import pathlib
+import statistics
+import time
+from datetime import datetime, timezone
+
+SCHEMA_VERSION = 1
+DEFAULT_MOLECULES = ("LiH",)
+
+# name -> setup(); setup runs untimed and returns the callable to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    def deco(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return deco
+
+
+# ---------------------------------------------------------------- toy (micro) stages
+
+_TOY_NORB, _TOY_NELEC = 2, (1, 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _toy():
+    import numpy as np
+    from .ansatz import build_he
+    from .runner import SamplerSession
+
+    qc = build_he(_TOY_NORB, _TOY_NELEC, layers=1, seed=123)
+    qc.measure_all()
+    session = SamplerSession(seed=1)
+    tqc, _ = session.transpile(qc)
+    meas = session.sample([tqc], 2_000)[0]
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((_TOY_NORB,) * 4)
+    return {"qc": qc, "session": session, "tqc": tqc, "meas": meas, "h1": h1, "h2": h2}
+
+
+@benchmark("toy/ansatz_he")
+def _toy_ansatz():
+    from .ansatz import build_he
+
+    return lambda: build_he(_TOY_NORB, _TOY_NELEC, layers=2, seed=7)
+
+
+@benchmark("toy/transpile_he")
+def _toy_transpile():
+    from qiskit.compiler import transpile
+
+    t = _toy()
+    return lambda: transpile(t["qc"], backend=t["session"].backend, optimization_level=1)
+
+
+@benchmark("toy/sample_aer")
+def _toy_sample():
+    t = _toy()
+    return lambda: t["session"].sample([t["tqc"]], 2_000)
+
+
+@benchmark("toy/ingest")
+def _toy_ingest():
+    from .samples import SampleStore
+
+    t = _toy()
+    return lambda: SampleStore.from_bit_array(t["meas"], _TOY_NORB, _TOY_NELEC)
+
+
+@benchmark("toy/diagonalize")
+def _toy_diag():
+    from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian
+
+    t = _toy()
+    return lambda: diagonalize_fermionic_hamiltonian(
+        t["h1"], t["h2"], t["meas"], samples_per_batch=20, norb=_TOY_NORB, nelec=_TOY_NELEC,
+        max_iterations=2, seed=0,
+    )
+
+
+# ---------------------------------------------------------------- molecule (macro) stages
+
+_MOL_SHOTS = 20_000
+
+
+@functools.lru_cache(maxsize=None)
+def _molecule(case_id: str):
+    """Everything the per-stage benchmarks start from, built once per catalog molecule."""
+    from .data import get_case
+    from .chemistry import rhf_build, ChemistryContext, expand_h2
+    from .ansatz import build_ucj
+    from .runner import SamplerSession, ffsim_state, sample_ffsim
+    from .samples import SampleStore
+
+    cfg = get_case(case_id)
+    mol, mf = rhf_build(cfg["geom"], cfg.get("basis", "sto-3g"), verbose=0)
+    ctx = ChemistryContext(mf)
+    h1, h2, e_core = ctx.integrals()
+    _, t2 = ctx.ccsd()
+    norb, nelec = ctx.norb, tuple(mol.nelec)
+    qc = build_ucj(norb, nelec, t2)
+    qc.measure_all()
+    state = ffsim_state(qc, norb, nelec)
+    meas = sample_ffsim(state, _MOL_SHOTS, seed=1)
+    return {
+        "cfg": cfg, "mf": mf, "norb": norb, "nelec": nelec, "h1": h1, "h2": h2,
+        "h2_dense": expand_h2(h2, norb), "t2": t2, "qc": qc, "state": state, "meas": meas,
+        "store": SampleStore.from_bit_array(meas, norb, nelec), "session": SamplerSession(seed=1),
+    }
+
+
+def _molecule_benchmarks(case_id: str) -> Dict[str, Callable[[], Callable[[], Any]]]:
+    def rhf():
+        from .chemistry import rhf_build
+
+        cfg = _molecule(case_id)["cfg"]
+        return lambda: rhf_build(cfg["geom"], cfg.get("basis", "sto-3g"), verbose=0)
+
+    def fresh_ctx():
+        from .chemistry import ChemistryContext
+
+        return ChemistryContext(_molecule(case_id)["mf"])
+
+    def ao2mo():
+        return lambda: fresh_ctx().integrals()
+
+    def mp2_ccsd():
+        return lambda: fresh_ctx().ccsd()
+
+    def fci():
+        m = _molecule(case_id)
+        if m["norb"] > 14:
+            return None
+        return lambda: fresh_ctx().full_ci()
+
+    def casci_active():
+        from .active_space import choose_active_window
+
+        m = _molecule(case_id)
+        ncore, ncas, nelecas = choose_active_window(m["norb"], m["nelec"], m["cfg"].get("active_orbitals", 6))
+        ctx = fresh_ctx()
+        ctx.integrals()
+        return lambda: ctx.casci(range(ncore, ncore + ncas), nelecas)
+
+    def ansatz_ucj():
+        from .ansatz import build_ucj
+
+        m = _molecule(case_id)
+        return lambda: build_ucj(m["norb"], m["nelec"], m["t2"])
+
+    def transpile_ucj():
+        from qiskit.compiler import transpile
+
+        m = _molecule(case_id)
+        if 2 * m["norb"] > 16:
+            return None
+        return lambda: transpile(m["qc"], backend=m["session"].backend, optimization_level=1)
+
+    def sample_aer():
+        m = _molecule(case_id)
+        if 2 * m["norb"] > 16:
+            return None
+        tqc, _ = m["session"].transpile(m["qc"])
+        return lambda: m["session"].sample([tqc], _MOL_SHOTS)
+
+    def sample_ffsim():
+        from .runner import sample_ffsim as _sample
+
+        m = _molecule(case_id)
+        return lambda: _sample(m["state"], _MOL_SHOTS, seed=2)
+
+    def ingest():
+        from .samples import SampleStore
+
+        m = _molecule(case_id)
+        return lambda: SampleStore.from_bit_array(m["meas"], m["norb"], m["nelec"])
+
+    def diagonalize():
+        from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian
+
+        m = _molecule(case_id)
+        return lambda: diagonalize_fermionic_hamiltonian(
+            m["h1"], m["h2_dense"], m["store"].to_diagonalizer_input(), samples_per_batch=300,
+            norb=m["norb"], nelec=m["nelec"], max_iterations=2, seed=0,
+        )
+
+    stages = {
+        "rhf": rhf, "ao2mo": ao2mo, "mp2_ccsd": mp2_ccsd, "fci": fci, "casci_active": casci_active,
+        "ansatz_ucj": ansatz_ucj, "transpile_ucj": transpile_ucj, "sample_aer": sample_aer,
+        "sample_ffsim": sample_ffsim, "ingest": ingest, "diagonalize": diagonalize,
+    }
+    return {f"{case_id}/{k}": v for k, v in stages.items()}
+
+
+# ---------------------------------------------------------------- timing / baselines
+
+def time_callable(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        fn()
+        out.append((time.perf_counter_ns() - t0) / 1e9)
+    return out
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """median / quartiles / IQR / min of repeated timings (seconds)."""
+    xs = sorted(samples)
+    if len(xs) >= 2:
+        q1, _, q3 = statistics.quantiles(xs, n=4, method="inclusive")
+    else:
+        q1 = q3 = xs[0]
+    return {"median": statistics.median(xs), "q1": q1, "q3": q3, "iqr": q3 - q1,
+            "min": xs[0], "n": len(xs)}
+
+
+def select(pattern: str = "*", molecules=DEFAULT_MOLECULES) -> Dict[str, Callable[[], Callable[[], Any]]]:
+    registry = dict(BENCHMARKS)
+    for case_id in molecules:
+        registry.update(_molecule_benchmarks(case_id))
+    pats = [p.strip() for p in pattern.split(",") if p.strip()] or ["*"]
+    return {k: v for k, v in registry.items() if any(fnmatch.fnmatch(k, p) for p in pats)}
+
+
+def run_benchmarks(
+    pattern: str = "*",
+    molecules=DEFAULT_MOLECULES,
+    repeat: int = 5,
+    warmup: int = 1,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """Time every selected stage `repeat` times; returns a baseline-format dict."""
+    from .records import host_info
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, setup in select(pattern, molecules).items():
+        fn = setup()
+        if fn is None:  # stage not applicable to this molecule (e.g. too many qubits)
+            if verbose:
+                print(f"{name:<32} skipped")
+            continue
+        stats = summarize(time_callable(fn, repeat=repeat, warmup=warmup))
+        results[name] = stats
+        if verbose:
+            print(f"{name:<32} median {stats['median']*1e3:10.3f} ms   IQR {stats['iqr']*1e3:9.3f} ms")
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": repeat,
+        "host": host_info(),
+        "benchmarks": results,
+    }
+
+
+def save_baseline(path, results: Dict[str, Any]) -> None:
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def load_baseline(path) -> Dict[str, Any]:
+    return json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    min_seconds: float = 1e-3,
+) -> Tuple[List[List[str]], List[str]]:
+    """
+    Compare medians stage by stage. A stage regresses when its median grew by more than
+    `threshold` (fraction) AND by more than max(min_seconds, baseline IQR), so noise on
+    tiny or jittery stages does not fail the run. Returns (table rows, regressed names).
+    """
+    rows, regressed = [], []
+    base, cur = baseline["benchmarks"], current["benchmarks"]
+    for name in sorted(set(base) | set(cur)):
+        if name not in base or name not in cur:
+            rows.append([name, _ms(base.get(name)), _ms(cur.get(name)), "—", "new" if name in cur else "missing"])
+            continue
+        b, c = base[name], cur[name]
+        ratio = c["median"] / b["median"] if b["median"] > 0 else float("inf")
+        slower = c["median"] - b["median"]
+        status = "ok"
+        if ratio > 1 + threshold and slower > max(min_seconds, b["iqr"]):
+            status = "REGRESSED"
+            regressed.append(name)
+        elif ratio < 1 / (1 + threshold) and -slower > max(min_seconds, b["iqr"]):
+            status = "faster"
+        rows.append([name, _ms(b), _ms(c), f"{ratio:.2f}x", status])
+    return rows, regressed
+
+
+def _ms(stats: Optional[Dict[str, float]]) -> str:
+    return "—" if stats is None else f"{stats['median']*1e3:.3f}"
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+
+
+# 2: h2 stored 8-fold packed; stages after SCF keyed on the SCF orbitals (orbitals_hash)
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = pathlib.Path(os.environ.get("SQD_CACHE_DIR", "~/.cache/sqd")).expanduser()
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def normalize_geometry(atom_string: str) -> str:
+    """
+    Canonical form of an XYZ-style geometry string:
+      'li 0 0 0; H 0 0 1.6' -> 'Li 0.00000000 0.00000000 0.00000000;H 0.00000000 0.00000000 1.60000000'
+    """
+    atoms = []
+    for entry in atom_string.replace("\n", ";").split(";"):
+        parts = entry.replace(",", " ").split()
+        if not parts:
+            continue
+        sym = parts[0].capitalize()
+        coords = " ".join(f"{float(x):.8f}" for x in parts[1:])
+        atoms.append(f"{sym} {coords}")
+    return ";".join(atoms)
+
+
+def cache_key(
+    atom_string: str,
+    basis: str,
+    stage: str,
+    *,
+    charge: int = 0,
+    spin: int = 0,
+    window: Optional[Tuple[Any, ...]] = None,
+    symmetry: bool = False,
+    parent: Optional[str] = None,
+) -> str:
+    """
+    Content hash of (normalized geometry, basis, charge/spin, stage, active window, symmetry).
+    parent is the orbitals_hash of the SCF bundle a later stage was computed from, so its
+    bundles never pair with a recomputed SCF whose MO phases differ.
+    """
+    payload = {
+        "v": CACHE_VERSION,
+        "geom": normalize_geometry(atom_string),
+        "basis": basis.strip().lower(),
+        "charge": int(charge),
+        "spin": int(spin),
+        "stage": stage,
+        "window": json.loads(json.dumps(window)) if window is not None else None,
+    }
+    if symmetry:
+        payload["symmetry"] = True
+    if parent is not None:
+        payload["parent"] = parent
+    blob = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def orbitals_hash(mo_coeff) -> str:
+    """Content hash of MO coefficients (identifies one SCF solution, phases included)."""
+    import numpy as np
+
+    arr = np.ascontiguousarray(mo_coeff, dtype=np.float64)
+    return hashlib.sha256(repr(arr.shape).encode("utf-8") + arr.tobytes()).hexdigest()
+
+
+class IntegralCache:
+    """
+    Size-bounded LRU cache of chemistry bundles on disk.
+
+    Each bundle is a directory holding one .npy file per array plus meta.json for
+    scalars; arrays are returned memory-mapped (read-only). Access time is tracked
+    through the mtime of meta.json, and the least recently used bundles are evicted
+    once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, root=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = pathlib.Path(root).expanduser() if root is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = int(max_bytes)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored bundle (arrays memory-mapped) or None on a miss."""
+        path = self._path(key)
+        meta_file = path / "meta.json"
+        try:
+            meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        import numpy as np
+
+        out: Dict[str, Any] = dict(meta["scalars"])
+        try:
+            for name in meta["arrays"]:
+                out[name] = np.load(path / f"{name}.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        os.utime(meta_file)
+        return out
+
+    def put(self, key: str, bundle: Dict[str, Any]) -> None:
+        """Store a bundle of arrays and JSON-serializable scalars, then enforce the size bound."""
+        import numpy as np
+
+        arrays = {k: v for k, v in bundle.items() if isinstance(v, np.ndarray)}
+        scalars = {k: v for k, v in bundle.items() if k not in arrays}
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = pathlib.Path(tempfile.mkdtemp(prefix=".tmp-", dir=path.parent))
+        try:
+            for name, arr in arrays.items():
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+            meta = {"arrays": sorted(arrays), "scalars": scalars}
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            if path.exists():
+                shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not path.exists():
+                raise
+        self.evict()
+
+    def _bundles(self):
+        for meta_file in self.root.glob("*/*/meta.json"):
+            path = meta_file.parent
+            try:
+                size = sum(f.stat().st_size for f in path.iterdir())
+                yield meta_file.stat().st_mtime, size, path
+            except OSError:
+                continue
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._bundles())
+
+    def evict(self) -> int:
+        """Drop least recently used bundles until the cache fits max_bytes; return count removed."""
+        entries = sorted(self._bundles())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for _, _, path in list(self._bundles()):
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+
+from .cache import IntegralCache
+from .records import _jsonable
+
+CHECKPOINT_VERSION = 1
+_NO_EVICTION = 1 << 62
+
+
+class CheckpointMismatch(ValueError):
+    """A resume was requested from a checkpoint written for different run inputs."""
+
+
+def _split(obj, arrays: Dict[str, np.ndarray]):
+    """Replace every ndarray in a nested structure by {"__array__": name}, collecting the arrays."""
+    if isinstance(obj, np.ndarray):
+        name = f"a{len(arrays)}"
+        arrays[name] = obj
+        return {"__array__": name}
+    if isinstance(obj, dict):
+        return {str(k): _split(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_split(v, arrays) for v in obj]
+    return _jsonable(obj)
+
+
+def _join(obj, path: pathlib.Path):
+    if isinstance(obj, dict):
+        if set(obj) == {"__array__"}:
+            return np.load(path / f"{obj['__array__']}.npy")
+        return {k: _join(v, path) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_join(v, path) for v in obj]
+    return obj
+
+
+def write_bundle(path: pathlib.Path, obj: Dict[str, Any]) -> None:
+    """
+    Store a nested dict as a directory of .npy arrays + meta.json (the IntegralCache format,
+    with nesting). Written to a temp dir and renamed into place, so a run killed mid-write
+    leaves the previous bundle intact.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    meta = _split(obj, arrays)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix=".tmp-", dir=path.parent))
+    try:
+        for name, arr in arrays.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        old = path.with_name(f".old-{path.name}")
+        if path.exists():
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def read_bundle(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    """The bundle at path, or None if it is missing or incomplete."""
+    try:
+        return _join(json.loads((path / "meta.json").read_text(encoding="utf-8")), path)
+    except (OSError, ValueError):
+        return None
+
+
+class JobCheckpoint:
+    """
+    Checkpoint stages of one SQD job: its sampled configurations, the latest finished SQD
+    iteration (see runner.diagonalize_samples on_iteration/resume_from) and its final
+    result. Loads return None unless the run is resuming. Picklable, so process-pool
+    workers save their own jobs' stages.
+    """
+
+    def __init__(self, root: pathlib.Path, resume: bool):
+        self.root = pathlib.Path(root)
+        self.resume = resume
+
+    def _load(self, stage: str) -> Optional[Dict[str, Any]]:
+        return read_bundle(self.root / stage) if self.resume else None
+
+    def save_samples(self, store, sampled: Dict[str, Any]) -> None:
+        write_bundle(self.root / "samples", {"words": store.words, "counts": store.counts, "norb": store.norb,
+                                             "nelec": list(store.nelec), "sampled": sampled})
+
+    def load_samples(self):
+        """(SampleStore, sampling info) of a previous run, or None."""
+        from .samples import SampleStore
+
+        b = self._load("samples")
+        if b is None:
+            return None
+        return SampleStore(b["words"], b["counts"], b["norb"], tuple(b["nelec"])), b["sampled"]
+
+    def save_iteration(self, state: Dict[str, Any]) -> None:
+        write_bundle(self.root / "iteration", state)
+
+    def load_iteration(self) -> Optional[Dict[str, Any]]:
+        return self._load("iteration")
+
+    def save_done(self, energy: float, info: Dict[str, Any]) -> None:
+        write_bundle(self.root / "done", {"energy": energy, "info": info})
+
+    def load_done(self) -> Optional[Tuple[float, Dict[str, Any]]]:
+        b = self._load("done")
+        return None if b is None else (b["energy"], b["info"])
+
+
+class RunCheckpoint:
+    """
+    Stage-granular checkpoint of one benchmark run in a directory:
+      manifest.json           fingerprint of the run's inputs
+      chemistry/              IntegralCache of the SCF/MP2/CCSD/CASCI/FCI bundles
+      jobs/<space>-<ansatz>/  samples/, iteration/ and done/ bundles (JobCheckpoint)
+    With resume=True completed stages are loaded back; resuming with different inputs
+    raises CheckpointMismatch. With resume=False an existing checkpoint is discarded.
+    """
+
+    def __init__(self, root, inputs: Dict[str, Any], resume: bool = False):
+        self.root = pathlib.Path(root).expanduser()
+        self.resume = resume
+        self.fingerprint = hashlib.sha256(
+            json.dumps({"v": CHECKPOINT_VERSION, **_jsonable(inputs)}, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        manifest = self.root / "manifest.json"
+        found = None
+        if manifest.exists():
+            found = json.loads(manifest.read_text(encoding="utf-8")).get("fingerprint")
+        elif self.root.exists() and any(self.root.iterdir()):
+            raise ValueError(f"{self.root} is not empty and holds no checkpoint")
+        if resume and found is not None and found != self.fingerprint:
+            raise CheckpointMismatch(f"checkpoint in {self.root} was written for different inputs")
+        if not resume and found is not None:
+            for sub in ("jobs", "chemistry"):
+                shutil.rmtree(self.root / sub, ignore_errors=True)
+        self.resumed = resume and found is not None
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(json.dumps({"fingerprint": self.fingerprint, "inputs": _jsonable(inputs)}, indent=2),
+                            encoding="utf-8")
+        self.chemistry = IntegralCache(self.root / "chemistry", max_bytes=_NO_EVICTION)
+
+    def job(self, key: str) -> JobCheckpoint:
+        return JobCheckpoint(self.root / "jobs" / key, self.resume)
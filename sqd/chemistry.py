@@ -1,5 +1,8 @@
 from __future__ import annotations
-from typing import Tuple
+from typing import Tuple, Iterator, Optional, Dict
+from math import comb
+import os
+import time
 
 import numpy as np
 import pyscf
@@ -9,16 +12,58 @@ import pyscf.cc
 import pyscf.mcscf
 import pyscf.ao2mo as ao2mo
 import pyscf.fci
+import pyscf.cc.ccsd
+from pyscf import lib
 
+from . import spans
 
-def rhf_build(atom_string: str, basis: str):
-    """Build PySCF molecule and run RHF."""
+
+def _build_mol(atom_string: str, basis: str, charge: int, spin: int, verbose: Optional[int],
+               symmetry: bool = False):
     mol = pyscf.gto.Mole()
-    mol.build(atom=atom_string, basis=basis)
-    mf = pyscf.scf.RHF(mol).run()
+    if verbose is not None:
+        mol.verbose = verbose  # inherited by every SCF/CC/CI object built on this molecule
+    mol.build(atom=atom_string, basis=basis, charge=charge, spin=spin, symmetry=symmetry)
+    return mol
+
+
+@spans.traced("rhf")
+def rhf_build(atom_string: str, basis: str, charge: int = 0, spin: int = 0, dm0=None,
+              verbose: Optional[int] = None, symmetry: bool = False):
+    """
+    Build PySCF molecule and run RHF (optionally from an initial AO density matrix dm0).
+    symmetry=True detects the point group (PySCF reorients the molecule) and gives
+    symmetry-adapted orbitals, whose irreps orbital_irreps() reads.
+    """
+    mol = _build_mol(atom_string, basis, charge, spin, verbose, symmetry)
+    mf = pyscf.scf.RHF(mol)
+    mf.kernel(dm0=dm0)
     return mol, mf
 
 
+def rhf_restore(atom_string: str, basis: str, mo_coeff, mo_occ, mo_energy, e_tot: float,
+                charge: int = 0, spin: int = 0, verbose: Optional[int] = None, symmetry: bool = False):
+    """Rebuild (mol, mf) from stored RHF orbitals without rerunning SCF."""
+    mol = _build_mol(atom_string, basis, charge, spin, verbose, symmetry)
+    mf = pyscf.scf.RHF(mol)
+    mf.mo_coeff = np.asarray(mo_coeff)
+    mf.mo_occ = np.asarray(mo_occ)
+    mf.mo_energy = np.asarray(mo_energy)
+    mf.e_tot = float(e_tot)
+    mf.converged = True
+    return mol, mf
+
+
+def orbital_irreps(mol, mo_coeff) -> np.ndarray:
+    """
+    Irrep id of each MO (needs a Mole built with symmetry=True), reduced to the Abelian
+    subgroup ids (D2h/C2v for linear molecules) so determinant irreps are XORs.
+    """
+    from pyscf.scf import hf_symm
+
+    return np.asarray(hf_symm.get_orbsym(mol, mo_coeff), dtype=np.int64) % 10
+
+
 def mp2_energy(mf) -> float:
     mp2 = pyscf.mp.MP2(mf).run()
     return mf.e_tot + mp2.e_corr
@@ -30,26 +75,120 @@ def ccsd_energy_and_t2(mf):
 
 
 def casci_integrals_full(mf, norb: int, nelec: Tuple[int, int]):
-    """Return (h1, h2, e_core, e_cas) for full space."""
+    """Return (h1, h2, e_core, e_cas) for full space; h2 is 8-fold packed (see expand_h2)."""
     mo = mf.mo_coeff
     cas = pyscf.mcscf.CASCI(mf, norb, nelec)
     h1, e_core = cas.get_h1cas(mo)
-    h2 = ao2mo.restore(1, cas.get_h2cas(mo), norb)
+    h2 = ao2mo.restore(8, cas.get_h2cas(mo), norb)
     e_cas = cas.kernel(mo)[0]
     return h1, h2, e_core, e_cas
 
 
 def casci_integrals_active(mf, ncore: int, ncas: int, nelecas: Tuple[int, int]):
-    """Return (h1, h2, e_core, e_cas) for an active window with given ncore/ncas."""
+    """Return (h1, h2, e_core, e_cas) for an active window with given ncore/ncas; h2 8-fold packed."""
     mo = mf.mo_coeff
     cas = pyscf.mcscf.CASCI(mf, ncas, nelecas)
     cas.ncore = ncore
     h1, e_core = cas.get_h1cas(mo)
-    h2 = ao2mo.restore(1, cas.get_h2cas(mo), ncas)
+    h2 = ao2mo.restore(8, cas.get_h2cas(mo), ncas)
     e_cas = cas.kernel(mo)[0]
     return h1, h2, e_core, e_cas
 
 
+def _pair(i, j):
+    hi, lo = np.maximum(i, j), np.minimum(i, j)
+    return hi * (hi + 1) // 2 + lo
+
+
+def eri_block(h2, p, q, r, s) -> np.ndarray:
+    """
+    Dense eri[np.ix_(p, q, r, s)] for MO index lists, gathered straight from h2 (8-fold or
+    4-fold packed, or dense): only the requested block is ever materialized.
+    """
+    h2 = np.asarray(h2)
+    p, q, r, s = np.ix_(*(np.asarray(list(x), dtype=np.int64) for x in (p, q, r, s)))
+    if h2.ndim == 4:
+        return np.asarray(h2[p, q, r, s])
+    pq, rs = _pair(p, q), _pair(r, s)
+    if h2.ndim == 2:
+        return np.asarray(h2[pq, rs])
+    return np.asarray(h2[_pair(pq, rs)])
+
+
+def fold_core(h1, h2, e_nuc: float, norb: int, core, active):
+    """
+    Active-space (h1_eff, h2 8-fold packed, e_core) from full-space MO integrals, with the
+    doubly occupied `core` orbitals folded in by NumPy (Coulomb/exchange) instead of a
+    new CASCI object and integral transform. core/active are MO index lists (any order;
+    active keeps the given order). h2 may be packed or dense; only the core/active blocks
+    are gathered from it (eri_block), never the full norb^4 tensor.
+    """
+    c = np.asarray(list(core), dtype=int)
+    a = np.asarray(list(active), dtype=int)
+    e_core = float(e_nuc)
+    h1_eff = np.array(h1[np.ix_(a, a)], dtype=float)
+    if c.size:
+        cccc = eri_block(h2, c, c, c, c)
+        e_core += 2.0 * np.trace(h1[np.ix_(c, c)]) + 2.0 * np.einsum("iijj->", cccc) - np.einsum("ijji->", cccc)
+        h1_eff += (2.0 * np.einsum("pqcc->pq", eri_block(h2, a, a, c, c))
+                   - np.einsum("pccq->pq", eri_block(h2, a, c, c, a)))
+    h2_act = ao2mo.restore(8, np.ascontiguousarray(eri_block(h2, a, a, a, a)), a.size)
+    return h1_eff, h2_act, e_core
+
+
+def _h2_row(h2, pq: int, tri: np.ndarray) -> np.ndarray:
+    """Row pq of the 4-fold (npair, npair) matrix, read straight from packed h2."""
+    if h2.ndim == 2:
+        return h2[pq]
+    # 8-fold stores (ij, kl) with ij >= kl at tri[ij] + kl: the kl <= pq part of the row is
+    # contiguous, the kl > pq part is column pq of the later rows
+    return np.concatenate((h2[tri[pq]:tri[pq] + pq + 1], h2[tri[pq + 1:] + pq]))
+
+
+def iter_h2_blocks(h2, norb: int, block: int = 4) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Expand packed h2 in chunks of the first index: yields (p0, p1, dense[p0:p1, :, :, :]),
+    so at most block*norb^3 dense elements are resident at once (the 4-fold matrix is
+    never built; each pair row is unpacked straight from the packed vector).
+    """
+    h2 = np.asarray(h2)
+    npair = norb * (norb + 1) // 2
+    tri = np.arange(npair, dtype=np.int64)
+    tri = tri * (tri + 1) // 2
+    for p0 in range(0, norb, block):
+        p1 = min(norb, p0 + block)
+        if h2.ndim == 4:
+            yield p0, p1, np.array(h2[p0:p1])
+            continue
+        out = np.empty((p1 - p0, norb, norb, norb))
+        for p in range(p0, p1):
+            for q in range(norb):
+                pq = p * (p + 1) // 2 + q if p >= q else q * (q + 1) // 2 + p
+                out[p - p0, q] = lib.unpack_tril(_h2_row(h2, pq, tri))
+        yield p0, p1, out
+
+
+def expand_h2(h2, norb: int, mmap_path: Optional[str] = None) -> np.ndarray:
+    """
+    Dense (norb, norb, norb, norb) chemists' h2 for consumers that need it (the SQD
+    diagonalizer). Accepts packed (4/8-fold) or dense arrays, or a path to a dense .npy
+    (opened memory-mapped). With mmap_path, the dense tensor is written blockwise to that
+    .npy file and returned memory-mapped instead of held in RAM.
+    """
+    if isinstance(h2, (str, os.PathLike)):
+        return np.load(h2, mmap_mode="r")
+    if h2.ndim == 4:
+        return h2
+    if mmap_path is None:
+        return ao2mo.restore(1, np.asarray(h2), norb)
+    out = np.lib.format.open_memmap(mmap_path, mode="w+", dtype=np.float64,
+                                    shape=(norb, norb, norb, norb))
+    for p0, p1, blk in iter_h2_blocks(h2, norb):
+        out[p0:p1] = blk
+    out.flush()
+    return np.load(mmap_path, mmap_mode="r")
+
+
 def fci_energy_if_feasible(h1, h2, norb, nelec, e_core, max_dets: int = 500_000):
     """Try FCI if determinant count is manageable; return (energy or None, n_dets or None)."""
     from math import comb
@@ -64,3 +203,139 @@ def fci_energy_if_feasible(h1, h2, norb, nelec, e_core, max_dets: int = 500_000)
 
     e_elec, _ = pyscf.fci.direct_spin1.kernel(h1, h2, norb, nelec)
     return e_elec + e_core, dets
+
+
+def _ccsd_eris_from_mo(mycc, h2, norb: int):
+    """
+    CCSD ERI blocks sliced from already-transformed MO integrals (no second ao2mo). h2 is
+    expanded a few first-index rows at a time (iter_h2_blocks), never to the full norb^4.
+    """
+    eris = pyscf.cc.ccsd._ChemistsERIs()
+    eris._common_init_(mycc, mycc.mo_coeff)
+    o = eris.nocc
+    nvir = norb - o
+    eris.oooo = np.empty((o, o, o, o))
+    eris.ovoo = np.empty((o, nvir, o, o))
+    eris.ovvo = np.empty((o, nvir, nvir, o))
+    eris.ovov = np.empty((o, nvir, o, nvir))
+    eris.oovv = np.empty((o, o, nvir, nvir))
+    eris.ovvv = np.empty((o, nvir, nvir * (nvir + 1) // 2))
+    eris.vvvv = np.empty((nvir * (nvir + 1) // 2,) * 2)  # 4-fold, as ao2mo.restore(4) gives
+    for p0, p1, blk in iter_h2_blocks(h2, norb):
+        for p in range(p0, p1):
+            eri = blk[p - p0]
+            if p < o:
+                eris.oooo[p] = eri[:o, :o, :o]
+                eris.ovoo[p] = eri[o:, :o, :o]
+                eris.ovvo[p] = eri[o:, o:, :o]
+                eris.ovov[p] = eri[o:, :o, o:]
+                eris.oovv[p] = eri[:o, o:, o:]
+                eris.ovvv[p] = lib.pack_tril(np.ascontiguousarray(eri[o:, o:, o:]))
+            else:
+                a = p - o  # rows (a, b <= a) of the packed vvvv
+                eris.vvvv[a * (a + 1) // 2:(a + 1) * (a + 2) // 2] = lib.pack_tril(
+                    np.ascontiguousarray(eri[o:p + 1, o:, o:]))
+    return eris
+
+
+class ChemistryContext:
+    """
+    Shared MO-integral context for one RHF reference. The AO->MO ERI transform runs once
+    and feeds CCSD (whose initial guess gives the MP2 energy) and the full-space CI, which
+    is solved once and serves as both the CASCI(full) and FCI energy.
+    Per-step wall times (seconds) accumulate in .timings.
+    """
+
+    def __init__(self, mf):
+        self.mf = mf
+        self.norb = mf.mo_coeff.shape[1]
+        self.nelec = mf.mol.nelec
+        self.timings: Dict[str, float] = {}
+        self._ints = None
+        self._cc = None
+        self._ccsd = None
+        self._ci = None
+        self.t1 = None
+
+    def _timed(self, step: str, fn):
+        t0 = time.perf_counter()
+        with spans.span(step):
+            out = fn()
+        self.timings[step] = self.timings.get(step, 0.0) + time.perf_counter() - t0
+        return out
+
+    def integrals(self):
+        """(h1, h2 8-fold packed, e_core) over all MOs — the only ERI transform."""
+        if self._ints is None:
+            def _compute():
+                mf, mo = self.mf, self.mf.mo_coeff
+                h1 = mo.T @ mf.get_hcore() @ mo
+                eri = mf._eri if getattr(mf, "_eri", None) is not None else mf.mol
+                h2 = ao2mo.restore(8, ao2mo.full(eri, mo), self.norb)
+                return h1, h2, float(mf.energy_nuc())
+            self._ints = self._timed("ao2mo", _compute)
+        return self._ints
+
+    def _ccsd_setup(self):
+        if self._cc is None:
+            mycc = pyscf.cc.CCSD(self.mf)
+            eris = self._timed("ccsd_eris", lambda: _ccsd_eris_from_mo(mycc, self.integrals()[1], self.norb))
+            emp2, t1, t2 = self._timed("mp2", lambda: mycc.init_amps(eris))
+            self._cc = (mycc, eris, float(emp2), t1, t2)
+        return self._cc
+
+    def mp2_t2(self):
+        """MP2 doubles amplitudes (the CCSD initial guess)."""
+        return self._ccsd_setup()[4]
+
+    def mp2_energy(self) -> float:
+        """MP2 total energy, taken from the CCSD initial-guess amplitudes."""
+        _, _, emp2, _, _ = self._ccsd_setup()
+        return self.mf.e_tot + emp2
+
+    def ccsd(self, t1=None, t2=None):
+        """
+        (CCSD total energy, t2). t1/t2 replace the MP2 initial guess when their shapes
+        match (e.g. amplitudes from a neighbouring geometry); see .t1 for the converged t1.
+        """
+        if self._ccsd is None:
+            mycc, eris, _, g1, g2 = self._ccsd_setup()
+            if t1 is not None and t2 is not None and t1.shape == g1.shape and t2.shape == g2.shape:
+                g1, g2 = t1, t2
+            self._timed("ccsd", lambda: mycc.kernel(t1=g1, t2=g2, eris=eris))
+            self._ccsd = (self.mf.e_tot + mycc.e_corr, mycc.t2)
+            self.t1 = mycc.t1
+        return self._ccsd
+
+    def full_ci(self) -> float:
+        """Full-space CI total energy (= CASCI(full) = FCI), solved once."""
+        if self._ci is None:
+            h1, h2, e_core = self.integrals()
+            e_elec, _ = self._timed(
+                "ci_full", lambda: pyscf.fci.direct_spin1.kernel(h1, h2, self.norb, self.nelec)
+            )
+            self._ci = e_elec + e_core
+        return self._ci
+
+    def casci(self, active, nelecas: Tuple[int, int], max_dets: Optional[int] = None):
+        """
+        (h1, h2 packed, e_core, e_cas) for an active orbital list, folded from the shared
+        full-space integrals (no extra transform). Occupied orbitals below the active ones
+        are core. e_cas is None when the active space has more than max_dets determinants.
+        """
+        active = [int(p) for p in active]
+        n_core = (self.nelec[0] + self.nelec[1] - sum(nelecas)) // 2
+        core = [p for p in range(self.norb) if p not in active][:n_core]
+        h1, h2, e_nuc = self.integrals()
+        h1_act, h2_act, e_core = self._timed(
+            "fold_core", lambda: fold_core(h1, h2, e_nuc, self.norb, core, active)
+        )
+        ncas = len(active)
+        e_cas = None
+        if max_dets is None or comb(ncas, nelecas[0]) * comb(ncas, nelecas[1]) <= max_dets:
+            e_elec, _ = self._timed("ci_active", lambda: pyscf.fci.direct_spin1.kernel(h1_act, h2_act, ncas, nelecas))
+            e_cas = e_elec + e_core
+        return h1_act, h2_act, e_core, e_cas
+
+    def n_determinants(self) -> int:
+        return comb(self.norb, self.nelec[0]) * comb(self.norb, self.nelec[1])
@@ -1,16 +1,28 @@
 from __future__ import annotations
+import os
 import typer
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from .compare import run_sqd_benchmark
-from .chemistry import rhf_build, casci_integrals_full
-from .ansatz import build_ucj, build_lucj_proxy, build_he, build_hf
-from .runner import run_sqd_once
+# Only light modules at import time: pyscf/qiskit/ffsim load inside the commands that use them.
+from .cache import DEFAULT_MAX_BYTES
+from .data import get_case, list_molecules
+from . import spans
+
+if TYPE_CHECKING:
+    from .cache import IntegralCache
 
 
 app = typer.Typer(no_args_is_help=True)
 
 
+def _open_cache(cache_dir: Optional[str], cache_max_gb: float) -> Optional[IntegralCache]:
+    if cache_dir is None:
+        return None
+    from .cache import IntegralCache
+
+    return IntegralCache(cache_dir, max_bytes=int(cache_max_gb * 1024**3))
+
+
 @app.command()
 def run(
     geom: str = typer.Option(..., help="XYZ-style string, e.g. 'Li 0 0 0; H 0 0 1.6'"),
@@ -20,31 +32,39 @@ def run(
     samples_per_batch: int = 300,
     max_iterations: int = 6,
     he_layers: int = 2,
+    lucj_k_occ: int = typer.Option(1, help="LUCJ locality: keep doubles with |i-j| <= k_occ"),
+    lucj_k_vir: int = typer.Option(1, help="LUCJ locality: keep doubles with |a-b| <= k_vir"),
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    chunk_shots: Optional[int] = typer.Option(None, help="Draw shots in chunks of this size, stopping once sampling saturates"),
+    saturation_rate: float = typer.Option(1e-3, help="Stop when a chunk adds fewer new valid configs per shot"),
+    target_unique: Optional[int] = typer.Option(None, help="Stop once this many valid configurations are sampled"),
+    energy_tol: Optional[float] = typer.Option(None, help="Stop SQD iterations once the best energy changes by less (Ha)"),
+    dim_plateau: Optional[int] = typer.Option(None, help="Stop once the subspace has not grown for this many iterations"),
+    time_limit: Optional[float] = typer.Option(None, help="Stop SQD iterations after this many seconds of diagonalization"),
+    mem_gb: Optional[float] = typer.Option(None, help="Memory budget: pick the Aer method/precision to fit, or refuse"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    cache_max_gb: float = DEFAULT_MAX_BYTES / 1024**3,
+    profile: Optional[str] = typer.Option(None, help="Profile with cProfile; writes <prefix>.pstats/.collapsed/.spans.collapsed"),
+    profile_memory: bool = typer.Option(False, help="Record tracemalloc/RSS peaks per span (slower)"),
 ):
     """Run a single SQD calculation."""
-    mol, mf = rhf_build(geom, basis)
-    norb = mf.mo_coeff.shape[1]
-    nelec = mol.nelec
-
-    h1, h2, e_core, _ = casci_integrals_full(mf, norb, nelec)
-    if ansatz == "ucj":
-        from .chemistry import ccsd_energy_and_t2
-        _, t2 = ccsd_energy_and_t2(mf)
-        qc = build_ucj(norb, nelec, t2)
-    elif ansatz == "lucj":
-        from .chemistry import ccsd_energy_and_t2
-        _, t2 = ccsd_energy_and_t2(mf)
-        qc = build_lucj_proxy(norb, nelec, t2, k_occ=1, k_vir=1)
-    elif ansatz == "he":
-        qc = build_he(norb, nelec, layers=he_layers, seed=7)
-    else:
-        qc = build_hf(norb, nelec)
-    qc = qc.copy(); qc.measure_all()
-
-    e_total, _ = run_sqd_once(
-        h1, h2, e_core, norb, nelec, qc,
-        shots=shots, samples_per_batch=samples_per_batch,
-        max_iterations=max_iterations, verbose=True, label=f"SQD ({ansatz})",
+    if profile_memory:
+        spans.enable_memory()
+    with spans.profiled(profile):
+        _run(geom, basis, ansatz, shots, samples_per_batch, max_iterations, he_layers, backend,
+             cache_dir, cache_max_gb, lucj_k_occ, lucj_k_vir, chunk_shots=chunk_shots, saturation_rate=saturation_rate,
+             target_unique=target_unique, energy_tol=energy_tol, dim_plateau=dim_plateau,
+             time_limit=time_limit, mem_budget=int(mem_gb * 1024**3) if mem_gb else None)
+
+
+def _run(geom, basis, ansatz, shots, samples_per_batch, max_iterations, he_layers, backend,
+         cache_dir, cache_max_gb, lucj_k_occ=1, lucj_k_vir=1, **sqd_kwargs):
+    from .compare import run_single_sqd
+
+    e_total, _ = run_single_sqd(
+        geom, basis, ansatz, he_layers, lucj_k_occ, lucj_k_vir, cache=_open_cache(cache_dir, cache_max_gb),
+        shots=shots, samples_per_batch=samples_per_batch, max_iterations=max_iterations,
+        backend=backend, **sqd_kwargs,
     )
     typer.echo(f"\nFinal SQD energy ({ansatz}): {e_total:.8f} Ha")
 
@@ -59,22 +79,429 @@ def bench(
     max_iterations: int = 6,
     he_layers: int = 2,
     n_act_orb: Optional[int] = None,
+    active_space: str = typer.Option("window", help="window (contiguous, --n-act-orb) | mp2 (MP2 occupations)"),
+    occ_threshold: float = typer.Option(0.01, help="mp2: keep orbitals whose occupation deviates from 2/0 by this much"),
+    max_qubits: Optional[int] = typer.Option(None, help="mp2: qubit budget for the active space"),
+    lucj_k_occ: int = typer.Option(1, help="LUCJ locality: keep doubles with |i-j| <= k_occ"),
+    lucj_k_vir: int = typer.Option(1, help="LUCJ locality: keep doubles with |a-b| <= k_vir"),
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    workers: int = typer.Option(1, help="Process pool size for the per-ansatz SQD jobs"),
+    batch_sampling: bool = typer.Option(True, help="Sample every circuit in one SamplerV2 job (Aer, no --chunk-shots)"),
+    pipeline: bool = typer.Option(False, help="Sample the next job while the current one is diagonalized (workers=1)"),
+    pipeline_depth: int = typer.Option(1, help="--pipeline: sampled jobs allowed to wait for the diagonalizer"),
+    checkpoint_dir: Optional[str] = typer.Option(None, help="Save chemistry, samples and every SQD iteration here"),
+    resume: bool = typer.Option(False, help="Continue the run checkpointed in --checkpoint-dir"),
+    mem_gb: Optional[float] = typer.Option(None, help="Memory budget: downsize the active space / skip full-space jobs to fit"),
+    oversize: str = typer.Option("downsize", help="downsize | refuse (fail instead of downsizing or skipping)"),
+    symmetry: str = typer.Option("off", help="off | fold (point-group-restricted eigensolves) | filter (also drop wrong-irrep samples)"),
+    target_irrep: Optional[str] = typer.Option(None, help="Target irrep name, e.g. Ag (default: the HF determinant's)"),
+    h2_mmap_dir: Optional[str] = typer.Option(None, help="Expand dense h2 to memory-mapped .npy files under this directory (private per run, removed afterwards)"),
+    record: Optional[str] = typer.Option(None, help="Append a structured run record to this JSONL file"),
+    parquet: Optional[str] = typer.Option(None, help="Also rewrite a per-job Parquet table from the JSONL records"),
+    quiet: bool = typer.Option(False, help="No progress output or table (use with --record)"),
+    chunk_shots: Optional[int] = typer.Option(None, help="Draw shots in chunks of this size, stopping once sampling saturates"),
+    saturation_rate: float = typer.Option(1e-3, help="Stop when a chunk adds fewer new valid configs per shot"),
+    target_unique: Optional[int] = typer.Option(None, help="Stop once this many valid configurations are sampled"),
+    energy_tol: Optional[float] = typer.Option(None, help="Stop SQD iterations once the best energy changes by less (Ha)"),
+    dim_plateau: Optional[int] = typer.Option(None, help="Stop once the subspace has not grown for this many iterations"),
+    time_limit: Optional[float] = typer.Option(None, help="Stop SQD iterations after this many seconds of diagonalization"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    cache_max_gb: float = DEFAULT_MAX_BYTES / 1024**3,
+    profile: Optional[str] = typer.Option(None, help="Profile with cProfile; writes <prefix>.pstats/.collapsed/.spans.collapsed"),
+    profile_memory: bool = typer.Option(False, help="Record tracemalloc/RSS peaks per span (slower)"),
 ):
     """Run the comparison table across ansätze (full & active)."""
-    run_sqd_benchmark(
-        atom_string=geom,
-        basis=basis,
-        ansatz=ansatz,
-        max_iterations=max_iterations,
-        shots=shots,
-        samples_per_batch=samples_per_batch,
-        he_layers=he_layers,
-        n_act_orb=n_act_orb,
-        verbose=True,
+    from .compare import run_sqd_benchmark
+
+    if resume and checkpoint_dir is None:
+        raise typer.BadParameter("--resume needs --checkpoint-dir")
+
+    if profile_memory:
+        spans.enable_memory()
+    with spans.profiled(profile):
+        run_sqd_benchmark(
+            atom_string=geom,
+            basis=basis,
+            ansatz=ansatz,
+            max_iterations=max_iterations,
+            shots=shots,
+            samples_per_batch=samples_per_batch,
+            he_layers=he_layers,
+            n_act_orb=n_act_orb,
+            active_space=active_space,
+            occ_threshold=occ_threshold,
+            max_qubits=max_qubits,
+            lucj_k_occ=lucj_k_occ,
+            lucj_k_vir=lucj_k_vir,
+            verbose=not quiet,
+            cache=_open_cache(cache_dir, cache_max_gb),
+            backend=backend,
+            workers=workers,
+            render=not quiet,
+            record_path=record,
+            parquet_path=parquet,
+            h2_mmap_dir=h2_mmap_dir,
+            chunk_shots=chunk_shots,
+            saturation_rate=saturation_rate,
+            target_unique=target_unique,
+            energy_tol=energy_tol,
+            dim_plateau=dim_plateau,
+            time_limit=time_limit,
+            batch_sampling=batch_sampling,
+            pipeline=pipeline,
+            pipeline_depth=pipeline_depth,
+            checkpoint_dir=checkpoint_dir,
+            resume=resume,
+            mem_budget_gb=mem_gb,
+            oversize=oversize,
+            symmetry=symmetry,
+            target_irrep=target_irrep,
+        )
+
+
+@app.command()
+def cases(
+    check: str = typer.Option("", help="Comma-separated case IDs to validate (exit code 1 if any is unknown)"),
+):
+    """List the molecule cases in data/molecules.json (or validate IDs)."""
+    if check:
+        known = {c.lower() for c in list_molecules()}
+        unknown = [c.strip() for c in check.split(",") if c.strip() and c.strip().lower() not in known]
+        if unknown:
+            typer.echo(f"unknown case id(s): {', '.join(unknown)}", err=True)
+            raise typer.Exit(1)
+        return
+    for case_id in list_molecules():
+        cfg = get_case(case_id)
+        typer.echo(f"{case_id:<16} {cfg.get('basis', ''):<10} {cfg.get('label', cfg['geom'])}")
+
+
+@app.command("bench-suite")
+def bench_suite(
+    cases: str = typer.Option("", help="Comma-separated case IDs from data/molecules.json (default: all)"),
+    ansatz: str = typer.Option("all", help="ucj | lucj | he | hf | all"),
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    shots: Optional[int] = None,
+    samples_per_batch: Optional[int] = None,
+    max_iterations: Optional[int] = None,
+    he_layers: Optional[int] = None,
+    n_act_orb: Optional[int] = None,
+    active_space: Optional[str] = typer.Option(None, help="window | mp2 (default: per case, else window)"),
+    max_qubits: Optional[int] = typer.Option(None, help="mp2: qubit budget for the active space"),
+    chunk_shots: Optional[int] = typer.Option(None, help="Draw shots in chunks of this size, stopping once sampling saturates"),
+    max_cores: Optional[int] = typer.Option(None, help="Core budget (default: all available)"),
+    max_mem_gb: Optional[float] = typer.Option(None, help="Memory budget (default: 80% of RAM)"),
+    case_mem_gb: Optional[float] = typer.Option(None, help="Per-case pre-flight budget (downsize/skip SQD jobs to fit)"),
+    symmetry: Optional[str] = typer.Option(None, help="off | fold | filter (default: per case, else off)"),
+    pipeline: Optional[bool] = typer.Option(None, "--pipeline/--no-pipeline",
+                                            help="Overlap each case's sampling and diagonalization (default: per case, else off)"),
+    checkpoint_dir: Optional[str] = typer.Option(None, help="Checkpoint each case in <checkpoint-dir>/<id>"),
+    resume: bool = typer.Option(False, help="Continue the cases checkpointed in --checkpoint-dir"),
+    log_dir: Optional[str] = typer.Option(None, help="Write each case's full output to <log-dir>/<id>.log"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    record: Optional[str] = typer.Option(None, help="Append one structured record per case to this JSONL file"),
+):
+    """Run catalog molecules concurrently under a core/memory budget, streaming results."""
+    from .scheduler import run_suite
+
+    if resume and checkpoint_dir is None:
+        raise typer.BadParameter("--resume needs --checkpoint-dir")
+    ids = [c.strip() for c in cases.split(",") if c.strip()] or list_molecules()
+    overrides = {
+        "shots": shots, "samples_per_batch": samples_per_batch, "max_iterations": max_iterations,
+        "he_layers": he_layers, "active_orbitals": n_act_orb, "chunk_shots": chunk_shots,
+        "active_space": active_space, "max_qubits": max_qubits, "mem_budget_gb": case_mem_gb,
+        "symmetry": symmetry, "pipeline": pipeline,
+    }
+    selected = []
+    for case_id in ids:
+        try:
+            cfg = get_case(case_id)
+        except StopIteration:
+            raise typer.BadParameter(f"unknown case id '{case_id}'. Available: {', '.join(list_molecules())}")
+        cfg.update({k: v for k, v in overrides.items() if v is not None})
+        if checkpoint_dir is not None:
+            cfg.update(checkpoint_dir=os.path.join(checkpoint_dir, case_id), resume=resume)
+        selected.append({**cfg, "ansatz": ansatz, "cache_dir": cache_dir, "record_path": record})
+
+    max_mem = int(max_mem_gb * 1024**3) if max_mem_gb else None
+    for cfg, res in run_suite(selected, max_cores=max_cores, max_mem_bytes=max_mem,
+                              backend=backend, log_dir=log_dir):
+        if "error" in res:
+            typer.echo(f"[{cfg['id']}] FAILED: {res['error']}")
+            continue
+        ref = res["reference"]
+        parts = [f"{a}/{space}={(v['energy'] - ref['energy'])*1e3:+.3f}"
+                 for a, spaces in res["sqd"].items() for space, v in spaces.items()]
+        typer.echo(f"[{cfg['id']}] {ref['name']}={ref['energy']:.8f} Ha | ΔSQD (mHa) "
+                   f"{' '.join(parts)} | wall {res['wall']:.1f} s")
+
+
+@app.command()
+def scan(
+    geom_template: str = typer.Option(..., help="Geometry with an {r} placeholder, e.g. 'N 0 0 0; N 0 0 {r}'"),
+    displacements: str = typer.Option(..., help="Comma-separated values substituted for {r}"),
+    basis: str = typer.Option("sto-3g"),
+    ansatz: str = typer.Option("ucj", help="ucj | lucj | he | hf"),
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    he_layers: int = 2,
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    warm_start: bool = typer.Option(True, help="Seed RHF/CCSD from the previous point"),
+    seed_configs: bool = typer.Option(False, help="Carry the previous point's dominant determinants into SQD"),
+    workers: int = typer.Option(1, help="Process pool size for independent points (no warm start)"),
+    chunk_shots: Optional[int] = typer.Option(None, help="Draw shots in chunks of this size, stopping once sampling saturates"),
+    energy_tol: Optional[float] = typer.Option(None, help="Stop SQD iterations once the best energy changes by less (Ha)"),
+    profile: Optional[str] = typer.Option(None, help="Profile with cProfile; writes <prefix>.pstats/.collapsed/.spans.collapsed"),
+    profile_memory: bool = typer.Option(False, help="Record tracemalloc/RSS peaks per span (slower)"),
+):
+    """Potential-energy-surface scan with warm starts between geometry points."""
+    from .scan import run_sqd_scan
+
+    try:
+        points = [float(x) for x in displacements.split(",") if x.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"displacements must be numbers: {displacements!r}")
+    if profile_memory:
+        spans.enable_memory()
+    with spans.profiled(profile):
+        run_sqd_scan(
+            geom_template, points, basis=basis, ansatz=ansatz, shots=shots,
+            samples_per_batch=samples_per_batch, max_iterations=max_iterations, he_layers=he_layers,
+            backend=backend, warm_start=warm_start, seed_configurations=seed_configs, workers=workers,
+            chunk_shots=chunk_shots, energy_tol=energy_tol,
+        )
+
+
+@app.command()
+def preflight(
+    geom: str = typer.Option(..., help="XYZ-style string"),
+    basis: str = typer.Option("sto-3g"),
+    ansatz: str = typer.Option("all", help="ucj | lucj | he | hf | all"),
+    n_act_orb: int = 6,
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    he_layers: int = 2,
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    mem_gb: Optional[float] = typer.Option(None, help="Memory budget (default: 80% of RAM)"),
+    transpile: bool = typer.Option(True, help="Report depth/gate counts after Aer transpilation"),
+):
+    """Estimate memory, SCI dimension and circuit cost per planned job; exits 1 if any job cannot fit."""
+    from .preflight import preflight_molecule, render_plan
+
+    rows = preflight_molecule(geom, basis, ansatz, n_act_orb, shots, samples_per_batch, he_layers, backend,
+                              int(mem_gb * 1024**3) if mem_gb else None, transpile)
+    typer.echo(render_plan(rows))
+    refused = [r for r in rows if r.get("error")]
+    for r in refused:
+        typer.echo(f"{r['job']}: {r['error']}", err=True)
+    if refused:
+        raise typer.Exit(1)
+
+
+@app.command("he-ensemble")
+def he_ensemble(
+    geom: str = typer.Option(..., help="XYZ-style string"),
+    basis: str = typer.Option("sto-3g"),
+    seeds: str = typer.Option("7", help="Comma-separated HE angle seeds (or a range 'a:b')"),
+    he_layers: int = 2,
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    pool: bool = typer.Option(False, help="Merge all members' samples into one SQD run"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    cache_max_gb: float = DEFAULT_MAX_BYTES / 1024**3,
+):
+    """Multi-seed HE ensemble: transpile the parametric circuit once, bind all seeds in one sampler job."""
+    from .compare import CachedChemistry
+    from .runner import run_he_ensemble
+
+    try:
+        if ":" in seeds:
+            lo, hi = (int(x) for x in seeds.split(":"))
+            seed_list = list(range(lo, hi))
+        else:
+            seed_list = [int(x) for x in seeds.split(",") if x.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"seeds must be integers or a range 'a:b': {seeds!r}")
+    chem = CachedChemistry(geom, basis, cache=_open_cache(cache_dir, cache_max_gb))
+    scf, _ = chem.scf()
+    norb, nelec = scf["mo_coeff"].shape[1], tuple(scf["nelec"])
+    cas, _ = chem.casci_full(norb, nelec)
+    e_best, info = run_he_ensemble(
+        cas["h1"], cas["h2"], cas["e_core"], norb, nelec, seeds=seed_list, layers=he_layers,
+        shots=shots, pool=pool, samples_per_batch=samples_per_batch, max_iterations=max_iterations,
+    )
+    if info["best"] is not None:
+        for m in info["members"]:
+            typer.echo(f"seed {m['seed']:>4}: {m['energy']:.8f} Ha ({m['unique_valid_configs']} valid configs)")
+        typer.echo(f"\nBest HE seed: {info['members'][info['best']]['seed']}")
+    typer.echo(f"Final SQD energy (HE ensemble): {e_best:.8f} Ha")
+
+
+@app.command("active-sweep")
+def active_sweep(
+    geom: str = typer.Option(..., help="XYZ-style string"),
+    basis: str = typer.Option("sto-3g"),
+    sizes: str = typer.Option("2,4,6", help="Comma-separated active-space sizes (orbitals)"),
+    selection: str = typer.Option("window", help="window (contiguous) | mp2 (MP2 occupations)"),
+    ansatz: str = typer.Option("ucj", help="ucj | lucj | he | hf"),
+    shots: int = 100_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    workers: int = typer.Option(1, help="Process pool size for the SQD diagonalizations"),
+    reference_max_dets: int = typer.Option(50_000, help="Solve the CASCI reference only up to this many determinants"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    cache_max_gb: float = DEFAULT_MAX_BYTES / 1024**3,
+):
+    """SQD across active-space sizes, all folded from one full-space integral transform."""
+    from .active_sweep import run_active_space_sweep
+
+    try:
+        size_list = [int(x) for x in sizes.split(",") if x.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"sizes must be comma-separated integers: {sizes!r}")
+    run_active_space_sweep(
+        geom, basis, sizes=size_list, selection=selection, ansatz=ansatz, shots=shots,
+        samples_per_batch=samples_per_batch, max_iterations=max_iterations, backend=backend,
+        workers=workers, reference_max_dets=reference_max_dets, cache=_open_cache(cache_dir, cache_max_gb),
+    )
+
+
+@app.command("lucj-sweep")
+def lucj_sweep(
+    geom: str = typer.Option(..., help="XYZ-style string"),
+    basis: str = typer.Option("sto-3g"),
+    k_occ: str = typer.Option("0,1,2", help="Comma-separated occupied locality windows |i-j| <= k_occ"),
+    k_vir: str = typer.Option("0,1,2", help="Comma-separated virtual locality windows |a-b| <= k_vir"),
+    space: str = typer.Option("full", help="full | active"),
+    n_act_orb: Optional[int] = None,
+    shots: int = 100_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    backend: str = typer.Option("aer", help="aer | ffsim (number-conserving statevector)"),
+    workers: int = typer.Option(1, help="Process pool size for the SQD diagonalizations"),
+    tolerance: float = typer.Option(1.6, help="Recommend the cheapest window within this error (mHa)"),
+    cache_dir: Optional[str] = typer.Option(None, help="Directory for the SCF/integral/CCSD cache"),
+    cache_max_gb: float = DEFAULT_MAX_BYTES / 1024**3,
+):
+    """Sweep LUCJ locality windows (k_occ, k_vir) and print the cost/accuracy frontier."""
+    from .lucj_sweep import run_lucj_sweep
+
+    try:
+        occ = [int(x) for x in k_occ.split(",") if x.strip()]
+        vir = [int(x) for x in k_vir.split(",") if x.strip()]
+    except ValueError:
+        raise typer.BadParameter(f"k_occ/k_vir must be comma-separated integers: {k_occ!r}, {k_vir!r}")
+    run_lucj_sweep(
+        geom, basis, k_occ=occ, k_vir=vir, space=space, n_act_orb=n_act_orb, shots=shots,
+        samples_per_batch=samples_per_batch, max_iterations=max_iterations, backend=backend,
+        workers=workers, tolerance_mha=tolerance, cache=_open_cache(cache_dir, cache_max_gb),
     )
 
+
+@app.command()
+def perf(
+    select: str = typer.Option("*", help="Comma-separated glob(s) of stage names, e.g. 'toy/*,LiH/diagonalize'"),
+    molecules: str = typer.Option("LiH", help="Comma-separated catalog case IDs for the macro stages ('' for toy only)"),
+    repeat: int = typer.Option(5, help="Timed repetitions per stage (after one warm-up)"),
+    save: Optional[str] = typer.Option(None, help="Write the timings as a JSON baseline"),
+    compare: Optional[str] = typer.Option(None, help="Compare against this JSON baseline; exit code 1 on regression"),
+    threshold: float = typer.Option(0.2, help="Allowed fractional slowdown of a stage median"),
+):
+    """Stage-level performance benchmarks (median/IQR), with JSON baselines and regression checks."""
+    from .benchmarks import run_benchmarks, save_baseline, load_baseline, compare as compare_runs
+    from .report import fmt_table
+
+    case_ids = [c.strip() for c in molecules.split(",") if c.strip()]
+    known = set(list_molecules())
+    for case_id in case_ids:
+        if case_id not in known:
+            raise typer.BadParameter(f"unknown case id '{case_id}'. Available: {', '.join(list_molecules())}")
+    baseline = load_baseline(compare) if compare else None
+    current = run_benchmarks(select, case_ids, repeat=repeat)
+    if save:
+        save_baseline(save, current)
+        typer.echo(f"Baseline written: {save}")
+    if baseline is None:
+        return
+    rows, regressed = compare_runs(baseline, current, threshold=threshold)
+    typer.echo("\n" + fmt_table(["stage", "baseline (ms)", "current (ms)", "ratio", "status"], rows))
+    if regressed:
+        typer.echo(f"\n{len(regressed)} stage(s) regressed by more than {threshold:.0%}: {', '.join(regressed)}", err=True)
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on (keep it local: jobs run arbitrary geometries)"),
+    port: int = typer.Option(8765),
+    workers: int = typer.Option(1, help="Warm worker processes (jobs running at once)"),
+    threads: Optional[int] = typer.Option(None, help="BLAS/Aer threads per worker (default: cores // workers)"),
+    cache_dir: Optional[str] = typer.Option(None, help="SCF/integral/CCSD cache shared by all jobs"),
+    output_dir: Optional[str] = typer.Option(None, help="Root for job file args (record, parquet, ...); refused if unset"),
+    quiet: bool = typer.Option(False, help="Do not log requests"),
+):
+    """Serve run/bench jobs over HTTP from a pool of warm workers (see `sqd submit`)."""
+    from .service import serve as run_service
+
+    run_service(host, port, workers=workers, threads=threads, cache_dir=cache_dir, output_dir=output_dir,
+                verbose=not quiet)
+
+
+@app.command()
+def submit(
+    command: str = typer.Argument("run", help="run | bench (ignored for --file specs that set it)"),
+    set_: List[str] = typer.Option([], "--set", help="Job argument key=value (CLI option name; JSON values), repeatable"),
+    file: Optional[str] = typer.Option(None, help="JSONL of job specs {command, args, priority}, one per line"),
+    priority: int = typer.Option(0, help="Higher runs first"),
+    url: str = typer.Option("http://127.0.0.1:8765", help="Service URL"),
+    wait: bool = typer.Option(True, help="Stream results (one JSON line per job, completion order); else print job ids"),
+    timeout: Optional[float] = typer.Option(None, help="Stop waiting after this many seconds"),
+):
+    """Submit jobs to `sqd serve` and stream back their results; exit code 1 if any job failed."""
+    import json
+
+    from .service import stream_results, submit_jobs
+
+    specs = []
+    if file:
+        with open(file, encoding="utf-8") as fh:
+            specs = [json.loads(line) for line in fh if line.strip()]
+        for spec in specs:
+            spec.setdefault("command", command)
+            spec.setdefault("priority", priority)
+    if set_:
+        args = {}
+        for item in set_:
+            key, sep, value = item.partition("=")
+            if not sep:
+                raise typer.BadParameter(f"expected key=value, got {item!r}")
+            try:
+                args[key.replace("-", "_")] = json.loads(value)
+            except ValueError:
+                args[key.replace("-", "_")] = value
+        specs.append({"command": command, "args": args, "priority": priority})
+    if not specs:
+        raise typer.BadParameter("nothing to submit: pass --set key=value and/or --file")
+    ids = submit_jobs(url, specs)
+    if not wait:
+        typer.echo("\n".join(ids))
+        return
+    failed = 0
+    for snap in stream_results(url, ids, timeout):
+        failed += snap["status"] != "done"
+        typer.echo(json.dumps(snap))
+    if failed:
+        raise typer.Exit(1)
+
+
 def run_case(case: str):
     """Run SQD using a molecule defined in data/molecules.json"""
+    from .compare import run_sqd_benchmark
+
     cfg = get_case(case)
     run_sqd_benchmark(
         atom_string=cfg["geom"],
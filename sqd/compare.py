@@ -1,41 +1,297 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+import os
+import shutil
+import tempfile
 import time
-from datetime import datetime
 
 from .chemistry import (
     rhf_build,
-    mp2_energy,
-    ccsd_energy_and_t2,
-    casci_integrals_full,
-    casci_integrals_active,
-    fci_energy_if_feasible,
+    rhf_restore,
+    expand_h2,
+    orbital_irreps,
+    ChemistryContext,
 )
-from .ansatz import build_hf, build_ucj, build_lucj_proxy, build_he
-from .active_space import choose_active_window, slice_t2_active_from_full
-from .runner import run_sqd_once
-
-
-def _now(): return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+from .active_space import (
+    choose_active_window,
+    slice_t2_active_from_full,
+    mp2_occupations,
+    select_active_orbitals,
+    slice_t2_active,
+    slice_orbsym,
+)
+from .preflight import (
+    PreflightError, estimate_job, plan_circuit, plan_simulation, fit_active, render_plan,
+)
+from .symmetry import irrep_id, irrep_name
+from .runner import run_sqd_once, SamplerSession
+from .jobs import build_circuit, job_circuit, run_sqd_job, sample_job, sample_jobs_batched, run_jobs_parallel
+from .pipeline import run_pipeline
+from .cache import IntegralCache, cache_key, orbitals_hash
+from .report import fmt_table, now
+from . import spans
 
 
-def _time(label, fn, *args, **kwargs):
-    print(f"[{label}] start   : {_now()}")
+def _time(label, fn, *args, verbose: bool = True, **kwargs):
+    if verbose:
+        print(f"[{label}] start   : {now()}")
     t0 = time.time()
-    out = fn(*args, **kwargs)
+    with spans.span(label):
+        out = fn(*args, **kwargs)
     t1 = time.time()
-    print(f"[{label}] end     : {_now()}")
-    print(f"[{label}] duration: {t1 - t0:.3f} s\n")
+    if verbose:
+        print(f"[{label}] end     : {now()}")
+        print(f"[{label}] duration: {t1 - t0:.3f} s\n")
     return out, (t1 - t0)
 
 
-def _fmt_table(headers, rows):
-    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
-    line = "-+-".join("-" * w for w in widths)
-    def row(cells): return " | ".join(str(c).ljust(w) for c, w in zip(cells, widths))
-    return "\n".join([row(headers), line, *[row(r) for r in rows]])
+class CachedChemistry:
+    """
+    PySCF prologue (SCF, MP2, CCSD, CASCI, FCI) for one molecule, with every stage
+    optionally served from / stored to an IntegralCache. Each stage returns
+    (bundle, seconds); seconds is 0.0 on a cache hit. Computed stages share one
+    ChemistryContext, so the ERI transform and the full-space CI run once, and active
+    spaces are folded from the full-space integrals instead of re-transformed.
+    With symmetry=True the SCF runs in the molecule's point group and its bundle also
+    carries "orbsym" (orbital irreps) and "groupname".
+    """
+
+    def __init__(self, atom_string: str, basis: str, cache: Optional[IntegralCache] = None,
+                 charge: int = 0, spin: int = 0, verbose: bool = True, symmetry: bool = False):
+        self.atom_string = atom_string
+        self.symmetry = symmetry
+        self.verbose = verbose
+        self.basis = basis
+        self.cache = cache
+        self.charge = charge
+        self.spin = spin
+        self._mol = None
+        self._mf = None
+        self._scf = None
+        self._scf_hash = None
+        self._ctx = None
+
+    def _stage(self, label, stage, fn, window=None):
+        key = None
+        if self.cache is not None:
+            parent = None
+            if stage != "scf":
+                if self._scf_hash is None:
+                    self._scf_hash = orbitals_hash(self.scf()[0]["mo_coeff"])
+                parent = self._scf_hash
+            key = cache_key(self.atom_string, self.basis, stage, charge=self.charge, spin=self.spin,
+                            window=window, symmetry=self.symmetry, parent=parent)
+            hit = self.cache.get(key)
+            if hit is not None:
+                if self.verbose:
+                    print(f"[{label}] cache hit: {key[:12]}\n")
+                return hit, 0.0
+        out, dt = _time(label, fn, verbose=self.verbose)
+        if key is not None:
+            self.cache.put(key, out)
+        return out, dt
+
+    def scf(self):
+        def _compute():
+            self._mol, self._mf = rhf_build(self.atom_string, self.basis, self.charge, self.spin,
+                                            verbose=None if self.verbose else 0, symmetry=self.symmetry)
+            mf = self._mf
+            out = {
+                "mo_coeff": mf.mo_coeff, "mo_occ": mf.mo_occ, "mo_energy": mf.mo_energy,
+                "e_tot": float(mf.e_tot), "nelec": list(self._mol.nelec),
+            }
+            if self.symmetry:
+                out["orbsym"] = orbital_irreps(self._mol, mf.mo_coeff)
+                out["groupname"] = self._mol.groupname
+            return out
+        if self._scf is None:
+            self._scf = self._stage("RHF/SCF", "scf", _compute)
+        return self._scf
+
+    @property
+    def mf(self):
+        """RHF object; rebuilt from cached orbitals (no SCF) when the SCF stage was a hit."""
+        if self._mf is None:
+            b, _ = self.scf()
+            self._mol, self._mf = rhf_restore(
+                self.atom_string, self.basis, b["mo_coeff"], b["mo_occ"], b["mo_energy"],
+                b["e_tot"], self.charge, self.spin, verbose=None if self.verbose else 0,
+                symmetry=self.symmetry,
+            )
+        return self._mf
+
+    @property
+    def ctx(self) -> ChemistryContext:
+        if self._ctx is None:
+            self._ctx = ChemistryContext(self.mf)
+        return self._ctx
+
+    @property
+    def step_timings(self) -> Dict[str, float]:
+        """Per-step seconds from the shared context (empty if everything was cached)."""
+        return dict(self._ctx.timings) if self._ctx is not None else {}
+
+    def mp2(self):
+        return self._stage("MP2", "mp2", lambda: {"e_tot": float(self.ctx.mp2_energy())})
+
+    def ccsd(self):
+        def _compute():
+            e, t2 = self.ctx.ccsd()
+            return {"e_tot": float(e), "t2": t2}
+        return self._stage("CCSD", "ccsd", _compute)
+
+    def casci_full(self, norb: int, nelec: Tuple[int, int]):
+        def _compute():
+            h1, h2, e_core = self.ctx.integrals()
+            return {"h1": h1, "h2": h2, "e_core": float(e_core), "e_cas": float(self.ctx.full_ci())}
+        return self._stage("CASCI (full-space)", "casci_full", _compute)
+
+    def fci(self, max_dets: int = 500_000):
+        """FCI row: the shared full-space CI energy, reported only if the determinant count is manageable."""
+        def _compute():
+            dets = self.ctx.n_determinants()
+            e = self.ctx.full_ci() if dets <= max_dets else None
+            return {"e_tot": None if e is None else float(e), "dets": dets}
+        return self._stage("FCI", "fci", _compute)
+
+    def mp2_occupations(self):
+        return self._stage("MP2 occupations", "mp2_occ",
+                           lambda: {"occupations": mp2_occupations(self.ctx.mp2_t2())})
+
+    def casci_orbitals(self, orbitals: List[int], nelecas: Tuple[int, int]):
+        def _compute():
+            h1, h2, e_core, e_cas = self.ctx.casci(orbitals, nelecas)
+            return {"h1": h1, "h2": h2, "e_core": float(e_core), "e_cas": float(e_cas)}
+        return self._stage("CASCI (active-space)", "casci_orbitals", _compute,
+                           window=[list(orbitals), list(nelecas)])
+
+    def casci_active(self, ncore: int, ncas: int, nelecas: Tuple[int, int]):
+        def _compute():
+            h1, h2, e_core, e_cas = self.ctx.casci(range(ncore, ncore + ncas), nelecas)
+            return {"h1": h1, "h2": h2, "e_core": float(e_core), "e_cas": float(e_cas)}
+        return self._stage("CASCI (active-space)", "casci_active", _compute,
+                           window=[ncore, ncas, list(nelecas)])
 
 
+# run_sqd_benchmark arguments that do not change its results (left out of checkpoint fingerprints)
+_OPERATIONAL_INPUTS = ("verbose", "render", "record_path", "parquet_path", "workers", "h2_mmap_dir", "time_limit",
+                       "batch_sampling", "pipeline", "pipeline_depth", "checkpoint_dir", "resume")
+
+
+def _run_jobs_pipelined(jobs: List[Dict[str, Any]], run_kwargs: Dict[str, Any], session: SamplerSession,
+                        depth: int = 1):
+    """
+    Sample job N+1 on a background thread while job N is diagonalized (sqd.pipeline.run_pipeline),
+    with at most `depth` sampled jobs waiting. Sampling honours chunk_shots and mem_budget
+    like run_sqd_once. Returns (outputs in job order, pipeline timings).
+    """
+    def produce(job):
+        if "samples" in job:  # restored from a checkpoint
+            return job["samples"], job["sampled"]
+        return sample_job(job, run_kwargs, session)
+
+    def consume(job, sampled):
+        store, info = sampled
+        return run_sqd_job({**job, "samples": store, "sampled": info}, run_kwargs, session)
+
+    with spans.span("pipeline", jobs=len(jobs), depth=depth):
+        return run_pipeline(jobs, produce, consume, depth=depth)
+
+
+def _preflight_jobs(jobs: List[Dict[str, Any]], budget: int, backend: str, shots: int,
+                    samples_per_batch: int, session: SamplerSession) -> List[Dict[str, Any]]:
+    """
+    Pre-flight row per job: resource estimate, the chosen simulation (stored on the job as
+    job["simulation"]) and the circuit's depth/gate counts (transpiled for the planned Aer
+    method; the transpile is memoized for the run). Raises PreflightError if a job fits no method.
+    """
+    rows = []
+    for job in jobs:
+        est = estimate_job(job["norb"], job["nelec"], shots=shots, samples_per_batch=samples_per_batch)
+        job["simulation"] = plan_circuit(est, job_circuit(job), budget, backend, session)
+        rows.append({"job": f"{job['space']}/{job['label']}", **est, "plan": job["simulation"]})
+    return rows
+
+
+def run_single_sqd(
+    geom: str,
+    basis: str = "sto-3g",
+    ansatz: str = "ucj",
+    he_layers: int = 2,
+    lucj_k_occ: int = 1,
+    lucj_k_vir: int = 1,
+    cache: Optional[IntegralCache] = None,
+    chem: Optional[CachedChemistry] = None,
+    verbose: bool = True,
+    **sqd_kwargs,
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    One full-space SQD run of `ansatz` (the `sqd run` command): SCF, integrals and, for
+    UCJ/LUCJ, CCSD t2 via CachedChemistry (pass `chem` to reuse one across calls), then
+    run_sqd_once with sqd_kwargs. Returns run_sqd_once's (energy, info).
+    """
+    chem = chem or CachedChemistry(geom, basis, cache=cache, verbose=verbose)
+    scf, _ = chem.scf()
+    norb = scf["mo_coeff"].shape[1]
+    nelec = tuple(scf["nelec"])
+
+    cas, _ = chem.casci_full(norb, nelec)
+    h1, h2, e_core = cas["h1"], cas["h2"], cas["e_core"]
+    t2 = chem.ccsd()[0]["t2"] if ansatz in ("ucj", "lucj") else None
+    qc = build_circuit(ansatz, norb, nelec, t2, he_layers, 7, lucj_k_occ, lucj_k_vir)
+    return run_sqd_once(h1, h2, e_core, norb, nelec, qc, verbose=verbose, label=f"SQD ({ansatz})", **sqd_kwargs)
+
+
+def render_benchmark(results: Dict[str, Any]) -> str:
+    """Energy & time comparison table (plus reference/active-space footer) for a benchmark result."""
+    ref_name, e_ref = results["reference"]["name"], results["reference"]["energy"]
+    en, tm = results["energies"], results["timings"]
+
+    def row(name, e, t):
+        return [name, f"{e:.8f}", f"{(e - e_ref)*1e3:+.3f}", t if isinstance(t, str) else f"{t:.3f}"]
+
+    rows = [
+        row("RHF", en["RHF"], tm["SCF"]),
+        row("MP2", en["MP2"], tm["MP2"]),
+        row("CCSD", en["CCSD"], tm["CCSD"]),
+        row("CASCI (full)", en["CASCI_full"], tm["CASCI_full"]),
+    ]
+    if en["FCI_full"] is not None:
+        rows.append(row("FCI (full)", en["FCI_full"], "—"))
+    for a, spaces in results["sqd"].items():
+        for space, entry in spaces.items():
+            rows.append(row(f"SQD ({space}) [{entry.get('label', a)}]", entry["energy"], entry["runtime"]))
+    rows.append(row("CASCI (active)", en["CASCI_active"], tm["CASCI_active"]))
+
+    act = results["active_space"]
+    lines = [
+        "\n=== Energy & Time Comparison ===",
+        fmt_table(["Method", "Energy (Ha)", f"Δ vs {ref_name} (mHa)", "Runtime (s)"], rows),
+        f"\nReference used: {ref_name}",
+        f"Active-space window: ncore={act['ncore']}, ncas={act['ncas']}, nelecas={act['nelecas']}",
+    ]
+    if act.get("mode") == "mp2":
+        lines.append(f"Active orbitals (MP2 occupations): {act['orbitals']}")
+    if results.get("symmetry"):
+        sym = results["symmetry"]
+        lines.append(f"Point-group symmetry ({sym['group']}, {sym['mode']}):")
+        for a, spaces in results["sqd"].items():
+            for space, entry in spaces.items():
+                st = entry["stages"].get("symmetry")
+                if not st or not st.get("product_dim"):
+                    continue
+                lines.append(
+                    f"  {space}/{entry.get('label', a)}: irrep {irrep_name(sym['group'], st['target_irrep'])}, "
+                    f"{st['symmetry_dim']} of {st['product_dim']} product determinants "
+                    f"({st['kept_fraction']:.1%}; {st['pruned_dim']} after string pruning)"
+                    + (f", {st['filtered_configs']} sampled configurations filtered" if st["filtered_configs"] else ""))
+    if results.get("transpile_cache"):
+        tc = results["transpile_cache"]
+        lines.append(f"Transpile cache: {tc['hits']} hit(s), {tc['misses']} miss(es)")
+    return "\n".join(lines)
+
+
+@spans.traced("benchmark")
 def run_sqd_benchmark(
     atom_string: str,
     basis: str,
@@ -48,54 +304,186 @@ def run_sqd_benchmark(
     lucj_k_occ: int = 1,
     lucj_k_vir: int = 1,
     verbose: bool = True,
+    cache: Optional[IntegralCache] = None,
+    backend: str = "aer",             # "aer" | "ffsim"
+    session: Optional[SamplerSession] = None,
+    workers: int = 1,
+    h2_mmap_dir: Optional[str] = None,
+    chunk_shots: Optional[int] = None,
+    saturation_rate: float = 1e-3,
+    target_unique: Optional[int] = None,
+    energy_tol: Optional[float] = None,
+    dim_plateau: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    render: bool = True,
+    record_path: Optional[str] = None,
+    parquet_path: Optional[str] = None,
+    batch_sampling: bool = True,
+    active_space: str = "window",     # "window" | "mp2"
+    occ_threshold: float = 0.01,
+    max_qubits: Optional[int] = None,
+    mem_budget_gb: Optional[float] = None,
+    oversize: str = "downsize",       # "downsize" | "refuse"
+    symmetry: str = "off",            # "off" | "fold" | "filter"
+    target_irrep=None,
+    pipeline: bool = False,
+    pipeline_depth: int = 1,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
 ) -> Dict[str, Any]:
-    print(f"=== RUN START: {_now()} ===\n")
-    print("Input:")
-    print(f"  Molecule:\n{atom_string}")
-    print(f"  Basis: {basis}")
-    print(f"  Ansatz: {ansatz}")
-    print(f"  SQD iterations: {max_iterations}, shots: {shots}, samples_per_batch: {samples_per_batch}\n")
+    """
+    RHF/MP2/CCSD/CASCI/FCI references plus SQD per ansatz in the full and active space.
+    render prints the progress header, chemistry stage timings and the comparison table
+    (verbose controls the SQD runner's own output); with both off the run is silent.
+    record_path appends a structured run record (see sqd.records) to a JSONL file, and
+    parquet_path additionally rewrites a per-job Parquet table from it.
+    With batch_sampling (Aer backend, no chunk_shots), all circuits are transpiled and
+    sampled as a single SamplerV2 job before the per-job diagonalizations (with
+    mem_budget_gb, at most budget // largest planned peak experiments run in parallel).
+    active_space="window" takes n_act_orb contiguous orbitals around the Fermi level;
+    "mp2" picks the (possibly non-contiguous) orbitals whose MP2 occupations deviate from
+    2/0 by at least occ_threshold, at most max_qubits // 2 (or n_act_orb) of them.
+    With mem_budget_gb, a pre-flight estimate (sqd.preflight) runs before any SQD work:
+    the active space shrinks to the largest one that simulates exactly within the budget,
+    full-space jobs that fit no method (not even approximate MPS) are skipped, and each
+    job is sampled with the Aer method/precision chosen for it. oversize="refuse" raises
+    PreflightError instead of downsizing or skipping.
+    symmetry="fold" runs SCF in the molecule's point group and restricts every SQD
+    eigensolve to target_irrep (name or id; default: the HF determinant's irrep), pruning
+    strings that cannot form such a determinant; "filter" also drops sampled
+    configurations of other irreps. Subspace sizes before/after go to stages["symmetry"].
+    pipeline=True (workers=1 only; replaces batch_sampling) samples the next job on a
+    background thread while the current one is diagonalized, keeping at most
+    pipeline_depth sampled jobs queued; busy/overlap seconds go to timings["SQD_pipeline"].
+    checkpoint_dir saves every stage as it completes (sqd.checkpoint.RunCheckpoint):
+    chemistry bundles (the integral cache, unless `cache` is given), each job's samples,
+    its latest finished SQD iteration and its result. resume=True reloads them, skipping
+    finished jobs and continuing interrupted ones from their last iteration; the
+    checkpoint must come from a run with the same scientific inputs.
+    """
+    inputs = {k: v for k, v in locals().items() if k not in ("session", "cache")}
+    ckpt = None
+    if checkpoint_dir is not None:
+        from .checkpoint import RunCheckpoint
+
+        ckpt = RunCheckpoint(checkpoint_dir, {k: v for k, v in inputs.items() if k not in _OPERATIONAL_INPUTS},
+                             resume=resume)
+        if cache is None:
+            cache = ckpt.chemistry
+    elif resume:
+        raise ValueError("resume needs a checkpoint_dir")
+    inputs["cache_dir"] = str(cache.root) if cache is not None else None
+    if symmetry not in ("off", "fold", "filter"):
+        raise ValueError(f"invalid symmetry: {symmetry!r} (expected 'off', 'fold' or 'filter')")
+    if pipeline and workers > 1:
+        raise ValueError("pipeline overlaps sampling and diagonalization in-process; use workers=1")
+    if render:
+        print(f"=== RUN START: {now()} ===\n")
+        print("Input:")
+        print(f"  Molecule:\n{atom_string}")
+        print(f"  Basis: {basis}")
+        print(f"  Ansatz: {ansatz}")
+        print(f"  Sampler backend: {backend}")
+        print(f"  SQD iterations: {max_iterations}, shots: {shots}, samples_per_batch: {samples_per_batch}")
+        if chunk_shots:
+            print(f"  Adaptive shots: chunks of {chunk_shots}, saturation rate {saturation_rate:g}/shot"
+                  + (f", target {target_unique} configs" if target_unique else ""))
+        print()
+
+    chem = CachedChemistry(atom_string, basis, cache=cache, verbose=render, symmetry=symmetry != "off")
+    budget = int(mem_budget_gb * 1024**3) if mem_budget_gb is not None else None
+    fit_kwargs = dict(shots=shots, samples_per_batch=samples_per_batch, backend=backend)
 
     # SCF
-    (mol, mf), t_scf = _time("RHF/SCF", rhf_build, atom_string, basis)
-    norb = mf.mo_coeff.shape[1]
-    nelec = mol.nelec
+    scf, t_scf = chem.scf()
+    e_rhf = scf["e_tot"]
+    norb = scf["mo_coeff"].shape[1]
+    nelec = tuple(scf["nelec"])
+    orbsym, groupname = scf.get("orbsym"), scf.get("groupname")
     if verbose:
         print(f"Number of spatial orbitals = {norb}")
         print(f"Number of qubits (full)    = {2*norb}\n")
+        if orbsym is not None:
+            print(f"Point group: {groupname}, orbital irreps: {list(map(int, orbsym))}\n")
+
+    preflight: Dict[str, Any] = {"budget_bytes": budget, "skipped": [], "downsized_from": None}
+    run_full = True
+    if budget is not None:
+        try:
+            plan_simulation(estimate_job(norb, nelec, shots=shots, samples_per_batch=samples_per_batch), budget, backend)
+        except PreflightError as exc:
+            if oversize == "refuse":
+                raise
+            run_full = False
+            preflight["skipped"].append({"space": "full", "reason": str(exc)})
+            if render:
+                print(f"[Preflight] full-space SQD skipped: {exc}\n")
 
     # MP2, CCSD, CASCI(full)
-    e_mp2, t_mp2 = _time("MP2", mp2_energy, mf)
-    (e_ccsd, t2_full), t_ccsd = _time("CCSD", ccsd_energy_and_t2, mf)
-    (h1_full, h2_full, e_core_full, e_cas_full), t_cas_full = _time(
-        "CASCI (full-space)", casci_integrals_full, mf, norb, nelec
-    )
+    mp2, t_mp2 = chem.mp2()
+    e_mp2 = mp2["e_tot"]
+    ccsd, t_ccsd = chem.ccsd()
+    e_ccsd, t2_full = ccsd["e_tot"], ccsd["t2"]
+    cas_full, t_cas_full = chem.casci_full(norb, nelec)
+    h1_full, h2_full = cas_full["h1"], cas_full["h2"]
+    e_core_full, e_cas_full = cas_full["e_core"], cas_full["e_cas"]
 
     # FCI reference if feasible; else CASCI(full)
-    e_fci, dets = fci_energy_if_feasible(h1_full, h2_full, norb, nelec, e_core_full)
+    fci, _ = chem.fci()
+    e_fci, dets = fci["e_tot"], fci["dets"]
     if e_fci is not None:
         ref_name, e_ref = "FCI", e_fci
-        print(f"[FCI] feasible (≈{dets} dets)")
-        # sanity check vs CASCI
-        if abs(e_ref - e_cas_full) > 1e-4:
-            print("[Warn] FCI and CASCI(full) differ by > 0.1 mHa; using CASCI(full) as reference.")
-            ref_name, e_ref = "CASCI(full)", e_cas_full
+        if render:
+            print(f"[FCI] feasible (≈{dets} dets)")
         t_fci = None  # we didn't time inside helper
     else:
-        print(f"[FCI] Skipped (estimated determinants ≈ {dets}).")
+        if render:
+            print(f"[FCI] Skipped (estimated determinants ≈ {dets}).")
         ref_name, e_ref, t_fci = "CASCI(full)", e_cas_full, None
 
     # Active-space selection + integrals
-    if n_act_orb is None:
-        n_act_orb = min(norb, 6)
-    ncore, ncas, nelecas = choose_active_window(norb, nelec, n_act_orb)
-    if verbose:
-        print(f"Active-space: ncore={ncore}, ncas={ncas}, nelecas={nelecas}\n")
+    t_occ = 0.0
+    if active_space == "mp2":
+        occ, t_occ = chem.mp2_occupations()
+        cap = max_qubits // 2 if max_qubits else n_act_orb
 
-    (h1_act, h2_act, e_core_act, e_cas_act), t_cas_act = _time(
-        "CASCI (active-space)", casci_integrals_active, mf, ncore, ncas, nelecas
-    )
-    t2_active = slice_t2_active_from_full(t2_full, ncore, ncas)
+        def choose(n):
+            return select_active_orbitals(occ["occupations"], nelec, occ_threshold, n)
+    elif active_space == "window":
+        if n_act_orb is None:
+            n_act_orb = min(norb, 6)
+        cap = n_act_orb
+
+        def choose(n):
+            c, n_cas, ne = choose_active_window(norb, nelec, n)
+            return list(range(c, c + n_cas)), ne
+    else:
+        raise ValueError(f"invalid active_space: {active_space!r} (expected 'window' or 'mp2')")
+    if budget is not None:
+        orbitals, nelecas, preflight["downsized_from"] = fit_active(
+            choose, cap or norb, budget, oversize=oversize, **fit_kwargs)
+        if preflight["downsized_from"] is not None and render:
+            print(f"[Preflight] active space downsized from {preflight['downsized_from']} "
+                  f"to {len(orbitals)} orbitals to fit {mem_budget_gb:g} GiB\n")
+    else:
+        orbitals, nelecas = choose(cap)
+    ncas = len(orbitals)
+    if active_space == "mp2":
+        ncore = nelec[0] - nelecas[0]
+        if verbose:
+            print(f"Active-space (MP2 occupations >= {occ_threshold:g} from 2/0): "
+                  f"orbitals={orbitals}, nelecas={nelecas}\n")
+        cas_act, t_cas_act = chem.casci_orbitals(orbitals, nelecas)
+        t2_active = slice_t2_active(t2_full, orbitals)
+    else:
+        ncore = orbitals[0]
+        if verbose:
+            print(f"Active-space: ncore={ncore}, ncas={ncas}, nelecas={nelecas}\n")
+        cas_act, t_cas_act = chem.casci_active(ncore, ncas, nelecas)
+        t2_active = slice_t2_active_from_full(t2_full, ncore, ncas)
+    h1_act, h2_act = cas_act["h1"], cas_act["h2"]
+    orbsym_act = slice_orbsym(orbsym, orbitals)
+    e_core_act, e_cas_act = cas_act["e_core"], cas_act["e_cas"]
 
     # which ansatz/zes
     ansatz_list = ["ucj", "lucj", "he", "hf"] if ansatz.lower() == "all" else [ansatz.lower()]
@@ -104,99 +492,159 @@ def run_sqd_benchmark(
         raise ValueError(f"invalid ansatz: {bad}")
 
     # run SQD for each ansatz (full & active)
-    rows = [
-        ["RHF",              f"{mf.e_tot:.8f}",      f"{(mf.e_tot - e_ref)*1e3:+.3f}",  f"{t_scf:.3f}"],
-        ["MP2",              f"{e_mp2:.8f}",         f"{(e_mp2 - e_ref)*1e3:+.3f}",     f"{t_mp2:.3f}"],
-        ["CCSD",             f"{e_ccsd:.8f}",        f"{(e_ccsd - e_ref)*1e3:+.3f}",    f"{t_ccsd:.3f}"],
-        ["CASCI (full)",     f"{e_cas_full:.8f}",    f"{(e_cas_full - e_ref)*1e3:+.3f}",f"{t_cas_full:.3f}"],
-    ]
-    if e_fci is not None:
-        rows.append(["FCI (full)", f"{e_fci:.8f}", f"{(e_fci - e_ref)*1e3:+.3f}", "—"])
-
     results: Dict[str, Any] = {"sqd": {}}
 
+    jobs: List[Dict[str, Any]] = []
     for a in ansatz_list:
-        # full
-        if a == "ucj":
-            qc_full = build_ucj(norb, nelec, t2_full)
-        elif a == "lucj":
-            qc_full = build_lucj_proxy(norb, nelec, t2_full, k_occ=1, k_vir=1)
-        elif a == "he":
-            qc_full = build_he(norb, nelec, layers=he_layers, seed=7)
-        else:
-            qc_full = build_hf(norb, nelec)
-        qc_full = qc_full.copy(); qc_full.measure_all()
-
-        e_full, tparts_full = run_sqd_once(
-            h1_full, h2_full, e_core_full, norb, nelec, qc_full,
-            shots=shots, samples_per_batch=samples_per_batch,
-            max_iterations=max_iterations, verbose=verbose,
-            label=f"SQD (full-space, {a})",
-        )
-        t_full = tparts_full["simulate"] + tparts_full["diag"]
-
+        if run_full:
+            jobs.append({
+                "ansatz": a, "space": "full", "label": a, "kind": a,
+                "norb": norb, "nelec": nelec, "t2": t2_full, "he_layers": he_layers, "he_seed": 7,
+                "k_occ": lucj_k_occ, "k_vir": lucj_k_vir,
+                "h1": h1_full, "h2": h2_full, "e_core": e_core_full, "orbsym": orbsym,
+            })
         # active (UCJ/LUCJ fallback to HE if t2_active None)
-        active_label = a
-        if a == "ucj":
-            if t2_active is None:
-                active_label = "ucj (fallback)"
-                qc_act = build_he(ncas, nelecas, layers=2, seed=19)
-            else:
-                qc_act = build_ucj(ncas, nelecas, t2_active)
-        elif a == "lucj":
-            if t2_active is None:
-                active_label = "lucj (fallback)"
-                qc_act = build_he(ncas, nelecas, layers=2, seed=19)
-            else:
-                qc_act = build_lucj_proxy(ncas, nelecas, t2_active, k_occ=1, k_vir=1)
-        elif a == "he":
-            qc_act = build_he(ncas, nelecas, layers=he_layers, seed=19)
-        else:
-            qc_act = build_hf(ncas, nelecas)
-        qc_act = qc_act.copy(); qc_act.measure_all()
-
-        e_act, tparts_act = run_sqd_once(
-            h1_act, h2_act, e_core_act, ncas, nelecas, qc_act,
-            shots=shots, samples_per_batch=samples_per_batch,
-            max_iterations=max_iterations, verbose=verbose,
-            label=f"SQD (active-space, {active_label})",
-        )
-        t_act = tparts_act["simulate"] + tparts_act["diag"]
-
-        rows.append([f"SQD (full) [{a}]",          f"{e_full:.8f}", f"{(e_full - e_ref)*1e3:+.3f}", f"{t_full:.3f}"])
-        rows.append([f"SQD (active) [{active_label}]", f"{e_act:.8f}",  f"{(e_act - e_ref)*1e3:+.3f}",  f"{t_act:.3f}"])
+        kind, active_label, layers = a, a, he_layers
+        if a in ("ucj", "lucj") and t2_active is None:
+            kind, active_label, layers = "he", f"{a} (fallback)", 2
+        jobs.append({
+            "ansatz": a, "space": "active", "label": active_label, "kind": kind,
+            "norb": ncas, "nelec": nelecas, "t2": t2_active, "he_layers": layers, "he_seed": 19,
+            "k_occ": lucj_k_occ, "k_vir": lucj_k_vir,
+            "h1": h1_act, "h2": h2_act, "e_core": e_core_act, "orbsym": orbsym_act,
+        })
 
-        results["sqd"][a] = {
-            "full": {"energy": e_full, "runtime": t_full},
-            "active": {"energy": e_act, "runtime": t_act, "label": active_label},
-        }
+    restored = {"done": 0, "sampled": 0}
+    if ckpt is not None:
+        for job in jobs:
+            job["checkpoint"] = ckpt.job(f"{job['space']}-{job['ansatz']}")
+            done = job["checkpoint"].load_done()
+            saved = None if done is not None else job["checkpoint"].load_samples()
+            if done is not None:
+                job["done"] = done
+                restored["done"] += 1
+            elif saved is not None:
+                job["samples"], job["sampled"] = saved
+                restored["sampled"] += 1
+        if render and ckpt.resumed:
+            print(f"[Checkpoint] resuming from {ckpt.root}: {restored['done']} of {len(jobs)} SQD job(s) done, "
+                  f"{restored['sampled']} more already sampled\n")
+    pending = [job for job in jobs if "done" not in job]
 
-    rows.append(["CASCI (active)", f"{e_cas_act:.8f}", f"{(e_cas_act - e_ref)*1e3:+.3f}", f"{t_cas_act:.3f}"])
+    run_kwargs = dict(
+        shots=shots, samples_per_batch=samples_per_batch,
+        max_iterations=max_iterations, verbose=verbose, backend=backend,
+        chunk_shots=chunk_shots, saturation_rate=saturation_rate, target_unique=target_unique,
+        energy_tol=energy_tol, dim_plateau=dim_plateau, time_limit=time_limit,
+    )
+    if symmetry != "off":
+        # core orbitals are doubly occupied, so the active space has the molecule's irrep
+        run_kwargs["symmetry_filter"] = symmetry == "filter"
+        if target_irrep is not None:
+            run_kwargs["target_irrep"] = irrep_id(groupname, target_irrep)
+    if budget is not None:
+        if session is None:
+            session = SamplerSession()
+        preflight["rows"] = _preflight_jobs(jobs, budget, backend, shots, samples_per_batch, session)
+        run_kwargs["mem_budget"] = budget
+        if render:
+            print("=== Preflight ===")
+            print(render_plan(preflight["rows"]) + "\n")
+    mmap_dir = None
+    if h2_mmap_dir is not None and pending:
+        # dense h2 written once per space and memory-mapped by every job (workers get the path),
+        # in a private directory so runs sharing h2_mmap_dir never reopen each other's files
+        os.makedirs(h2_mmap_dir, exist_ok=True)
+        mmap_dir = tempfile.mkdtemp(prefix="sqd-h2-", dir=h2_mmap_dir)
+        h2_paths = {}
+        for job in pending:
+            if job["space"] not in h2_paths:
+                h2_paths[job["space"]] = os.path.join(mmap_dir, f"h2_{job['space']}.npy")
+                expand_h2(job["h2"], job["norb"], mmap_path=h2_paths[job["space"]])
+            job["h2"] = h2_paths[job["space"]]
+    t0 = time.time()
+    t_pipeline = None
+    try:
+        if not pending:
+            outputs = []
+        elif pipeline:
+            if session is None:
+                session = SamplerSession()
+            outputs, t_pipeline = _run_jobs_pipelined(pending, run_kwargs, session, pipeline_depth)
+        else:
+            unsampled = [job for job in pending if "samples" not in job]
+            if batch_sampling and backend == "aer" and not chunk_shots and unsampled:
+                if session is None:
+                    session = SamplerSession()
+                sample_jobs_batched(unsampled, shots, session, verbose, budget)
+            if workers > 1:
+                outputs = run_jobs_parallel(pending, run_kwargs, workers)
+            else:
+                if session is None:
+                    session = SamplerSession()
+                outputs = [run_sqd_job(job, run_kwargs, session) for job in pending]
+    finally:
+        if mmap_dir is not None:
+            shutil.rmtree(mmap_dir, ignore_errors=True)
+    fresh = iter(outputs)
+    outputs = [job["done"] if "done" in job else next(fresh) for job in jobs]
+    t_sqd_wall = time.time() - t0
+    if verbose:
+        print(f"[SQD] {len(pending)} job(s) on {max(1, workers)} worker(s): wall {t_sqd_wall:.3f} s")
+        if t_pipeline is not None:
+            print(f"[SQD] pipeline: sampling {t_pipeline['produce']:.3f} s + diagonalization "
+                  f"{t_pipeline['consume']:.3f} s, overlapped {t_pipeline['overlap']:.3f} s")
+        print()
 
-    print("\n=== Energy & Time Comparison ===")
-    print(_fmt_table(["Method", "Energy (Ha)", f"Δ vs {ref_name} (mHa)", "Runtime (s)"], rows))
-    print(f"\nReference used: {ref_name}")
-    print(f"Active-space window: ncore={ncore}, ncas={ncas}, nelecas={nelecas}")
-    print(f"\n=== RUN END: {_now()} ===")
+    for job, (e_sqd, tparts) in zip(jobs, outputs):
+        t_sqd = tparts["transpile"] + tparts["simulate"] + tparts["diag"]
+        a, space = job["ansatz"], job["space"]
+        entry = {"energy": e_sqd, "runtime": t_sqd, "stages": tparts}
+        if space == "active":
+            entry["label"] = job["label"]
+        results["sqd"].setdefault(a, {})[space] = entry
 
     results.update({
         "reference": {"name": ref_name, "energy": e_ref},
         "energies": {
-            "RHF": mf.e_tot,
+            "RHF": e_rhf,
             "MP2": e_mp2,
             "CCSD": e_ccsd,
             "CASCI_full": e_cas_full,
             "FCI_full": e_fci,
             "CASCI_active": e_cas_act,
         },
-        "active_space": {"ncore": ncore, "ncas": ncas, "nelecas": nelecas},
+        "active_space": {"ncore": ncore, "ncas": ncas, "nelecas": nelecas,
+                         "orbitals": orbitals, "mode": active_space},
+        "symmetry": None if orbsym is None else {
+            "mode": symmetry, "group": groupname, "orbsym": [int(x) for x in orbsym],
+            "target_irrep": run_kwargs.get("target_irrep"),
+        },
         "norb_full": norb,
         "nelec_full": nelec,
         "ansatz_run": ansatz_list,
         "timings": {
             "SCF": t_scf, "MP2": t_mp2, "CCSD": t_ccsd,
-            "CASCI_full": t_cas_full, "CASCI_active": t_cas_act,
+            "CASCI_full": t_cas_full, "CASCI_active": t_cas_act, "MP2_occupations": t_occ,
             "FCI_full": t_fci,
-        }
+            "SQD_wall": t_sqd_wall,
+            "SQD_pipeline": t_pipeline,
+            "chemistry_steps": chem.step_timings,
+        },
+        "preflight": preflight if budget is not None else None,
+        "checkpoint": None if ckpt is None else {"dir": str(ckpt.root), "resumed": ckpt.resumed, **restored},
+        "transpile_cache": {"hits": session.hits, "misses": session.misses} if session is not None else None,
+        # spans of this process only; SQD jobs run in worker processes when workers > 1
+        "spans": [c.to_dict() for c in spans.current().children],
     })
+
+    if render:
+        print(render_benchmark(results))
+        print(f"\n=== RUN END: {now()} ===")
+    if record_path is not None:
+        from .records import build_record, append_jsonl, write_parquet
+
+        append_jsonl(record_path, build_record(results, inputs))
+        if parquet_path is not None:
+            write_parquet(record_path, parquet_path)
     return results
@@ -1,12 +1,24 @@
-import json, pathlib
+import functools, json, pathlib
 
 _DATA_PATH = pathlib.Path(__file__).parent.parent / "data" / "molecules.json"
-MOLECULES = json.loads(_DATA_PATH.read_text(encoding="utf-8"))
-DEFAULTS = MOLECULES["defaults"]
+
+
+@functools.lru_cache(maxsize=None)
+def _load():
+    return json.loads(_DATA_PATH.read_text(encoding="utf-8"))
+
+
+def __getattr__(name):
+    # MOLECULES / DEFAULTS are read on first use rather than at import
+    if name == "MOLECULES":
+        return _load()
+    if name == "DEFAULTS":
+        return _load()["defaults"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def list_molecules():
-    return [m["id"] for m in MOLECULES["molecules"]]
+    return [m["id"] for m in _load()["molecules"]]
 
 def get_case(case_id: str):
-    m = next(m for m in MOLECULES["molecules"] if m["id"].lower() == case_id.lower())
-    return {**DEFAULTS, **m}
+    m = next(m for m in _load()["molecules"] if m["id"].lower() == case_id.lower())
+    return {**_load()["defaults"], **m}
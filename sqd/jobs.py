@@ -0,0 +1,137 @@
+from __future__ import annotations
+from typing import Optional, Dict, Any, List, Tuple
+
+from .ansatz import build_hf, build_ucj, build_lucj_proxy, build_he
+from .preflight import backend_options
+from .runner import run_sqd_once, diagonalize_samples, sample_circuits, sample_configurations, SamplerSession
+from .samples import SampleStore
+from .parallel import thread_env, spawn_pool, cpu_budget
+from . import spans
+
+# An SQD job is a dict: "kind"/"label"/"space" of its ansatz, "norb", "nelec", "h1", "h2",
+# "e_core", the circuit inputs ("t2", "he_layers", "he_seed", optional "k_occ"/"k_vir"),
+# and optionally "orbsym", "checkpoint", "simulation" (a pre-flight plan) and, once
+# sampled, "samples" (a SampleStore) with its "sampled" timings.
+
+# run_kwargs that belong to the sample phase rather than the diagonalizer
+SAMPLING_KWARGS = ("shots", "backend", "chunk_shots", "saturation_rate", "target_unique", "mem_budget")
+
+
+def build_circuit(kind: str, norb: int, nelec, t2=None, he_layers: int = 2, he_seed: int = 7,
+                  k_occ: int = 1, k_vir: int = 1):
+    """Measured circuit of ansatz `kind` ("ucj" | "lucj" | "he" | "hf")."""
+    if kind == "ucj":
+        qc = build_ucj(norb, nelec, t2)
+    elif kind == "lucj":
+        qc = build_lucj_proxy(norb, nelec, t2, k_occ=k_occ, k_vir=k_vir)
+    elif kind == "he":
+        qc = build_he(norb, nelec, layers=he_layers, seed=he_seed)
+    else:
+        qc = build_hf(norb, nelec)
+    qc = qc.copy(); qc.measure_all()
+    return qc
+
+
+def job_circuit(job: Dict[str, Any]):
+    return build_circuit(job["kind"], job["norb"], job["nelec"], job["t2"], job["he_layers"], job["he_seed"],
+                         job.get("k_occ", 1), job.get("k_vir", 1))
+
+
+def job_label(job: Dict[str, Any]) -> str:
+    space = "full-space" if job["space"] == "full" else "active-space"
+    return f"SQD ({space}, {job['label']})"
+
+
+def run_sqd_job(job: Dict[str, Any], run_kwargs: Dict[str, Any], session=None):
+    """
+    Run SQD for one (ansatz, space) job. Jobs whose samples were already drawn by a
+    batched sample phase (job["samples"]) go straight to the diagonalizer.
+    """
+    label = job_label(job)
+    sym = {"orbsym": job["orbsym"]} if job.get("orbsym") is not None else {}
+    ckpt = job.get("checkpoint")
+    if "samples" not in job and ckpt is not None:
+        store, sampled = sample_job(job, run_kwargs, session or _WORKER_SESSION)
+        job = {**job, "samples": store, "sampled": sampled}
+    if "samples" not in job:
+        return run_sqd_once(
+            job["h1"], job["h2"], job["e_core"], job["norb"], job["nelec"], job_circuit(job),
+            label=label, session=session or _WORKER_SESSION, **run_kwargs, **sym,
+        )
+    store = job["samples"]
+    resume = {} if ckpt is None else {"on_iteration": ckpt.save_iteration, "resume_from": ckpt.load_iteration()}
+    with spans.span("sqd_run", label=label, norb=job["norb"], backend=run_kwargs.get("backend")):
+        e, info = diagonalize_samples(
+            job["h1"], job["h2"], job["e_core"], job["norb"], job["nelec"], store, label=label,
+            **{k: v for k, v in run_kwargs.items() if k not in SAMPLING_KWARGS}, **sym, **resume,
+        )
+    out = {
+        "shots": store.num_shots, "chunk_shots": [store.num_shots], "chunk_new_valid": [store.num_unique_valid],
+        **job["sampled"], **info,
+    }
+    if ckpt is not None:
+        ckpt.save_done(e, out)
+    return e, out
+
+
+def sample_job(job: Dict[str, Any], run_kwargs: Dict[str, Any], session):
+    """Sample phase of one job (sample_configurations), saved to the job's checkpoint if it has one."""
+    store, sampled = sample_configurations(
+        job_circuit(job), job["norb"], job["nelec"], samples_per_batch=run_kwargs.get("samples_per_batch", 300),
+        verbose=run_kwargs.get("verbose", False), label=job_label(job), session=session,
+        **{k: v for k, v in run_kwargs.items() if k in SAMPLING_KWARGS},
+    )
+    if job.get("checkpoint") is not None:
+        job["checkpoint"].save_samples(store, sampled)
+    return store, sampled
+
+
+def sample_jobs_batched(jobs: List[Dict[str, Any]], shots: int, session: SamplerSession, verbose: bool,
+                        mem_budget: Optional[int] = None):
+    """
+    Sample phase for a whole benchmark: every job's circuit goes into one SamplerV2 job
+    (one per Aer method/precision when jobs carry a pre-flight plan in job["simulation"]),
+    and each job gets its own SampleStore. The job's wall time is split evenly across
+    circuits in the per-job "simulate" timing ("simulate_batch" keeps the total).
+    The pre-flight checks one job at a time, so with mem_budget (bytes) Aer runs at most
+    mem_budget // (largest planned peak in the group) experiments in parallel.
+    """
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        opts = backend_options(job["simulation"]) if "simulation" in job else {}
+        groups.setdefault(tuple(sorted(opts.items())), []).append(job)
+    for opts, group in groups.items():
+        max_parallel = 0
+        peaks = [job["simulation"]["peak_bytes"] for job in group if "simulation" in job]
+        if mem_budget is not None and peaks:
+            max_parallel = max(1, mem_budget // max(peaks))
+        meas, t_tr, t_batch = sample_circuits([job_circuit(job) for job in group], shots,
+                                              session.variant(**dict(opts)), max_parallel=max_parallel,
+                                              verbose=verbose)
+        for job, m, dt in zip(group, meas, t_tr):
+            with spans.span("ingest"):
+                job["samples"] = SampleStore.from_bit_array(m, job["norb"], job["nelec"])
+            job["sampled"] = {"transpile": dt, "simulate": t_batch / len(group),
+                              "simulate_batch": t_batch, "batched_circuits": len(group)}
+            if job.get("checkpoint") is not None:
+                job["checkpoint"].save_samples(job["samples"], job["sampled"])
+
+
+_WORKER_SESSION: Optional[SamplerSession] = None
+
+
+def _init_worker(threads: int):
+    global _WORKER_SESSION
+    _WORKER_SESSION = SamplerSession(backend_options={"max_parallel_threads": threads})
+
+
+def run_jobs_parallel(jobs: List[Dict[str, Any]], run_kwargs: Dict[str, Any], workers: int):
+    """
+    Fan SQD jobs out to a spawn-based process pool; each worker gets cpu_budget() // workers
+    threads for BLAS (via env, inherited at spawn) and Aer. Results come back in job order.
+    """
+    workers = min(workers, len(jobs))
+    threads = max(1, cpu_budget() // workers)
+    with thread_env(threads), spawn_pool(workers, _init_worker, (threads,)) as pool:
+        futures = [pool.submit(run_sqd_job, job, run_kwargs) for job in jobs]
+        return [f.result() for f in futures]
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import hashlib
+import time
+
+import numpy as np
+
+from .active_space import choose_active_window, slice_t2_active_from_full
+from .ansatz import build_ucj, local_t2
+from .cache import IntegralCache
+from .compare import CachedChemistry
+from .jobs import run_sqd_job, run_jobs_parallel
+from .report import fmt_table, now
+from .runner import SamplerSession, ffsim_state, sample_ffsim, BACKENDS
+from .samples import SampleStore
+from . import spans
+
+
+def _two_qubit_gates(tqc) -> int:
+    return sum(1 for inst in tqc.data if inst.operation.num_qubits == 2)
+
+
+def pareto_frontier(rows: List[Dict[str, Any]], cost: str = "two_qubit_gates") -> List[Dict[str, Any]]:
+    """Rows not dominated in (cost, |error|): nothing else is both cheaper-or-equal and more accurate."""
+    front, best_err = [], float("inf")
+    for row in sorted(rows, key=lambda r: (r[cost], abs(r["error_mha"]))):
+        if abs(row["error_mha"]) < best_err:
+            front.append(row)
+            best_err = abs(row["error_mha"])
+    return front
+
+
+def cheapest_within(rows: List[Dict[str, Any]], max_error_mha: float,
+                    cost: str = "two_qubit_gates") -> Optional[Dict[str, Any]]:
+    """Lowest-cost grid point whose |energy error| is within max_error_mha (None if none is)."""
+    ok = [r for r in rows if abs(r["error_mha"]) <= max_error_mha]
+    return min(ok, key=lambda r: (r[cost], abs(r["error_mha"]))) if ok else None
+
+
+@spans.traced("lucj_sweep")
+def run_lucj_sweep(
+    atom_string: str,
+    basis: str = "sto-3g",
+    k_occ: Sequence[int] = (0, 1, 2),
+    k_vir: Sequence[int] = (0, 1, 2),
+    space: str = "full",              # "full" | "active"
+    n_act_orb: Optional[int] = None,
+    shots: int = 100_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    backend: str = "aer",
+    workers: int = 1,
+    tolerance_mha: Optional[float] = 1.6,
+    cache: Optional[IntegralCache] = None,
+    seed: Optional[int] = None,
+    verbose: bool = False,
+    render: bool = True,
+    **sqd_kwargs,
+) -> Dict[str, Any]:
+    """
+    Evaluate LUCJ locality windows (k_occ, k_vir) for one molecule and report the
+    cost/accuracy frontier: transpiled two-qubit gate count and depth, sampling time and
+    SQD energy error against FCI (CASCI for the active space) per grid point.
+    Chemistry and the t2 slicing run once. Windows that leave the same doubles (e.g.
+    k_occ >= nocc - 1) share one circuit, sample set and SQD result. Circuits are
+    sampled one after another so each point's sampling time is its own, and the SQD
+    diagonalizations run on `workers` processes. render prints the banners and the
+    frontier table; verbose adds the per-stage progress.
+    Returns {"rows", "frontier", "recommended", "reference"}.
+    """
+    if space not in ("full", "active"):
+        raise ValueError(f"invalid space: {space!r}")
+    if backend not in BACKENDS:
+        raise ValueError(f"invalid backend: {backend!r} (expected one of {BACKENDS})")
+    grid = [(int(o), int(v)) for o in k_occ for v in k_vir]
+    if render:
+        print(f"=== LUCJ SWEEP START: {now()} ===")
+        print(f"  Molecule: {atom_string} ({basis}, {space} space)")
+        print(f"  Grid: k_occ={list(k_occ)} x k_vir={list(k_vir)} ({len(grid)} points), shots={shots}\n")
+
+    chem = CachedChemistry(atom_string, basis, cache=cache, verbose=verbose)
+    scf, _ = chem.scf()
+    norb, nelec = scf["mo_coeff"].shape[1], tuple(scf["nelec"])
+    t2 = chem.ccsd()[0]["t2"]
+    if space == "full":
+        cas, _ = chem.casci_full(norb, nelec)
+        fci, _ = chem.fci()
+        ref_name, e_ref = ("FCI", fci["e_tot"]) if fci["e_tot"] is not None else ("CASCI(full)", cas["e_cas"])
+    else:
+        ncore, ncas, nelecas = choose_active_window(norb, nelec, n_act_orb or min(norb, 6))
+        cas, _ = chem.casci_active(ncore, ncas, nelecas)
+        t2 = slice_t2_active_from_full(t2, ncore, ncas)
+        if t2 is None:
+            raise ValueError("active window has no occupied/virtual doubles to localize")
+        norb, nelec = ncas, nelecas
+        ref_name, e_ref = "CASCI(active)", cas["e_cas"]
+
+    session = SamplerSession(seed=seed)
+    jobs: List[Dict[str, Any]] = []
+    point_job: List[int] = []
+    by_key: Dict[str, int] = {}
+    for ko, kv in grid:
+        t2_local = local_t2(t2, ko, kv)
+        key = hashlib.sha1(np.ascontiguousarray(t2_local).tobytes()).hexdigest()
+        if key not in by_key:
+            by_key[key] = len(jobs)
+            jobs.append(_sample_point(ko, kv, t2, t2_local, norb, nelec, cas, space, shots, backend, session, seed))
+        point_job.append(by_key[key])
+    if render:
+        print(f"[LUCJ sweep] {len(grid)} grid point(s) -> {len(jobs)} distinct circuit(s)")
+
+    run_kwargs = dict(samples_per_batch=samples_per_batch, max_iterations=max_iterations,
+                      verbose=verbose, **sqd_kwargs)
+    t0 = time.time()
+    if workers > 1 and len(jobs) > 1:
+        outputs = run_jobs_parallel(jobs, run_kwargs, workers)
+    else:
+        outputs = [run_sqd_job(job, run_kwargs, session) for job in jobs]
+    t_wall = time.time() - t0
+
+    first = {j: grid[point_job.index(j)] for j in set(point_job)}
+    rows: List[Dict[str, Any]] = []
+    for (ko, kv), j in zip(grid, point_job):
+        job, (e_sqd, info) = jobs[j], outputs[j]
+        rows.append({
+            "k_occ": ko, "k_vir": kv, "window": job["window"], "doubles_kept": job["doubles_kept"],
+            "two_qubit_gates": job["cost"]["two_qubit_gates"], "depth": job["cost"]["depth"],
+            "transpile_s": info["transpile"], "sample_s": info["simulate"], "diag_s": info["diag"],
+            "energy": float(e_sqd), "error_mha": (float(e_sqd) - e_ref) * 1e3,
+            "subspace_dim": info["dim_history"][-1] if info["dim_history"] else None,
+            "shared_with": None if first[j] == (ko, kv) else first[j],
+        })
+    frontier = pareto_frontier(rows)
+    for row in rows:
+        row["frontier"] = any(row is f for f in frontier)
+    recommended = cheapest_within(rows, tolerance_mha) if tolerance_mha is not None else None
+
+    if render:
+        table = [[f"({r['k_occ']},{r['k_vir']})", f"{r['doubles_kept']:.0%}", str(r["two_qubit_gates"]),
+                  str(r["depth"]), f"{r['sample_s']:.3f}", f"{r['diag_s']:.3f}", f"{r['error_mha']:+.3f}",
+                  ("*" if r["frontier"] else "") + (" (same as ({},{}))".format(*r["shared_with"]) if r["shared_with"] else "")]
+                 for r in rows]
+        print("\n=== LUCJ locality frontier ===")
+        print(fmt_table(["(k_occ,k_vir)", "doubles", "2q gates", "depth", "sample (s)", "diag (s)",
+                         f"Δ vs {ref_name} (mHa)", "frontier"], table))
+        if tolerance_mha is not None:
+            if recommended is None:
+                print(f"\nNo locality window within {tolerance_mha:g} mHa of {ref_name}.")
+            else:
+                print(f"\nCheapest window within {tolerance_mha:g} mHa: k_occ={recommended['k_occ']}, "
+                      f"k_vir={recommended['k_vir']} ({recommended['two_qubit_gates']} two-qubit gates)")
+        print(f"SQD wall ({len(jobs)} job(s), {max(1, workers)} worker(s)): {t_wall:.2f} s")
+        print(f"=== LUCJ SWEEP END: {now()} ===")
+    return {"rows": rows, "frontier": frontier, "recommended": recommended,
+            "reference": {"name": ref_name, "energy": e_ref}}
+
+
+def _sample_point(ko: int, kv: int, t2, t2_local, norb: int, nelec: Tuple[int, int], cas: Dict[str, Any],
+                  space: str, shots: int, backend: str, session: SamplerSession, seed: Optional[int]) -> Dict[str, Any]:
+    """Build, transpile (for the gate count) and sample one distinct locality window as an SQD job."""
+    nocc, _, nvir, _ = t2.shape
+    qc = build_ucj(norb, nelec, t2_local)
+    qc.measure_all()
+    with spans.span("transpile"):
+        tqc, t_tr = session.transpile(qc)
+    t0 = time.perf_counter()
+    with spans.span("sample", shots=shots):
+        if backend == "ffsim":
+            meas = sample_ffsim(ffsim_state(qc, norb, nelec), shots, seed=np.random.default_rng(seed))
+        else:
+            meas = session.sample([tqc], shots)[0]
+    t_sim = time.perf_counter() - t0
+    nonzero = np.count_nonzero(t2)
+    return {
+        "ansatz": "lucj", "space": space, "label": f"lucj k=({ko},{kv})",
+        "norb": norb, "nelec": nelec, "h1": cas["h1"], "h2": cas["h2"], "e_core": cas["e_core"],
+        "window": (min(ko, nocc - 1), min(kv, nvir - 1)),
+        "doubles_kept": float(np.count_nonzero(t2_local) / nonzero) if nonzero else 1.0,
+        "cost": {"two_qubit_gates": _two_qubit_gates(tqc), "depth": tqc.depth()},
+        "samples": SampleStore.from_bit_array(meas, norb, nelec),
+        "sampled": {"transpile": t_tr, "simulate": t_sim},
+    }
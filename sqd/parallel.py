@@ -0,0 +1,52 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+@contextmanager
+def thread_env(threads: int):
+    """Temporarily cap BLAS/OpenMP threads in os.environ (inherited by processes spawned inside)."""
+    saved = {k: os.environ.get(k) for k in THREAD_ENV_VARS}
+    os.environ.update({k: str(threads) for k in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def spawn_pool(workers: int, initializer=None, initargs=()) -> ProcessPoolExecutor:
+    """
+    Spawn-based process pool (Aer and OpenMP runtimes are not fork-safe). Workers start
+    lazily on submit, so submit inside thread_env() to hand them a thread budget.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def cpu_budget() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def memory_budget_bytes(fraction: float = 0.8) -> int:
+    """Fraction of physical memory, or 8 GiB if it cannot be determined."""
+    try:
+        total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        total = 8 * 1024**3
+    return int(total * fraction)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import queue
+import threading
+import time
+
+from . import spans
+
+_DONE = object()
+
+
+class _Failed:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    produce: Callable[[Any], Any],
+    consume: Callable[[Any, Any], Any],
+    *,
+    depth: int = 1,
+    name: str = "sqd-pipeline",
+) -> Tuple[List[Any], Dict[str, float]]:
+    """
+    Two-stage pipeline: a background thread runs produce(item) for each item while the
+    calling thread runs consume(item, produced) on the previous one. At most `depth`
+    produced results wait in the queue, so at most depth + 2 are alive at once (queued,
+    being produced, being consumed). An exception in either stage stops the other and
+    is re-raised here. The stages overlap where they release the GIL (Aer, BLAS, PySCF).
+    Returns (consume results in item order, {"produce", "consume", "wall", "overlap"}
+    seconds; overlap = produce + consume - wall).
+    """
+    if depth < 1:
+        raise ValueError(f"depth must be >= 1, got {depth}")
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    busy = {"produce": 0.0, "consume": 0.0}
+    parent = spans.current()
+
+    def _put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _producer():
+        with spans.attached(parent):
+            try:
+                for item in items:
+                    if stop.is_set():
+                        return
+                    t0 = time.perf_counter()
+                    out = produce(item)
+                    busy["produce"] += time.perf_counter() - t0
+                    if not _put((item, out)):
+                        return
+            except BaseException as exc:  # handed to the consumer, which re-raises
+                _put(_Failed(exc))
+                return
+            _put(_DONE)
+
+    t_start = time.perf_counter()
+    thread = threading.Thread(target=_producer, name=name, daemon=True)
+    thread.start()
+    results: List[Any] = []
+    try:
+        while True:
+            entry = q.get()
+            if entry is _DONE:
+                break
+            if isinstance(entry, _Failed):
+                raise entry.exc
+            item, produced = entry
+            del entry
+            t0 = time.perf_counter()
+            results.append(consume(item, produced))
+            busy["consume"] += time.perf_counter() - t0
+            del produced
+    finally:
+        stop.set()
+        thread.join()
+    wall = time.perf_counter() - t_start
+    return results, {**busy, "wall": wall, "overlap": max(0.0, busy["produce"] + busy["consume"] - wall)}
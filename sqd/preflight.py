@@ -0,0 +1,250 @@
+from __future__ import annotations
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from math import comb, isqrt
+
+AMPLITUDE_BYTES = {"double": 16, "single": 8}
+MIN_BOND_DIMENSION = 16
+
+
+class PreflightError(ValueError):
+    """A planned job cannot be simulated within the memory budget."""
+
+
+def statevector_bytes(norb: int, nelec: Tuple[int, int], backend: str = "aer", precision: str = "double") -> int:
+    """Complex state: 2^(2*norb) amplitudes on Aer, C(norb,na)*C(norb,nb) on ffsim."""
+    if backend == "ffsim":
+        return AMPLITUDE_BYTES[precision] * comb(norb, nelec[0]) * comb(norb, nelec[1])
+    return AMPLITUDE_BYTES[precision] * 2 ** (2 * norb)
+
+
+def mps_bytes(num_qubits: int, bond_dimension: int, precision: str = "double") -> int:
+    """Matrix-product state: two chi x chi tensors per qubit."""
+    return num_qubits * 2 * bond_dimension**2 * AMPLITUDE_BYTES[precision]
+
+
+def sci_dimension(norb: int, nelec: Tuple[int, int], samples_per_batch: int) -> int:
+    """
+    Upper estimate of the SQD subspace: a batch of samples_per_batch bitstrings gives at
+    most that many distinct strings per spin, doubled by the alpha/beta symmetrization.
+    """
+    na = min(comb(norb, nelec[0]), 2 * samples_per_batch)
+    nb = min(comb(norb, nelec[1]), 2 * samples_per_batch)
+    return na * nb
+
+
+def circuit_stats(qc) -> Dict[str, int]:
+    return {
+        "depth": qc.depth(),
+        "gates": sum(1 for inst in qc.data if inst.operation.name not in ("measure", "barrier")),
+        "two_qubit_gates": sum(1 for inst in qc.data if inst.operation.num_qubits == 2),
+    }
+
+
+def estimate_job(
+    norb: int, nelec: Tuple[int, int], qc=None,
+    *,
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+) -> Dict[str, Any]:
+    """
+    Pre-flight resource estimate for one SQD job: statevector bytes (Aer double/single,
+    ffsim subspace), dense h2, expected SCI dimension and its Davidson working set,
+    sampled bitstrings, and (given a circuit, ideally transpiled) depth and gate counts.
+    """
+    dim = sci_dimension(norb, nelec, samples_per_batch)
+    est = {
+        "norb": norb, "qubits": 2 * norb, "nelec": tuple(nelec),
+        "statevector_bytes": statevector_bytes(norb, nelec),
+        "statevector_single_bytes": statevector_bytes(norb, nelec, precision="single"),
+        "ffsim_bytes": statevector_bytes(norb, nelec, backend="ffsim"),
+        "h2_dense_bytes": 8 * norb**4,
+        "sci_dim": dim,
+        "sci_bytes": 8 * dim * 12,  # Davidson keeps ~12 vectors of the subspace dimension
+        "sample_bytes": 2 * shots * 2 * norb,
+    }
+    if qc is not None:
+        est.update(circuit_stats(qc))
+    return est
+
+
+def _fixed_bytes(est: Dict[str, Any]) -> int:
+    return est["h2_dense_bytes"] + est["sci_bytes"] + est["sample_bytes"]
+
+
+def plan_simulation(
+    est: Dict[str, Any],
+    budget_bytes: int,
+    backend: str = "aer",
+    allow_mps: bool = True,
+) -> Dict[str, Any]:
+    """
+    Cheapest faithful way to simulate a job within budget_bytes, tried in order:
+    ffsim subspace (backend="ffsim"), Aer statevector in double then single precision,
+    then Aer matrix_product_state with the largest bond dimension that fits (exact if it
+    reaches 2^(qubits/2), approximate otherwise). Raises PreflightError if nothing fits.
+    Returns {"backend", "method", "precision", "max_bond_dimension", "peak_bytes", "exact"}.
+    """
+    fixed = _fixed_bytes(est)
+    nq = est["qubits"]
+    if backend == "ffsim" and est["ffsim_bytes"] + fixed <= budget_bytes:
+        return {"backend": "ffsim", "method": "statevector", "precision": "double",
+                "max_bond_dimension": None, "peak_bytes": est["ffsim_bytes"] + fixed, "exact": True}
+    for precision, key in (("double", "statevector_bytes"), ("single", "statevector_single_bytes")):
+        if est[key] + fixed <= budget_bytes:
+            return {"backend": "aer", "method": "statevector", "precision": precision,
+                    "max_bond_dimension": None, "peak_bytes": est[key] + fixed, "exact": True}
+    if allow_mps and budget_bytes > fixed:
+        chi_exact = 2 ** (nq // 2)
+        chi = min(chi_exact, isqrt((budget_bytes - fixed) // (nq * 2 * AMPLITUDE_BYTES["double"])))
+        if chi >= min(MIN_BOND_DIMENSION, chi_exact):
+            return {"backend": "aer", "method": "matrix_product_state", "precision": "double",
+                    "max_bond_dimension": chi, "peak_bytes": mps_bytes(nq, chi) + fixed,
+                    "exact": chi >= chi_exact}
+    raise PreflightError(
+        f"{nq}-qubit job needs {_gib(est['statevector_single_bytes'] + fixed)} even in single precision "
+        f"(h2 {_gib(est['h2_dense_bytes'])}, SCI {_gib(est['sci_bytes'])}, samples {_gib(est['sample_bytes'])}); "
+        f"budget is {_gib(budget_bytes)}"
+    )
+
+
+def backend_options(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """AerSimulator options for an Aer plan ({} for the default double-precision statevector)."""
+    if plan["method"] == "statevector" and plan["precision"] == "double":
+        return {}
+    opts: Dict[str, Any] = {"method": plan["method"], "precision": plan["precision"]}
+    if plan["max_bond_dimension"] is not None:
+        opts["matrix_product_state_max_bond_dimension"] = plan["max_bond_dimension"]
+    return opts
+
+
+def plan_circuit(est: Dict[str, Any], qc, budget_bytes: int, backend: str = "aer", session=None) -> Dict[str, Any]:
+    """
+    plan_simulation, then add qc's depth/gate counts to est. For an Aer plan with a
+    SamplerSession, qc is transpiled for the planned method (session.variant): the target
+    depends on it (Aer caps statevector by RAM, matrix_product_state allows 63 qubits),
+    so planning comes first. Raises PreflightError, without transpiling, if nothing fits.
+    """
+    plan = plan_simulation(est, budget_bytes, backend)
+    if session is not None and plan["backend"] == "aer":
+        qc, _ = session.variant(**backend_options(plan)).transpile(qc)
+    est.update(circuit_stats(qc))
+    return plan
+
+
+def fits(norb: int, nelec: Tuple[int, int], budget_bytes: int, *, shots: int = 300_000,
+         samples_per_batch: int = 300, backend: str = "aer", allow_mps: bool = False) -> bool:
+    """Whether a (norb, nelec) job has a simulation plan within budget_bytes (exact methods by default)."""
+    est = estimate_job(norb, nelec, shots=shots, samples_per_batch=samples_per_batch)
+    try:
+        plan_simulation(est, budget_bytes, backend, allow_mps=allow_mps)
+    except PreflightError:
+        return False
+    return True
+
+
+def fit_active(
+    choose: Callable[[int], Tuple[List[int], Tuple[int, int]]],
+    size: int,
+    budget_bytes: int,
+    *,
+    oversize: str = "downsize",
+    **fit_kwargs,
+) -> Tuple[List[int], Tuple[int, int], Optional[int]]:
+    """
+    choose(n) -> (orbitals, nelecas) picks an n-orbital active space. Returns the choice for
+    the largest n <= size that simulates exactly within the budget, plus the orbital count
+    it was downsized from (None if choose(size) already fits). oversize="refuse" raises
+    PreflightError instead of downsizing. Approximate MPS is not considered here: a smaller
+    exact active space is the better trade than truncating the state.
+    """
+    if oversize not in ("downsize", "refuse"):
+        raise ValueError(f"invalid oversize: {oversize!r} (expected 'downsize' or 'refuse')")
+    requested = None
+    for n in range(size, 0, -1):
+        orbitals, nelecas = choose(n)
+        if requested is None:
+            requested = len(orbitals)
+        if fits(len(orbitals), nelecas, budget_bytes, **fit_kwargs):
+            if len(orbitals) == requested:
+                return orbitals, nelecas, None
+            if oversize == "refuse":
+                raise PreflightError(f"active space of {requested} orbitals does not fit in {_gib(budget_bytes)}; "
+                                     f"at most {len(orbitals)} orbitals would")
+            return orbitals, nelecas, requested
+    raise PreflightError(f"no active space fits in {_gib(budget_bytes)}")
+
+
+def preflight_molecule(
+    atom_string: str,
+    basis: str = "sto-3g",
+    ansatz: str = "all",
+    n_act_orb: int = 6,
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    he_layers: int = 2,
+    backend: str = "aer",
+    budget_bytes: Optional[int] = None,
+    transpile: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Pre-flight for a benchmark without running any chemistry: orbital counts come from the
+    basis set, and UCJ/LUCJ circuits are built from a random t2 of the right shape (full
+    rank, so gate counts are an upper bound). One row per (space, ansatz) job with its
+    estimate and plan, or "error" (and no gate counts) if it fits no method.
+    budget_bytes defaults to 80% of RAM.
+    """
+    import numpy as np
+
+    from .active_space import choose_active_window, slice_t2_active_from_full
+    from .jobs import build_circuit
+    from .parallel import memory_budget_bytes
+    from .runner import SamplerSession
+    from .scheduler import orbital_counts
+
+    budget_bytes = budget_bytes or memory_budget_bytes()
+    norb, nelec = orbital_counts(atom_string, basis)
+    nocc = nelec[0]
+    t2 = np.random.default_rng(0).normal(scale=1e-2, size=(nocc, nocc, norb - nocc, norb - nocc))
+    ncore, ncas, nelecas = choose_active_window(norb, nelec, n_act_orb)
+    t2_act = slice_t2_active_from_full(t2, ncore, ncas)
+    session = SamplerSession() if transpile and backend == "aer" else None
+
+    rows = []
+    for a in (["ucj", "lucj", "he", "hf"] if ansatz == "all" else [ansatz]):
+        for space, n, ne, amp in (("full", norb, nelec, t2), ("active", ncas, nelecas, t2_act)):
+            kind = "he" if a in ("ucj", "lucj") and amp is None else a
+            qc = build_circuit(kind, n, ne, amp, he_layers, 7)
+            est = estimate_job(n, ne, shots=shots, samples_per_batch=samples_per_batch)
+            row: Dict[str, Any] = {"job": f"{space}/{a}", "plan": None}
+            try:
+                row["plan"] = plan_circuit(est, qc, budget_bytes, backend, session)
+            except PreflightError as exc:
+                row["error"] = str(exc)
+            rows.append({**row, **est})
+    return rows
+
+
+def render_plan(rows: List[Dict[str, Any]]) -> str:
+    """Pre-flight table: one row per planned job (estimate + chosen simulation)."""
+    from .report import fmt_table
+
+    table = []
+    for r in rows:
+        plan = r.get("plan") or {}
+        method = "REFUSED" if r.get("error") else (
+            f"{plan['backend']}/{plan['method']}/{plan['precision']}"
+            + (f" chi={plan['max_bond_dimension']}" if plan.get("max_bond_dimension") else ""))
+        sv = r["ffsim_bytes"] if plan.get("backend") == "ffsim" else r["statevector_bytes"]
+        table.append([r["job"], str(r["qubits"]), _gib(sv), _gib(r["h2_dense_bytes"]),
+                      str(r["sci_dim"]), str(r.get("depth", "—")), str(r.get("two_qubit_gates", "—")),
+                      method, _gib(plan["peak_bytes"]) if plan else "—"])
+    return fmt_table(["job", "qubits", "statevector", "h2 dense", "SCI dim", "depth", "2q gates",
+                      "simulation", "peak"], table)
+
+
+def _gib(n: int) -> str:
+    if n >= 1024**3:
+        return f"{n / 1024**3:.2f} GiB"
+    if n >= 1024**2:
+        return f"{n / 1024**2:.1f} MiB"
+    return f"{n / 1024:.1f} KiB"
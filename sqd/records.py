@@ -0,0 +1,181 @@
+from __future__ import annotations
+from typing import Dict, Any, Iterator, List, Optional
+import json
+import os
+import pathlib
+import platform
+import socket
+import sys
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:  # POSIX advisory locks; without them appends are still single write() calls
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+SCHEMA_VERSION = 1
+_PACKAGES = ("numpy", "pyscf", "qiskit", "qiskit-aer", "qiskit-addon-sqd", "ffsim")
+
+
+def _jsonable(obj):
+    """numpy scalars/arrays, tuples and nested containers -> plain JSON types."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
+def peak_rss_bytes() -> Dict[str, Optional[int]]:
+    """Peak resident set size of this process and of its (finished) child processes."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover
+        return {"self": None, "children": None}
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def host_info() -> Dict[str, Any]:
+    from importlib import metadata
+
+    versions = {}
+    for pkg in _PACKAGES:
+        try:
+            versions[pkg] = metadata.version(pkg)
+        except metadata.PackageNotFoundError:
+            versions[pkg] = None
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def build_record(results: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One run record from run_sqd_benchmark results: inputs, reference/energies, per-stage
+    timings, one entry per SQD job (with per-iteration energies and subspace dimensions),
+    peak memory and host info. Warm-start arrays are dropped.
+    """
+    sqd = []
+    for ansatz, spaces in results.get("sqd", {}).items():
+        for space, entry in spaces.items():
+            stages = {k: v for k, v in entry["stages"].items() if k not in ("warm_start", "top_configurations", "preflight")}
+            sqd.append({
+                "ansatz": ansatz, "space": space, "label": entry.get("label", ansatz),
+                "energy": entry["energy"], "runtime": entry["runtime"], **stages,
+            })
+    record = {
+        "schema": SCHEMA_VERSION,
+        "run_id": uuid.uuid4().hex,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "inputs": inputs,
+        "reference": results.get("reference"),
+        "energies": results.get("energies"),
+        "timings": results.get("timings"),
+        "active_space": results.get("active_space"),
+        "norb_full": results.get("norb_full"),
+        "nelec_full": results.get("nelec_full"),
+        "transpile_cache": results.get("transpile_cache"),
+        "preflight": results.get("preflight"),
+        "spans": results.get("spans"),
+        "sqd": sqd,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "host": host_info(),
+    }
+    return _jsonable(record)
+
+
+def append_jsonl(path, record: Dict[str, Any]) -> None:
+    """
+    Append one record as a single line. The file is locked (flock) for the write, so
+    concurrent runs can share one results file without interleaving lines.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(_jsonable(record), ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, line)
+        os.fsync(fd)
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def iter_records(path) -> Iterator[Dict[str, Any]]:
+    """Records of a JSONL file in append order (a truncated last line is skipped)."""
+    with open(path, "r", encoding="utf-8") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_SH)
+        lines = fh.readlines()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def flatten_record(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One flat row per SQD job, with the run's inputs and reference alongside."""
+    inputs = record.get("inputs") or {}
+    ref = record.get("reference") or {}
+    rss = record.get("peak_rss_bytes") or {}
+    base = {
+        "run_id": record.get("run_id"),
+        "timestamp": record.get("timestamp"),
+        "geom": inputs.get("atom_string"),
+        "basis": inputs.get("basis"),
+        "backend": inputs.get("backend"),
+        "shots_budget": inputs.get("shots"),
+        "reference_name": ref.get("name"),
+        "reference_energy": ref.get("energy"),
+        "peak_rss_bytes": rss.get("self"),
+        "hostname": (record.get("host") or {}).get("hostname"),
+    }
+    rows = []
+    for job in record.get("sqd", []):
+        row = dict(base)
+        for k, v in job.items():
+            row[k] = json.dumps(v) if isinstance(v, (list, dict)) else v
+        if row.get("reference_energy") is not None:
+            row["error_mha"] = (job["energy"] - row["reference_energy"]) * 1e3
+        rows.append(row)
+    return rows
+
+
+def records_frame(path):
+    """pandas DataFrame of flatten_record() rows for every record in a JSONL file."""
+    import pandas as pd
+
+    return pd.DataFrame([row for rec in iter_records(path) for row in flatten_record(rec)])
+
+
+def write_parquet(jsonl_path, parquet_path) -> None:
+    """Rewrite a Parquet table (one row per SQD job) from the JSONL records; needs pyarrow."""
+    df = records_frame(jsonl_path)
+    tmp = pathlib.Path(f"{parquet_path}.tmp-{os.getpid()}")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, parquet_path)
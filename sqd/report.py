@@ -0,0 +1,15 @@
+from __future__ import annotations
+from datetime import datetime
+
+
+def now() -> str:
+    """Wall-clock timestamp for the START/END banners of the drivers."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fmt_table(headers, rows) -> str:
+    """Plain-text table with left-aligned columns sized to their widest cell."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    line = "-+-".join("-" * w for w in widths)
+    def row(cells): return " | ".join(str(c).ljust(w) for c, w in zip(cells, widths))
+    return "\n".join([row(headers), line, *[row(r) for r in rows]])
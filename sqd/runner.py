@@ -1,13 +1,303 @@
 from __future__ import annotations
-from typing import Dict, Any, Tuple, List
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Tuple, List, Optional
 
 import numpy as np
+import ffsim
+from qiskit.circuit import ParameterExpression
 from qiskit.compiler import transpile
+from qiskit.primitives import BitArray
 from qiskit_aer import AerSimulator
 from qiskit_aer.primitives import SamplerV2
-from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian, SCIResult
+from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian, solve_sci_batch, SCIResult
 
+from .chemistry import expand_h2
+from .samples import SampleStore
+from .symmetry import SymmetrySolver, reference_irrep, summarize as summarize_symmetry
+from . import spans
 
+
+BACKENDS = ("aer", "ffsim")
+
+
+def _feed_pickled(h, obj):
+    """Objects the walk does not reach into are hashed by their pickled state, never by type alone."""
+    import pickle
+
+    try:
+        blob = pickle.dumps(obj, protocol=4)
+    except Exception as exc:
+        raise TypeError(f"cannot fingerprint {type(obj).__qualname__}") from exc
+    h.update(type(obj).__qualname__.encode())
+    h.update(blob)
+
+
+def _feed(h, obj, depth: int = 0):
+    """
+    Hash the structure of a circuit object (gate attributes, arrays, params) into h.
+    Raises TypeError for an object it cannot serialize (the circuit is then not cached).
+    """
+    if depth > 8:
+        _feed_pickled(h, obj)
+    elif obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"[{len(obj)}".encode())
+        for x in obj:
+            _feed(h, x, depth + 1)
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=str):
+            h.update(str(k).encode())
+            _feed(h, obj[k], depth + 1)
+    elif isinstance(obj, np.generic):
+        h.update(repr(obj.item()).encode())
+    elif isinstance(obj, ParameterExpression):
+        h.update(f"P{obj}".encode())  # the primitives bind parameters by name
+    elif hasattr(obj, "__dict__"):
+        h.update(type(obj).__qualname__.encode())
+        _feed(h, {k: v for k, v in vars(obj).items() if k != "_definition"}, depth + 1)
+    else:
+        _feed_pickled(h, obj)
+
+
+def circuit_fingerprint(qc) -> str:
+    """
+    Structural hash of a circuit: identical gates/operands/parameters give identical keys.
+    Raises TypeError if some operation holds state that cannot be serialized.
+    """
+    import hashlib
+
+    h = hashlib.sha256()
+    h.update(f"{qc.num_qubits}:{qc.num_clbits}".encode())
+    for inst in qc.data:
+        op = inst.operation
+        h.update(op.name.encode())
+        h.update(repr([qc.find_bit(q).index for q in inst.qubits]).encode())
+        h.update(repr([qc.find_bit(c).index for c in inst.clbits]).encode())
+        _feed(h, op)
+    return h.hexdigest()
+
+
+class SamplerSession:
+    """
+    One AerSimulator + one SamplerV2 reused across SQD runs. Transpiled circuits are
+    memoized by (transpilation target, circuit_fingerprint()), so repeated/identical
+    circuits skip transpile; the memo keeps the max_circuits most recently used, so a
+    long-lived session (e.g. a service worker) stays bounded.
+    """
+
+    def __init__(self, seed: Optional[int] = None, optimization_level: int = 1,
+                 backend_options: Optional[Dict[str, Any]] = None, max_circuits: int = 256):
+        backend_options = dict(backend_options or {})
+        self.backend_options = backend_options
+        self.backend = AerSimulator(**backend_options)
+        self.sampler = SamplerV2(seed=seed, options={"backend_options": backend_options})
+        self.optimization_level = optimization_level
+        target = self.backend.target
+        self._target_key = (target.num_qubits, tuple(sorted(target.operation_names)))
+        self._cache: Dict[str, Any] = {"circuits": OrderedDict(), "max": max(1, max_circuits), "hits": 0, "misses": 0}
+        self._seed = seed
+        self._variants: Dict[Tuple, "SamplerSession"] = {}
+
+    @property
+    def hits(self) -> int:
+        return self._cache["hits"]
+
+    @property
+    def misses(self) -> int:
+        return self._cache["misses"]
+
+    def variant(self, **backend_options) -> "SamplerSession":
+        """
+        Session with extra AerSimulator options (e.g. method/precision picked by the
+        pre-flight planner), memoized per option set. It shares this session's seed,
+        transpile cache (and its size cap) and hit/miss counts; the method can change the transpilation
+        target (e.g. 28 vs 63 qubits for statevector vs matrix_product_state), which is
+        part of the cache key.
+        """
+        if not backend_options:
+            return self
+        key = tuple(sorted(backend_options.items()))
+        child = self._variants.get(key)
+        if child is None:
+            child = SamplerSession(self._seed, self.optimization_level,
+                                   {**self.backend_options, **backend_options})
+            child._cache = self._cache
+            self._variants[key] = child
+        return child
+
+    def transpile(self, qc):
+        """Return (transpiled circuit, seconds spent transpiling; 0.0 on a cache hit)."""
+        try:
+            key = (self._target_key, circuit_fingerprint(qc))
+        except TypeError:
+            key = None  # no reliable fingerprint: transpile every time rather than risk a wrong hit
+        circuits = self._cache["circuits"]
+        tqc = circuits.get(key) if key is not None else None
+        if tqc is not None:
+            circuits.move_to_end(key)
+            self._cache["hits"] += 1
+            return tqc, 0.0
+        self._cache["misses"] += 1
+        t0 = time.perf_counter()
+        tqc = transpile(qc, backend=self.backend, optimization_level=self.optimization_level)
+        if key is not None:
+            circuits[key] = tqc
+            while len(circuits) > self._cache["max"]:
+                circuits.popitem(last=False)
+        return tqc, time.perf_counter() - t0
+
+    def sample(self, tqcs: List[Any], shots: int, seed: Optional[int] = None,
+               run_options: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Run already-transpiled circuits in one SamplerV2 job; returns one `meas` per circuit.
+        seed overrides the session seed for this job only (e.g. distinct chunks of one run);
+        run_options go to AerSimulator.run (e.g. max_parallel_experiments).
+        """
+        job = self._sampler(seed, run_options).run(list(tqcs), shots=shots)
+        return [r.data.meas for r in job.result()]
+
+    def sample_bound(self, tqc, parameters, values, shots: int, seed: Optional[int] = None) -> List[Any]:
+        """
+        One PUB: a transpiled parametric circuit with every row of `values` bound to
+        `parameters`, executed in a single SamplerV2 job; returns one `meas` per row.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        job = self._sampler(seed).run([(tqc, {tuple(parameters): values})], shots=shots)
+        meas = job.result()[0].data.meas
+        return [meas[i] for i in range(values.shape[0])]
+
+    def _sampler(self, seed: Optional[int] = None, run_options: Optional[Dict[str, Any]] = None):
+        sampler = self.sampler
+        if (seed is not None and seed != sampler.seed) or run_options:
+            sampler = SamplerV2.from_backend(
+                self.backend, seed=sampler.seed if seed is None else seed,
+                options={"backend_options": self.backend_options, "run_options": dict(run_options or {})},
+            )
+        return sampler
+
+
+def ffsim_state(qc, norb: int, nelec: Tuple[int, int]):
+    """
+    Evolve qc in the fixed particle-number subspace with ffsim.
+    Raises ValueError if qc contains gates that do not conserve particle number (e.g. HE).
+    """
+    return ffsim.qiskit.final_state_vector(
+        qc.remove_final_measurements(inplace=False), norb=norb, nelec=nelec
+    )
+
+
+def sample_ffsim(state, shots: int, seed=None):
+    """Draw bitstrings from ffsim amplitudes as a `meas`-compatible BitArray."""
+    bools = ffsim.sample_state_vector(
+        state, shots=shots, bitstring_type=ffsim.BitstringType.BIT_ARRAY, seed=seed
+    )
+    return BitArray.from_bool_array(bools, order="big")
+
+
+# diagonalize_fermionic_hamiltonian has no stop hook: its loop ends only on its own
+# tolerances or max_iterations, and a SubspacePolicy (the `policy` argument) can shape the
+# subspaces of an iteration but not end the loop. Our convergence criteria raise
+# _Converged from the per-iteration callback instead, which propagates out of the library
+# untouched (it holds no resources that need cleanup); the result of the last finished
+# iteration is already kept by the callback. requirements.txt pins the qiskit-addon-sqd
+# minor version this was checked against, and tests/test_runner_toy.py pins the behaviour.
+class _Converged(Exception):
+    """Raised from the diagonalizer callback to end the configuration-recovery loop."""
+
+
+def dominant_configurations(sci_state, n: int = 32) -> Tuple[List[int], List[int]]:
+    """Alpha and beta strings of the n determinants with the largest |amplitude|."""
+    amps = np.abs(np.asarray(sci_state.amplitudes))
+    n = min(n, amps.size)
+    flat = np.argpartition(amps.ravel(), -n)[-n:]
+    ia, ib = np.unravel_index(flat, amps.shape)
+    strs_a = np.asarray(sci_state.ci_strs_a)[ia]
+    strs_b = np.asarray(sci_state.ci_strs_b)[ib]
+    return sorted({int(x) for x in strs_a}), sorted({int(x) for x in strs_b})
+
+
+def sample_until_saturated(
+    draw, norb: int, nelec: Tuple[int, int], max_shots: int, chunk_shots: int,
+    *,
+    saturation_rate: float = 1e-3,
+    target_unique: Optional[int] = None,
+    verbose: bool = False,
+    label: str = "SQD",
+) -> Tuple[SampleStore, List[int], List[int]]:
+    """
+    Draw shots in chunks via draw(chunk_index, n_shots) -> BitArray, merging them into one
+    SampleStore. Stops at max_shots, once the latest chunk found fewer than
+    saturation_rate new particle-number-valid configurations per shot, or once
+    target_unique valid configurations have been collected.
+    Returns (store, shots per chunk, new valid configurations per chunk).
+    """
+    store: Optional[SampleStore] = None
+    chunks: List[int] = []
+    new_valid: List[int] = []
+    drawn = 0
+    while drawn < max_shots:
+        n = min(chunk_shots, max_shots - drawn)
+        with spans.span("sample", shots=n):
+            meas = draw(len(chunks), n)
+        with spans.span("ingest"):
+            chunk = SampleStore.from_bit_array(meas, norb, nelec)
+            before = store.num_unique_valid if store is not None else 0
+            store = chunk if store is None else store.merge(chunk)
+        drawn += n
+        chunks.append(n)
+        new_valid.append(store.num_unique_valid - before)
+        rate = new_valid[-1] / n
+        if verbose:
+            print(f"[{label}] chunk {len(chunks):02d}: {n} shots, +{new_valid[-1]} new valid "
+                  f"({store.num_unique_valid} total, {rate:.2e}/shot)")
+        if target_unique is not None and store.num_unique_valid >= target_unique:
+            if verbose:
+                print(f"[{label}] target subspace size reached ({target_unique})")
+            break
+        if rate < saturation_rate:
+            if verbose and drawn < max_shots:
+                print(f"[{label}] sampling saturated after {drawn}/{max_shots} shots")
+            break
+    return store, chunks, new_valid
+
+
+def sample_circuits(
+    circuits: List[Any], shots: int, session: Optional[SamplerSession] = None,
+    *,
+    seed: Optional[int] = None,
+    max_parallel: int = 0,
+    verbose: bool = False,
+) -> Tuple[List[Any], List[float], float]:
+    """
+    Sample phase for many circuits at once: transpile each (memoized by the session), then
+    submit all of them as PUBs of one SamplerV2 job so Aer runs them as parallel experiments
+    instead of paying per-job overhead circuit by circuit. max_parallel caps how many
+    experiments Aer holds in memory at once (0 lets Aer decide from its thread count).
+    Returns (one `meas` BitArray per circuit, transpile seconds per circuit, job seconds).
+    """
+    session = session or SamplerSession(seed=seed)
+    tqcs, t_tr = [], []
+    with spans.span("transpile", circuits=len(circuits)):
+        for qc in circuits:
+            tqc, dt = session.transpile(qc)
+            tqcs.append(tqc)
+            t_tr.append(dt)
+    t0 = time.perf_counter()
+    with spans.span("sample", shots=shots, circuits=len(circuits)):
+        run_options = {"max_parallel_experiments": max_parallel} if len(tqcs) > 1 else None
+        meas = session.sample(tqcs, shots, seed=seed, run_options=run_options)
+    t_sim = time.perf_counter() - t0
+    if verbose:
+        print(f"[SQD | batched sample] {len(tqcs)} circuit(s) x {shots} shots in one job: {t_sim:.3f} s\n")
+    return meas, t_tr, t_sim
+
+
+@spans.traced("sqd_run")
 def run_sqd_once(
     h1, h2, e_core, norb: int, nelec: Tuple[int, int], qc,
     *,
@@ -17,34 +307,267 @@ def run_sqd_once(
     verbose: bool = True,
     label: str = "SQD",
     print_subsamples: bool = False,
+    backend: str = "aer",
+    seed: Optional[int] = None,
+    session: Optional[SamplerSession] = None,
+    postselect: bool = False,
+    chunk_shots: Optional[int] = None,
+    saturation_rate: float = 1e-3,
+    target_unique: Optional[int] = None,
+    energy_tol: Optional[float] = None,
+    dim_plateau: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    warm_start: Optional[Dict[str, Any]] = None,
+    include_configurations: Optional[Tuple[List[int], List[int]]] = None,
+    orbsym=None,
+    target_irrep: Optional[int] = None,
+    symmetry_filter: bool = False,
+    mem_budget: Optional[int] = None,
 ) -> Tuple[float, Dict[str, float]]:
     """
-    Transpile + sample qc with Aer SamplerV2, then call SQD diagonalizer.
-    Returns (total_energy, {"simulate": t_sim, "diag": t_diag})
+    Sample qc, then call SQD diagonalizer.
+      backend="aer"   : transpile + Aer SamplerV2 on the full 2^(2*norb) qubit space
+      backend="ffsim" : ffsim statevector in the particle-number subspace; circuits ffsim
+                        cannot simulate (e.g. HE's ry/cx) fall back to Aer
+    Pass a SamplerSession to reuse the simulator/sampler and transpiled circuits across calls;
+    seed, when given, overrides the session's seed for this run (either backend).
+    h2 may be packed, dense, or a path to a dense .npy; it is expanded only for the diagonalizer.
+    Samples are collapsed into a SampleStore (unique configurations + counts) before
+    diagonalization; postselect=True also drops wrong-particle-number strings, which
+    configuration recovery would otherwise reuse after the first iteration.
+    With chunk_shots set, `shots` becomes a budget drawn in chunks until sampling saturates
+    (see sample_until_saturated); otherwise all shots are drawn at once.
+    Convergence (checked after every SQD iteration, stopping before max_iterations):
+      energy_tol  : best energy changed by less than this (Ha)
+      dim_plateau : subspace dimension did not grow for this many consecutive iterations
+      time_limit  : diagonalization wall time exceeded this many seconds
+    warm_start takes info["warm_start"] from a previous run with the same (norb, nelec):
+    its orbital occupancies seed configuration recovery and its CI strings are kept in
+    every subspace. include_configurations=(alpha strings, beta strings) are likewise
+    always included, e.g. info["top_configurations"] from a neighbouring geometry.
+    orbsym (orbital irrep ids, see chemistry.orbital_irreps) turns on point-group
+    symmetry: each subspace is pruned to the strings that can form a target_irrep
+    determinant (default: the HF determinant's irrep) and solved with a symmetry-adapted
+    selected CI; batches with no such determinant are skipped. symmetry_filter=True also
+    drops sampled configurations of other irreps before diagonalization. The shrink is
+    reported in info["symmetry"].
+    With mem_budget (bytes), a pre-flight estimate picks the simulation (ffsim, Aer
+    statevector in double/single precision, or Aer matrix_product_state; see
+    sqd.preflight.plan_simulation) and raises PreflightError before any work if nothing
+    fits; the estimate and plan are returned in info["preflight"].
+    Returns (total_energy, {"transpile": t_tr, "simulate": t_sim, "diag": t_diag,
+                            "unique_configs": n, "unique_valid_configs": n_valid,
+                            "shots": drawn, "chunk_shots": [...], "chunk_new_valid": [...],
+                            "iterations": n_iter, "stop_reason": str,
+                            "energy_history": [...], "dim_history": [...],
+                            "warm_start": {"occupancies": (a, b), "ci_strs": (a, b)},
+                            "top_configurations": (alpha strings, beta strings)})
+    """
+    if max_iterations < 1:
+        raise ValueError(f"max_iterations must be >= 1, got {max_iterations}")
+    spans.annotate(label=label, norb=norb, backend=backend)
+    store, sampled = sample_configurations(
+        qc, norb, nelec, shots=shots, samples_per_batch=samples_per_batch, verbose=verbose, label=label,
+        backend=backend, seed=seed, session=session, chunk_shots=chunk_shots,
+        saturation_rate=saturation_rate, target_unique=target_unique, mem_budget=mem_budget,
+    )
+    e_total, info = diagonalize_samples(
+        h1, h2, e_core, norb, nelec, store,
+        samples_per_batch=samples_per_batch, max_iterations=max_iterations, verbose=verbose,
+        label=label, print_subsamples=print_subsamples, postselect=postselect,
+        energy_tol=energy_tol, dim_plateau=dim_plateau, time_limit=time_limit,
+        warm_start=warm_start, include_configurations=include_configurations,
+        orbsym=orbsym, target_irrep=target_irrep, symmetry_filter=symmetry_filter,
+    )
+    return e_total, {**sampled, **info}
+
+
+def sample_configurations(
+    qc, norb: int, nelec: Tuple[int, int],
+    *,
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    verbose: bool = True,
+    label: str = "SQD",
+    backend: str = "aer",
+    seed: Optional[int] = None,
+    session: Optional[SamplerSession] = None,
+    chunk_shots: Optional[int] = None,
+    saturation_rate: float = 1e-3,
+    target_unique: Optional[int] = None,
+    mem_budget: Optional[int] = None,
+) -> Tuple[SampleStore, Dict[str, Any]]:
+    """
+    Sample phase of run_sqd_once: pre-flight plan (with mem_budget), simulate qc and
+    collapse the shots into a SampleStore (options as in run_sqd_once).
+    Returns (store, {"transpile", "simulate", "shots", "chunk_shots", "chunk_new_valid"[, "preflight"]}).
     """
-    import time
     from datetime import datetime
 
     def _now():
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    backend = AerSimulator()
-    tqc = transpile(qc, backend=backend, optimization_level=1)
-    sampler = SamplerV2()
+    if backend not in BACKENDS:
+        raise ValueError(f"invalid backend: {backend!r} (expected one of {BACKENDS})")
+
+    preflight = None
+    if mem_budget is not None:
+        from .preflight import estimate_job, plan_simulation, backend_options
+
+        est = estimate_job(norb, nelec, shots=shots, samples_per_batch=samples_per_batch)
+        plan = plan_simulation(est, mem_budget, backend)
+        preflight = {**est, "plan": plan}
+        if plan["backend"] == "aer":
+            backend = "aer"
+            session = (session or SamplerSession(seed=seed)).variant(**backend_options(plan))
+        if verbose:
+            chi = f", bond dimension {plan['max_bond_dimension']}" if plan["max_bond_dimension"] else ""
+            print(f"[{label} | preflight] {plan['backend']} {plan['method']} ({plan['precision']}{chi}), "
+                  f"peak ≈ {plan['peak_bytes'] / 2**20:.1f} MiB of {mem_budget / 2**20:.1f} MiB")
+
+    state, t_state = None, 0.0
+    if backend == "ffsim":
+        ts = time.time()
+        try:
+            with spans.span("ffsim_state"):
+                state = ffsim_state(qc, norb, nelec)
+        except ValueError:
+            if verbose:
+                print(f"[{label}] circuit not number-conserving; falling back to Aer")
+            if preflight is not None:
+                preflight["plan"] = plan = plan_simulation(est, mem_budget, "aer")
+                session = (session or SamplerSession(seed=seed)).variant(**backend_options(plan))
+        t_state = time.time() - ts
+    t_tr = 0.0
+    if state is None:
+        if session is None:
+            session = SamplerSession(seed=seed)
+        hits = session.hits
+        with spans.span("transpile"):
+            tqc, t_tr = session.transpile(qc)
+        if verbose:
+            note = " (cached)" if session.hits > hits else ""
+            print(f"[{label} | transpile] duration: {t_tr:.3f} s{note}")
+        if preflight is not None:
+            from .preflight import circuit_stats
+
+            preflight.update(circuit_stats(tqc))
 
     if verbose:
         print(f"[{label} | simulate (shots={shots})] start   : {_now()}")
     t0 = time.time()
-    job = sampler.run([tqc], shots=shots)
-    meas = job.result()[0].data.meas
+    if state is not None:
+        rng = np.random.default_rng(seed)
+
+        def draw(k, n):
+            return sample_ffsim(state, n, seed=rng)
+    else:
+        base_seed = seed if seed is not None else session.sampler.seed
+
+        def draw(k, n):
+            # a fixed seed would redraw the same shots every chunk
+            return session.sample([tqc], n, seed=None if base_seed is None else base_seed + k)[0]
+
+    with spans.span("simulate", shots=shots):
+        if chunk_shots:
+            store, chunks, chunk_new = sample_until_saturated(
+                draw, norb, nelec, shots, chunk_shots,
+                saturation_rate=saturation_rate, target_unique=target_unique,
+                verbose=verbose, label=label,
+            )
+        else:
+            with spans.span("sample", shots=shots):
+                meas = draw(0, shots)
+            with spans.span("ingest"):
+                store = SampleStore.from_bit_array(meas, norb, nelec)
+            del meas
+            chunks, chunk_new = [shots], [store.num_unique_valid]
     t1 = time.time()
     if verbose:
         print(f"[{label} | simulate (shots={shots})] end     : {_now()}")
         print(f"[{label} | simulate (shots={shots})] duration: {t1 - t0:.3f} s\n")
-    t_sim = t1 - t0
+    t_sim = t1 - t0 + t_state
+
+    return store, {
+        "transpile": t_tr, "simulate": t_sim,
+        "shots": sum(chunks), "chunk_shots": chunks, "chunk_new_valid": chunk_new,
+        **({"preflight": preflight} if preflight is not None else {}),
+    }
+
+
+def diagonalize_samples(
+    h1, h2, e_core, norb: int, nelec: Tuple[int, int], store: SampleStore,
+    *,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    verbose: bool = True,
+    label: str = "SQD",
+    print_subsamples: bool = False,
+    postselect: bool = False,
+    energy_tol: Optional[float] = None,
+    dim_plateau: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    warm_start: Optional[Dict[str, Any]] = None,
+    include_configurations: Optional[Tuple[List[int], List[int]]] = None,
+    orbsym=None,
+    target_irrep: Optional[int] = None,
+    symmetry_filter: bool = False,
+    on_iteration: Optional[Callable[[Dict[str, Any]], None]] = None,
+    resume_from: Optional[Dict[str, Any]] = None,
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    Diagonalize phase of run_sqd_once: SQD configuration recovery + eigensolves on an
+    already-sampled SampleStore (options as in run_sqd_once).
+    on_iteration(state) is called after every SQD iteration with everything needed to
+    continue from it: {"iterations", "energy_history", "dim_history", "diag",
+    "occupancies", "ci_strs", "best_energy", "best_warm_start", "best_top_configurations"
+    [, "symmetry_history"]}. resume_from takes such a state: the remaining
+    max_iterations - state["iterations"] iterations start from its occupancies with its
+    CI strings kept in the subspace (the carry-over between iterations), and the
+    histories, elapsed time and best energy continue from it.
+    Returns (total_energy, {"diag", "unique_configs", "unique_valid_configs", "iterations",
+                            "stop_reason", "energy_history", "dim_history", "warm_start",
+                            "top_configurations"[, "symmetry"]}).
+    """
+    from datetime import datetime
+
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    if max_iterations < 1:
+        raise ValueError(f"max_iterations must be >= 1, got {max_iterations}")
+    if postselect:
+        store = store.postselect()
+    sym_solver, sym_info = None, None
+    if orbsym is not None:
+        target = reference_irrep(orbsym, nelec) if target_irrep is None else int(target_irrep)
+        sym_solver = SymmetrySolver(orbsym, target)
+        sym_info = {"target_irrep": target, "filtered_configs": 0, "subspace_history": []}
+        if symmetry_filter:
+            n_valid = store.num_unique_valid
+            store = store.filter_irrep(sym_solver.orbsym, target)
+            sym_info["filtered_configs"] = n_valid - store.num_unique_valid
+            if verbose:
+                print(f"[{label}] symmetry filter: dropped {sym_info['filtered_configs']} of {n_valid} "
+                      f"valid configurations outside irrep {target}")
+    if verbose:
+        st = store.stats()
+        print(f"[{label}] samples: {st['shots']} shots -> {st['unique']} unique "
+              f"({st['unique_valid']} with correct particle number)")
 
     best_e_hist: List[float] = []
     dim_hist: List[int | None] = []
+    best: Dict[str, Any] = {}
+    stop_reason: List[str] = []
+    prior = resume_from
+    if prior is not None:
+        best_e_hist.extend(prior["energy_history"])
+        dim_hist.extend(prior["dim_history"])
+        if sym_info is not None:
+            sym_info["subspace_history"].extend(tuple(x) for x in prior.get("symmetry_history", []))
+        if verbose:
+            print(f"[{label}] resuming after iteration {prior['iterations']} "
+                  f"(best so far {prior['best_energy']:.8f} Ha)")
 
     def _subspace_dim(r: SCIResult):
         try:
@@ -61,40 +584,131 @@ def run_sqd_once(
                     pass
         return None
 
+    # subsample = configuration recovery + subsampling before each eigensolve
+    mark = {"ns": 0}
+
+    def sci_solver(*args, **kwargs):
+        t_start = time.perf_counter_ns()
+        spans.record("subsample", mark["ns"], t_start, iteration=len(best_e_hist) + 1)
+        with spans.span("eigensolve", iteration=len(best_e_hist) + 1):
+            out = (sym_solver or solve_sci_batch)(*args, **kwargs)
+        mark["ns"] = time.perf_counter_ns()
+        return out
+
     def callback(results: list[SCIResult]):
-        r_best = min(results, key=lambda r: r.energy)
+        # batches SymmetrySolver skipped carry energy +inf and never win
+        i_best = min(range(len(results)), key=lambda i: results[i].energy)
+        r_best = results[i_best]
         best_e = r_best.energy + e_core
         d_best = _subspace_dim(r_best)
         best_e_hist.append(best_e)
         dim_hist.append(d_best)
+        if sym_solver is not None:
+            sym_info["subspace_history"].append(sym_solver.last[i_best])
+        if "result" not in best or r_best.energy < best["result"].energy:
+            best["result"] = r_best
+        if on_iteration is not None:
+            on_iteration(_iteration_state(r_best))
         if verbose:
             d_str = f"{d_best}" if d_best is not None else "n/a"
-            print(f"[{label}] Iter {len(best_e_hist):02d}: best approx = {best_e:.8f} Ha | subspace dim = {d_str}")
+            sym = ""
+            if sym_solver is not None:
+                product, _, n_symm = sym_solver.last[i_best]
+                sym = f" (irrep {sym_solver.target}: {n_symm} of {product} product determinants)"
+            print(f"[{label}] Iter {len(best_e_hist):02d}: best approx = {best_e:.8f} Ha | subspace dim = {d_str}{sym}")
             if print_subsamples:
                 for i, r in enumerate(results):
+                    if not np.isfinite(r.energy):
+                        print(f"    └─ subsample {i}: skipped (no irrep {sym_solver.target} determinant)")
+                        continue
                     di = _subspace_dim(r)
                     ei = r.energy + e_core
                     print(f"    └─ subsample {i}: E = {ei:.8f} Ha, dim = {di if di is not None else 'n/a'}")
 
+        n = len(best_e_hist)
+        if n >= max_iterations:
+            return
+        if energy_tol is not None and n > 1 and abs(best_e_hist[-1] - best_e_hist[-2]) < energy_tol:
+            stop_reason.append(f"energy change < {energy_tol:g} Ha")
+        if dim_plateau and n > dim_plateau and None not in dim_hist[-dim_plateau - 1:]:
+            recent = dim_hist[-dim_plateau - 1:]
+            if all(b <= a for a, b in zip(recent, recent[1:])):
+                stop_reason.append(f"subspace flat for {dim_plateau} iteration(s)")
+        if time_limit is not None and time.time() - t2 > time_limit:
+            stop_reason.append(f"time limit {time_limit:g} s")
+        if stop_reason:
+            raise _Converged
+
+    def _best_energy():
+        """Lowest total energy over this call and the resumed state, with its warm start and top configurations."""
+        r = best.get("result")
+        if r is None or (prior is not None and prior["best_energy"] < r.energy + e_core):
+            return prior["best_energy"], prior["best_warm_start"], prior["best_top_configurations"]
+        warm = {"occupancies": tuple(np.asarray(o) for o in r.orbital_occupancies),
+                "ci_strs": (np.asarray(r.sci_state.ci_strs_a), np.asarray(r.sci_state.ci_strs_b))}
+        return r.energy + e_core, warm, dominant_configurations(r.sci_state)
+
+    def _iteration_state(r: SCIResult) -> Dict[str, Any]:
+        e_best, warm, top = _best_energy()
+        state = {
+            "iterations": len(best_e_hist), "energy_history": list(best_e_hist), "dim_history": list(dim_hist),
+            "diag": time.time() - t2,
+            "occupancies": tuple(np.asarray(o) for o in r.orbital_occupancies),
+            "ci_strs": (np.asarray(r.sci_state.ci_strs_a), np.asarray(r.sci_state.ci_strs_b)),
+            "best_energy": float(e_best), "best_warm_start": warm, "best_top_configurations": top,
+        }
+        if sym_info is not None:
+            state["symmetry_history"] = list(sym_info["subspace_history"])
+        return state
+
     if verbose:
         print(f"[{label} | SQD diagonalize] start   : {_now()}")
-    t2 = time.time()
-    result = diagonalize_fermionic_hamiltonian(
-        h1, h2, meas,
-        samples_per_batch=samples_per_batch,
-        norb=norb, nelec=nelec,
-        max_iterations=max_iterations,
-        callback=callback,
-    )
+    warm_kwargs: Dict[str, Any] = {}
+    include_a: set = set()
+    include_b: set = set()
+    if warm_start is not None:
+        warm_kwargs["initial_occupancies"] = tuple(np.asarray(o) for o in warm_start["occupancies"])
+        include_a.update(map(int, warm_start["ci_strs"][0]))
+        include_b.update(map(int, warm_start["ci_strs"][1]))
+    if prior is not None:
+        warm_kwargs["initial_occupancies"] = tuple(np.asarray(o) for o in prior["occupancies"])
+        include_a.update(map(int, prior["ci_strs"][0]))
+        include_b.update(map(int, prior["ci_strs"][1]))
+    if include_configurations is not None:
+        include_a.update(map(int, include_configurations[0]))
+        include_b.update(map(int, include_configurations[1]))
+    if include_a or include_b:
+        warm_kwargs["include_configurations"] = (sorted(include_a), sorted(include_b))
+    t2 = time.time() - (prior["diag"] if prior is not None else 0.0)
+    remaining = max_iterations - len(best_e_hist)
+    with spans.span("diagonalize"):
+        if remaining > 0:
+            with spans.span("expand_h2"):
+                h2_dense = expand_h2(h2, norb)
+            mark["ns"] = time.perf_counter_ns()
+            try:
+                best["result"] = diagonalize_fermionic_hamiltonian(
+                    h1, h2_dense, store.to_diagonalizer_input(),
+                    samples_per_batch=samples_per_batch,
+                    norb=norb, nelec=nelec,
+                    max_iterations=remaining,
+                    sci_solver=sci_solver,
+                    callback=callback,
+                    **warm_kwargs,
+                )
+            except _Converged:
+                pass
     t3 = time.time()
     if verbose:
         print(f"[{label} | SQD diagonalize] end     : {_now()}")
         print(f"[{label} | SQD diagonalize] duration: {t3 - t2:.3f} s\n")
     t_diag = t3 - t2
 
-    # early-stop note
     iters_run = len(best_e_hist)
-    if verbose and 0 < iters_run < max_iterations:
+    if stop_reason:
+        reason = " & ".join(stop_reason)
+    elif iters_run < max_iterations:
+        # the diagonalizer's own energy/occupancy tolerances ended the loop
         improved = (iters_run == 1) or (abs(best_e_hist[-1] - best_e_hist[-2]) > 1e-8)
         grew = (iters_run == 1) or (dim_hist[-1] != dim_hist[-2])
         reasons = []
@@ -102,8 +716,95 @@ def run_sqd_once(
             reasons.append("no further energy improvement")
         if not grew:
             reasons.append("subspace stopped growing")
-        msg = " & ".join(reasons) if reasons else "convergence reached"
-        print(f"[{label}] Early stop after {iters_run}/{max_iterations} iterations ({msg}).\n")
+        reason = " & ".join(reasons) if reasons else "convergence reached"
+    else:
+        reason = "max_iterations"
+    if verbose and 0 < iters_run < max_iterations:
+        print(f"[{label}] Early stop after {iters_run}/{max_iterations} iterations ({reason}).\n")
+
+    e_total, warm, top = _best_energy()
+    return e_total, {
+        "diag": t_diag,
+        "unique_configs": store.num_unique, "unique_valid_configs": store.num_unique_valid,
+        "iterations": iters_run, "stop_reason": reason,
+        "energy_history": best_e_hist, "dim_history": dim_hist,
+        "warm_start": warm,
+        "top_configurations": top,
+        **({"symmetry": {**sym_info, **summarize_symmetry(sym_info["subspace_history"])}}
+           if sym_info is not None else {}),
+    }
+
+
+@spans.traced("he_ensemble")
+def run_he_ensemble(
+    h1, h2, e_core, norb: int, nelec: Tuple[int, int],
+    *,
+    seeds: Optional[List[int]] = None,
+    angles=None,
+    layers: int = 2,
+    shots: int = 300_000,
+    pool: bool = False,
+    seed: Optional[int] = None,
+    session: Optional[SamplerSession] = None,
+    verbose: bool = True,
+    label: str = "SQD (HE ensemble)",
+    **sqd_kwargs,
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    Hardware-efficient ensemble: the parametric HE circuit is transpiled once per
+    (norb, layers) and every angle set is bound into a single SamplerV2 call.
+    Angle sets are he_angles(norb, layers, s) for each s in seeds (matching build_he
+    with that seed), or the rows of `angles` (e.g. an angle scan).
+    Each member is diagonalized on its own; with pool=True all members' samples are
+    merged into one SampleStore and diagonalized once instead.
+    Extra keyword arguments go to diagonalize_samples (samples_per_batch, energy_tol, ...).
+    Returns (best total energy, {"members": [...], "best": index or None, "transpile",
+                                 "simulate", "diag", ...pooled diagonalizer info}).
+    """
+    from .ansatz import build_he_parametric, he_angles
+
+    if angles is None:
+        seeds = list(seeds if seeds is not None else [7])
+        angles = np.stack([he_angles(norb, layers, s) for s in seeds])
+    else:
+        angles = np.atleast_2d(np.asarray(angles, dtype=float))
+        seeds = [None] * angles.shape[0]
+    qc, theta = build_he_parametric(norb, nelec, layers)
+    if angles.shape[1] != len(theta):
+        raise ValueError(f"expected {len(theta)} angles per set, got {angles.shape[1]}")
+    qc.measure_all()
+
+    session = session or SamplerSession(seed=seed)
+    with spans.span("transpile"):
+        tqc, t_tr = session.transpile(qc)
+    t0 = time.perf_counter()
+    with spans.span("sample", shots=shots, bindings=len(angles)):
+        meas = session.sample_bound(tqc, theta, angles, shots, seed=seed)
+    with spans.span("ingest"):
+        stores = [SampleStore.from_bit_array(m, norb, nelec) for m in meas]
+    del meas
+    t_sim = time.perf_counter() - t0
+    if verbose:
+        print(f"[{label}] {len(stores)} angle set(s) x {shots} shots: transpile {t_tr:.3f} s, "
+              f"sample {t_sim:.3f} s (one job)\n")
 
-    e_total = result.energy + e_core
-    return e_total, {"simulate": t_sim, "diag": t_diag}
+    members = [{"seed": s, "shots": st.num_shots, "unique_valid_configs": st.num_unique_valid}
+               for s, st in zip(seeds, stores)]
+    if pool:
+        merged = stores[0]
+        for st in stores[1:]:
+            merged = merged.merge(st)
+        e_best, info = diagonalize_samples(h1, h2, e_core, norb, nelec, merged,
+                                           verbose=verbose, label=f"{label}, pooled", **sqd_kwargs)
+        best = None
+    else:
+        info = {"diag": 0.0}
+        for i, (member, st) in enumerate(zip(members, stores)):
+            tag = f"seed={member['seed']}" if member["seed"] is not None else f"set {i}"
+            e, m_info = diagonalize_samples(h1, h2, e_core, norb, nelec, st,
+                                            verbose=verbose, label=f"{label}, {tag}", **sqd_kwargs)
+            member.update(energy=e, iterations=m_info["iterations"], diag=m_info["diag"])
+            info["diag"] += m_info["diag"]
+        best = min(range(len(members)), key=lambda i: members[i]["energy"])
+        e_best = members[best]["energy"]
+    return e_best, {**info, "transpile": t_tr, "simulate": t_sim, "members": members, "best": best}
@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+def _popcount(x: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int64)
+    bytes_ = x.astype("<u8").view(np.uint8).reshape(*x.shape, 8)
+    return np.unpackbits(bytes_, axis=-1).sum(axis=-1).astype(np.int64)
+
+
+def _bit_field(words: np.ndarray, start: int, length: int) -> np.ndarray:
+    """Bits [start, start+length) of little-endian multiword integers, as uint64 (length <= 64)."""
+    w, off = divmod(start, 64)
+    out = words[:, w] >> np.uint64(off)
+    if off and off + length > 64 and w + 1 < words.shape[1]:
+        out = out | (words[:, w + 1] << np.uint64(64 - off))
+    if length < 64:
+        out = out & np.uint64((1 << length) - 1)
+    return out
+
+
+class SampleStore:
+    """
+    Compact, deduplicated measurement record for one circuit (what is kept between
+    sampling and diagonalization).
+
+    Each 2*norb-bit shot (beta bits high, alpha bits low, as in Qiskit's `meas`) is packed
+    into little-endian uint64 words and collapsed into unique configurations with counts;
+    rows are kept in the same order np.unique gives for the unpacked bool matrix. The
+    alpha/beta halves and their particle-number validity are computed once.
+    """
+
+    def __init__(self, words: np.ndarray, counts: np.ndarray, norb: int, nelec: Tuple[int, int]):
+        self.words = words
+        self.counts = counts.astype(np.int64)
+        self.norb = norb
+        self.nelec = (int(nelec[0]), int(nelec[1]))
+        self.alpha = _bit_field(words, 0, norb)
+        self.beta = _bit_field(words, norb, norb)
+        self.valid = (_popcount(self.alpha) == self.nelec[0]) & (_popcount(self.beta) == self.nelec[1])
+
+    @property
+    def num_bits(self) -> int:
+        return 2 * self.norb
+
+    @property
+    def num_words(self) -> int:
+        return self.words.shape[1]
+
+    @classmethod
+    def from_words(cls, words: np.ndarray, norb: int, nelec: Tuple[int, int], counts=None) -> "SampleStore":
+        """Deduplicate packed rows (optionally pre-weighted by counts)."""
+        words = np.asarray(words, dtype=np.uint64).reshape(len(words), -1)
+        if counts is None:
+            counts = np.ones(len(words), dtype=np.int64)
+        if words.shape[1] == 1:
+            uniq, inv = np.unique(words[:, 0], return_inverse=True)
+            uniq = uniq[:, None]
+        else:
+            uniq, inv = np.unique(words, axis=0, return_inverse=True)
+            order = np.lexsort(uniq.T)  # most significant word is the primary key
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            uniq, inv = uniq[order], rank[inv.reshape(-1)]
+        summed = np.bincount(inv.reshape(-1), weights=counts, minlength=len(uniq)).astype(np.int64)
+        return cls(uniq, summed, norb, nelec)
+
+    @classmethod
+    def from_bit_array(cls, meas, norb: int, nelec: Tuple[int, int]) -> "SampleStore":
+        """Pack a Qiskit BitArray (big-endian bytes per shot) without unpacking to bools."""
+        arr = np.asarray(meas.array).reshape(-1, meas.array.shape[-1])
+        nwords = max(1, -(-meas.num_bits // 64))
+        le = np.zeros((arr.shape[0], nwords * 8), dtype=np.uint8)
+        le[:, : arr.shape[1]] = arr[:, ::-1]
+        return cls.from_words(le.view("<u8"), norb, nelec)
+
+    @classmethod
+    def from_bool_array(cls, bools: np.ndarray, norb: int, nelec: Tuple[int, int]) -> "SampleStore":
+        """Pack a (shots, 2*norb) bool matrix whose last column is bit 0."""
+        from qiskit.primitives import BitArray
+
+        return cls.from_bit_array(BitArray.from_bool_array(np.asarray(bools, dtype=bool), order="big"),
+                                  norb, nelec)
+
+    def merge(self, other: "SampleStore") -> "SampleStore":
+        """Store holding the shots of both (e.g. consecutive sampling chunks)."""
+        return SampleStore.from_words(
+            np.concatenate([self.words, other.words]), self.norb, self.nelec,
+            counts=np.concatenate([self.counts, other.counts]),
+        )
+
+    def postselect(self) -> "SampleStore":
+        """Only configurations with the right (n_alpha, n_beta); note these are all the first
+        SQD iteration uses, but configuration recovery in later ones also draws on the rest."""
+        keep = self.valid
+        return SampleStore(self.words[keep], self.counts[keep], self.norb, self.nelec)
+
+    def filter_irrep(self, orbsym, target: int) -> "SampleStore":
+        """
+        Drop correct-particle-number configurations whose determinant irrep (alpha irrep
+        XOR beta irrep) is not `target`; the rest stay for configuration recovery.
+        """
+        from .symmetry import string_irreps
+
+        ir = string_irreps(self.alpha, orbsym) ^ string_irreps(self.beta, orbsym)
+        keep = ~self.valid | (ir == target)
+        return SampleStore(self.words[keep], self.counts[keep], self.norb, self.nelec)
+
+    @property
+    def num_shots(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def num_unique(self) -> int:
+        return int(len(self.counts))
+
+    @property
+    def num_unique_valid(self) -> int:
+        return int(self.valid.sum())
+
+    def unique_bool_rows(self) -> np.ndarray:
+        """(num_unique, 2*norb) bool matrix, big-endian columns like Qiskit's bitstrings."""
+        le = self.words.astype("<u8").view(np.uint8).reshape(len(self.words), -1)
+        be = le[:, ::-1]
+        return np.unpackbits(be, axis=1)[:, -self.num_bits:].astype(bool)
+
+    def to_diagonalizer_input(self):
+        """
+        Qiskit BitArray of every shot for diagonalize_fermionic_hamiltonian (its supported
+        input), rebuilt by repeating the unique packed rows by their counts. The library
+        unpacks it to a shots-by-bits bool matrix and deduplicates again, so the
+        diagonalizer costs what the raw `meas` would; the store's savings are between
+        sampling and diagonalization (chunk merging, filtering, checkpoints, statistics).
+        """
+        from qiskit.primitives import BitArray
+
+        nbytes = -(-self.num_bits // 8)
+        le = self.words.astype("<u8").view(np.uint8).reshape(len(self.words), -1)
+        be = np.ascontiguousarray(le[:, nbytes - 1::-1])
+        return BitArray(np.repeat(be, self.counts, axis=0), self.num_bits)
+
+    def stats(self) -> Dict[str, float]:
+        shots = self.num_shots
+        return {
+            "shots": shots,
+            "unique": self.num_unique,
+            "unique_valid": self.num_unique_valid,
+            "valid_fraction": float(self.counts[self.valid].sum() / shots) if shots else 0.0,
+            "duplication": float(shots / self.num_unique) if self.num_unique else 0.0,
+        }
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Sequence
+import time
+
+from .chemistry import rhf_build, ChemistryContext
+from .jobs import build_circuit
+from .report import fmt_table, now
+from .runner import run_sqd_once, SamplerSession
+from .parallel import thread_env, spawn_pool, cpu_budget
+
+
+def geometry_at(template: str, r: float) -> str:
+    """Fill the {r} placeholder(s) of a geometry template, e.g. 'N 0 0 0; N 0 0 {r}'."""
+    if "{r" not in template:
+        raise ValueError(f"geometry template has no {{r}} placeholder: {template!r}")
+    return template.format(r=r)
+
+
+def _scan_point(
+    r: float,
+    opts: Dict[str, Any],
+    guess: Optional[Dict[str, Any]] = None,
+    session: Optional[SamplerSession] = None,
+):
+    """
+    One scan point: RHF -> CCSD -> full-space integrals (+FCI if small) -> SQD.
+    guess carries the previous point's density matrix, CCSD amplitudes and, optionally,
+    dominant determinants. Returns (row, guess for the next point).
+    """
+    guess = guess or {}
+    geom = geometry_at(opts["geom_template"], r)
+    times: Dict[str, float] = {}
+
+    t0 = time.time()
+    mol, mf = rhf_build(geom, opts["basis"], dm0=guess.get("dm"))
+    times["scf"] = time.time() - t0
+    ctx = ChemistryContext(mf)
+    norb, nelec = ctx.norb, tuple(mol.nelec)
+
+    t0 = time.time()
+    e_ccsd, t2 = ctx.ccsd(t1=guess.get("t1"), t2=guess.get("t2"))
+    times["ccsd"] = time.time() - t0
+
+    h1, h2, e_core = ctx.integrals()
+    e_fci = ctx.full_ci() if ctx.n_determinants() <= opts["max_fci_dets"] else None
+
+    qc = build_circuit(opts["ansatz"], norb, nelec, t2, opts["he_layers"], 7)
+    e_sqd, info = run_sqd_once(
+        h1, h2, e_core, norb, nelec, qc,
+        label=f"SQD (r={r:g})", session=session,
+        include_configurations=guess.get("top") if opts["seed_configurations"] else None,
+        **opts["sqd_kwargs"],
+    )
+    times["sqd"] = info["transpile"] + info["simulate"] + info["diag"]
+
+    row = {
+        "r": r, "geom": geom,
+        "e_rhf": float(mf.e_tot), "e_ccsd": float(e_ccsd), "e_fci": e_fci, "e_sqd": e_sqd,
+        "scf_cycles": getattr(mf, "cycles", None),
+        "sqd_iterations": info["iterations"], "unique_valid_configs": info["unique_valid_configs"],
+        "timings": times,
+    }
+    next_guess = {"dm": mf.make_rdm1(), "t1": ctx.t1, "t2": t2, "top": info["top_configurations"]}
+    return row, next_guess
+
+
+def _scan_point_job(r: float, opts: Dict[str, Any], threads: int):
+    row, _ = _scan_point(r, opts, session=SamplerSession(backend_options={"max_parallel_threads": threads}))
+    return row
+
+
+def run_sqd_scan(
+    geom_template: str,
+    displacements: Sequence[float],
+    basis: str = "sto-3g",
+    ansatz: str = "ucj",              # "ucj" | "lucj" | "he" | "hf"
+    shots: int = 300_000,
+    samples_per_batch: int = 300,
+    max_iterations: int = 6,
+    he_layers: int = 2,
+    backend: str = "aer",
+    warm_start: bool = True,
+    seed_configurations: bool = False,
+    workers: int = 1,
+    max_fci_dets: int = 500_000,
+    verbose: bool = True,
+    render: bool = True,
+    **sqd_kwargs,
+) -> List[Dict[str, Any]]:
+    """
+    Potential-energy-surface scan: one RHF/CCSD/SQD calculation per displacement r of
+    geom_template. With warm_start, each point's RHF starts from the previous density
+    matrix and CCSD from the previous amplitudes; with seed_configurations, the previous
+    point's dominant determinants are always included in the SQD subspace. Both make
+    the points sequential; otherwise they run on `workers` processes.
+    Extra keyword arguments go to run_sqd_once (e.g. chunk_shots, energy_tol).
+    render prints the banners and the scan table; verbose adds the per-stage progress.
+    Returns one row per point, in displacement order.
+    """
+    if ansatz.lower() not in {"ucj", "lucj", "he", "hf"}:
+        raise ValueError(f"invalid ansatz: {ansatz!r}")
+    opts = {
+        "geom_template": geom_template, "basis": basis, "ansatz": ansatz.lower(),
+        "he_layers": he_layers, "max_fci_dets": max_fci_dets,
+        "seed_configurations": seed_configurations,
+        "sqd_kwargs": dict(shots=shots, samples_per_batch=samples_per_batch,
+                           max_iterations=max_iterations, verbose=verbose, backend=backend,
+                           **sqd_kwargs),
+    }
+    points = [float(r) for r in displacements]
+    sequential = warm_start or seed_configurations or workers <= 1 or len(points) <= 1
+
+    if render:
+        print(f"=== SCAN START: {now()} ===")
+        print(f"  Template: {geom_template}")
+        print(f"  Points: {', '.join(f'{r:g}' for r in points)}")
+        print(f"  Basis: {basis}, ansatz: {ansatz}, backend: {backend}, "
+              f"warm start: {warm_start}, seed configurations: {seed_configurations}\n")
+
+    t0 = time.time()
+    rows: List[Dict[str, Any]] = []
+    if sequential:
+        session = SamplerSession()
+        guess: Optional[Dict[str, Any]] = None
+        for r in points:
+            row, next_guess = _scan_point(r, opts, guess, session)
+            rows.append(row)
+            guess = {"top": next_guess["top"]} if not warm_start else next_guess
+    else:
+        workers = min(workers, len(points))
+        threads = max(1, cpu_budget() // workers)
+        with thread_env(threads), spawn_pool(workers) as pool:
+            futures = [pool.submit(_scan_point_job, r, opts, threads) for r in points]
+            rows = [f.result() for f in futures]
+    wall = time.time() - t0
+
+    if render:
+        def _e(x):
+            return "—" if x is None else f"{x:.8f}"
+
+        table = [[f"{row['r']:g}", _e(row["e_rhf"]), _e(row["e_ccsd"]), _e(row["e_sqd"]), _e(row["e_fci"]),
+                  "—" if row["e_fci"] is None else f"{(row['e_sqd'] - row['e_fci'])*1e3:+.3f}",
+                  str(row["scf_cycles"]), f"{sum(row['timings'].values()):.2f}"] for row in rows]
+        print("\n=== Scan ===")
+        print(fmt_table(["r", "RHF (Ha)", "CCSD (Ha)", "SQD (Ha)", "FCI (Ha)", "ΔSQD-FCI (mHa)",
+                         "SCF cycles", "Runtime (s)"], table))
+        print(f"\nWall time: {wall:.2f} s")
+        print(f"=== SCAN END: {now()} ===")
+    return rows
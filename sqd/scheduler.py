@@ -0,0 +1,162 @@
+from __future__ import annotations
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, wait
+import time
+
+from .parallel import thread_env, spawn_pool, cpu_budget, memory_budget_bytes
+from .preflight import statevector_bytes
+
+
+def orbital_counts(geom: str, basis: str, charge: int = 0, spin: int = 0) -> Tuple[int, Tuple[int, int]]:
+    """(norb, nelec) from the basis set alone — builds the Mole, no SCF."""
+    import pyscf.gto
+
+    mol = pyscf.gto.M(atom=geom, basis=basis, charge=charge, spin=spin, verbose=0)
+    return mol.nao_nr(), mol.nelec
+
+
+def estimate_case(cfg: Dict[str, Any], backend: str = "aer") -> Dict[str, Any]:
+    """
+    Rough resident-memory and core demand of one benchmark case:
+      statevector (largest circuit) + dense h2 (full & active) + CCSD t2 + sampled bitstrings.
+    Cores scale with the statevector: 1 core up to 18 qubits, doubling every 2 qubits beyond.
+    """
+    norb, nelec = orbital_counts(cfg["geom"], cfg.get("basis", "sto-3g"), cfg.get("charge", 0), cfg.get("spin", 0))
+    ncas = min(norb, cfg.get("active_orbitals") or 6)
+    nocc = nelec[0]
+    nvir = norb - nocc
+    shots = cfg.get("shots", 300_000)
+
+    sv = statevector_bytes(norb, nelec, backend)
+    h2 = 8 * (norb**4 + ncas**4)
+    t2 = 8 * nocc**2 * nvir**2
+    samples = 2 * shots * 2 * norb  # BitArray + unpacked bool copy in the diagonalizer
+    mem = sv + h2 + t2 + samples
+
+    qubits = 2 * norb if backend == "aer" else 0
+    cores = 1 if qubits <= 18 else 2 ** ((qubits - 17) // 2)
+    return {"id": cfg.get("id"), "norb": norb, "nelec": nelec, "ncas": ncas,
+            "mem_bytes": int(mem), "cores": int(cores)}
+
+
+def _run_case(cfg: Dict[str, Any], threads: int, log_dir: Optional[str]):
+    """
+    Worker: one molecule, stdout captured to <log_dir>/<id>.log (or discarded). The process
+    is dedicated to this case, so fd 1 is redirected too (PySCF writes to it directly).
+    """
+    import contextlib
+    import os
+    import pathlib
+    import sys
+
+    from .cache import IntegralCache
+    from .compare import run_sqd_benchmark
+    from .runner import SamplerSession
+
+    if log_dir is not None:
+        pathlib.Path(log_dir).mkdir(parents=True, exist_ok=True)
+        sink = open(pathlib.Path(log_dir) / f"{cfg['id']}.log", "w", encoding="utf-8")
+    else:
+        sink = open(os.devnull, "w")
+    t0 = time.time()
+    sys.stdout.flush()
+    os.dup2(sink.fileno(), 1)
+    with sink, contextlib.redirect_stdout(sink):
+        results = run_sqd_benchmark(
+            atom_string=cfg["geom"],
+            basis=cfg.get("basis", "sto-3g"),
+            ansatz=cfg.get("ansatz", "all"),
+            shots=cfg.get("shots", 300_000),
+            samples_per_batch=cfg.get("samples_per_batch", 300),
+            max_iterations=cfg.get("max_iterations", 6),
+            he_layers=cfg.get("he_layers", 2),
+            n_act_orb=cfg.get("active_orbitals", 6),
+            active_space=cfg.get("active_space", "window"),
+            occ_threshold=cfg.get("occ_threshold", 0.01),
+            max_qubits=cfg.get("max_qubits"),
+            mem_budget_gb=cfg.get("mem_budget_gb"),
+            symmetry=cfg.get("symmetry", "off"),
+            target_irrep=cfg.get("target_irrep"),
+            pipeline=cfg.get("pipeline", False),
+            checkpoint_dir=cfg.get("checkpoint_dir"),
+            resume=cfg.get("resume", False),
+            verbose=log_dir is not None,
+            render=log_dir is not None,
+            record_path=cfg.get("record_path"),
+            cache=IntegralCache(cfg["cache_dir"]) if cfg.get("cache_dir") else None,
+            backend=cfg.get("backend", "aer"),
+            chunk_shots=cfg.get("chunk_shots"),
+            saturation_rate=cfg.get("saturation_rate", 1e-3),
+            target_unique=cfg.get("target_unique"),
+            energy_tol=cfg.get("energy_tol"),
+            dim_plateau=cfg.get("dim_plateau"),
+            time_limit=cfg.get("time_limit"),
+            session=SamplerSession(backend_options={"max_parallel_threads": threads}),
+        )
+    results["wall"] = time.time() - t0
+    return results
+
+
+def run_suite(
+    cases: List[Dict[str, Any]],
+    *,
+    max_cores: Optional[int] = None,
+    max_mem_bytes: Optional[int] = None,
+    backend: str = "aer",
+    log_dir: Optional[str] = None,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Run benchmark cases concurrently under a core and memory budget, yielding
+    (case, results) as each one finishes; results is {"error": str} if the case failed.
+
+    Cases are admitted largest-first; whenever a case finishes, the freed budget is filled
+    first-fit from the remaining queue, so small cases run alongside large ones. A case
+    larger than the whole budget is clamped to it and runs only when nothing else does.
+    """
+    max_cores = max_cores or cpu_budget()
+    max_mem_bytes = max_mem_bytes or memory_budget_bytes()
+
+    pending = []
+    for cfg in cases:
+        try:
+            est = estimate_case(cfg, backend)
+        except Exception as exc:  # e.g. a bad geometry or basis: fail this case only
+            yield cfg, {"error": f"{type(exc).__name__}: {exc}"}
+            continue
+        est["cores"] = min(est["cores"], max_cores)
+        pending.append((cfg, est))
+    pending.sort(key=lambda ce: (ce[1]["mem_bytes"], ce[1]["cores"]), reverse=True)
+
+    running: Dict[Any, Tuple[Dict[str, Any], Dict[str, Any], Any]] = {}
+    free_cores, free_mem = max_cores, max_mem_bytes
+
+    def _fits(est):
+        if not running:
+            return True
+        return est["cores"] <= free_cores and est["mem_bytes"] <= free_mem
+
+    while pending or running:
+        for item in list(pending):
+            cfg, est = item
+            if not _fits(est):
+                continue
+            pending.remove(item)
+            threads = max(1, est["cores"])
+            with thread_env(threads):
+                pool = spawn_pool(1)
+                fut = pool.submit(_run_case, {**cfg, "backend": backend}, threads, log_dir)
+            running[fut] = (cfg, est, pool)
+            free_cores -= est["cores"]
+            free_mem -= est["mem_bytes"]
+
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for fut in done:
+            cfg, est, pool = running.pop(fut)
+            pool.shutdown()
+            free_cores += est["cores"]
+            free_mem += est["mem_bytes"]
+            try:
+                results = fut.result()
+            except Exception as exc:  # one failing molecule must not stop the sweep
+                results = {"error": f"{type(exc).__name__}: {exc}"}
+            yield cfg, results
@@ -0,0 +1,440 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Optional
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+# Only the standard library at import time: `sqd submit` is a thin client, and the
+# scientific stack is imported once per worker process (_init_worker), not per job.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+COMMANDS = ("run", "bench")
+_CHEM_MEMO_SIZE = 8
+
+# bench job arguments use the CLI option names; these map to run_sqd_benchmark's
+_BENCH_RENAMES = {"geom": "atom_string", "mem_gb": "mem_budget_gb", "record": "record_path",
+                  "parquet": "parquet_path"}
+# job arguments naming files/directories a worker writes: only allowed under the server's output_dir
+_PATH_ARGS = ("record", "record_path", "parquet", "parquet_path", "checkpoint_dir", "h2_mmap_dir")
+
+
+# ---------------------------------------------------------------- worker processes
+
+_SESSION = None
+_CACHE_DIR: Optional[str] = None
+_CHEM: "OrderedDict[tuple, Any]" = OrderedDict()
+
+
+def _init_worker(threads: int, cache_dir: Optional[str]):
+    """Pay the heavy imports and Aer start-up once, when the worker process spawns."""
+    global _SESSION, _CACHE_DIR
+    from . import compare  # noqa: F401  (pyscf, qiskit, qiskit_aer, ffsim, qiskit_addon_sqd)
+    from .runner import SamplerSession
+
+    _SESSION = SamplerSession(backend_options={"max_parallel_threads": threads})
+    _CACHE_DIR = cache_dir
+
+
+def _warm() -> int:
+    import os
+
+    return os.getpid()
+
+
+def _chemistry(geom: str, basis: str, cache):
+    """Per-worker LRU of CachedChemistry, so repeated molecules skip SCF/CCSD entirely."""
+    from .compare import CachedChemistry
+
+    key = (geom, basis)
+    chem = _CHEM.get(key)
+    if chem is None:
+        chem = _CHEM[key] = CachedChemistry(geom, basis, cache=cache, verbose=False)
+        while len(_CHEM) > _CHEM_MEMO_SIZE:
+            _CHEM.popitem(last=False)
+    _CHEM.move_to_end(key)
+    return chem
+
+
+def execute(command: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one job spec in a worker: "run" is `sqd run` (run_single_sqd), "bench" is `sqd bench`
+    (run_sqd_benchmark, result as a sqd.records run record). Arguments use the CLI option
+    names with underscores (see validate_spec); the cache is the server's. Returns a JSON-safe dict.
+    """
+    from .cache import IntegralCache
+    from .records import _jsonable, build_record
+
+    args = dict(args)
+    cache_dir = _CACHE_DIR
+    cache = IntegralCache(cache_dir) if cache_dir else None
+    t0 = time.perf_counter()
+    if command == "run":
+        from .compare import run_single_sqd
+
+        mem_gb = args.pop("mem_gb", None)
+        if mem_gb:
+            args["mem_budget"] = int(mem_gb * 1024**3)
+        geom, basis = args.pop("geom"), args.pop("basis", "sto-3g")
+        e, info = run_single_sqd(geom, basis, chem=_chemistry(geom, basis, cache), verbose=False,
+                                 session=_SESSION, **args)
+        out = {"energy": e, "stages": {k: v for k, v in info.items() if k not in ("warm_start", "top_configurations")}}
+    elif command == "bench":
+        from .compare import run_sqd_benchmark
+
+        kwargs = {_BENCH_RENAMES.get(k, k): v for k, v in args.items()}
+        kwargs.setdefault("basis", "sto-3g")
+        kwargs.setdefault("verbose", False)
+        kwargs.setdefault("render", False)
+        results = run_sqd_benchmark(cache=cache, session=_SESSION, **kwargs)
+        out = build_record(results, {**kwargs, "cache_dir": cache_dir})
+    else:
+        raise ValueError(f"invalid command: {command!r} (expected one of {COMMANDS})")
+    return {**_jsonable(out), "run_s": time.perf_counter() - t0}
+
+
+# ---------------------------------------------------------------- job queue (server process)
+
+def _confine(name: str, path: Any, root: Optional[str]) -> str:
+    """Absolute form of a client path argument, which must resolve inside root."""
+    if root is None:
+        raise ValueError(f"{name} needs a server started with an output directory (sqd serve --output-dir)")
+    if not isinstance(path, str) or not path:
+        raise ValueError(f"{name} must be a non-empty path string")
+    root = os.path.realpath(root)
+    full = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full]) != root:
+        raise ValueError(f"{name} must stay inside the server's output directory")
+    return full
+
+
+def validate_spec(spec: Any, output_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Normalize a job spec {"command", "args", "priority"}; raises ValueError if malformed.
+    Clients cannot choose the cache (cache_dir), and file arguments (record, parquet,
+    checkpoint_dir, h2_mmap_dir) are resolved under output_dir and refused without one.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("job spec must be a JSON object")
+    command = spec.get("command", "run")
+    if command not in COMMANDS:
+        raise ValueError(f"invalid command: {command!r} (expected one of {COMMANDS})")
+    args = spec.get("args", {})
+    if not isinstance(args, dict) or "geom" not in args:
+        raise ValueError("job args must be an object with at least 'geom'")
+    if "cache_dir" in args:
+        raise ValueError("cache_dir is the server's (sqd serve --cache-dir)")
+    paths = {k: _confine(k, args[k], output_dir) for k in _PATH_ARGS if args.get(k) is not None}
+    args = {**args, **paths} if paths else args
+    priority = spec.get("priority", 0)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ValueError("priority must be an integer")
+    return {"command": command, "args": args, "priority": priority}
+
+
+class JobQueue:
+    """
+    Priority queue of job specs served by a pool of warm spawn workers. Higher priority
+    runs first, FIFO within a priority; a job is handed to the pool only when a worker
+    is free, so a late high-priority job overtakes everything still queued. A crashed
+    worker fails its job and the pool is rebuilt. Only the latest `keep_finished`
+    finished jobs are kept for lookup. Job file arguments must lie under output_dir
+    (see validate_spec). Thread-safe.
+    """
+
+    def __init__(self, workers: int = 1, threads: Optional[int] = None, cache_dir: Optional[str] = None,
+                 keep_finished: int = 1000, output_dir: Optional[str] = None):
+        from .parallel import cpu_budget
+
+        self.output_dir = output_dir
+        self.keep_finished = keep_finished
+        self._finished: List[str] = []
+        self.workers = max(1, workers)
+        self.threads = threads or max(1, cpu_budget() // self.workers)
+        self.cache_dir = cache_dir
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._closed = False
+        self._pool = self._new_pool()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="sqd-dispatch", daemon=True)
+
+    def _new_pool(self):
+        from .parallel import spawn_pool, thread_env
+
+        with thread_env(self.threads):
+            pool = spawn_pool(self.workers, _init_worker, (self.threads, self.cache_dir))
+            # spawn every worker now, so the first jobs do not pay the imports
+            warm = [pool.submit(_warm) for _ in range(self.workers)]
+        for f in warm:
+            f.result()
+        return pool
+
+    def start(self) -> "JobQueue":
+        self._dispatcher.start()
+        return self
+
+    def submit(self, spec: Dict[str, Any]) -> str:
+        spec = validate_spec(spec, self.output_dir)
+        job_id = uuid.uuid4().hex[:12]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("job queue is shut down")
+            self.jobs[job_id] = {"id": job_id, **spec, "status": "queued", "submitted": time.time()}
+            heapq.heappush(self._heap, (-spec["priority"], next(self._seq), job_id))
+            self._cond.notify_all()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return False
+            job.update(status="cancelled", finished=time.time())
+            self._cond.notify_all()
+            return True
+
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            return None if job is None else self._public(job)
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        out = {k: job[k] for k in ("id", "command", "priority", "status") if k in job}
+        if "started" in job:
+            out["queue_s"] = job["started"] - job["submitted"]
+        if "finished" in job:
+            out["wall_s"] = job["finished"] - job["submitted"]
+        for k in ("result", "error"):
+            if k in job:
+                out[k] = job[k]
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"workers": self.workers, "threads_per_worker": self.threads, "jobs": counts}
+
+    def results(self, job_ids: List[str], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each job's final snapshot as it finishes (completion order); unknown ids raise KeyError."""
+        pending = list(dict.fromkeys(job_ids))
+        with self._cond:
+            missing = [j for j in pending if j not in self.jobs]
+        if missing:
+            raise KeyError(", ".join(missing))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            with self._cond:
+                done = [j for j in pending if self.jobs[j]["status"] in ("done", "failed", "cancelled")]
+                if not done:
+                    left = None if deadline is None else deadline - time.monotonic()
+                    if left is not None and left <= 0:
+                        return
+                    self._cond.wait(left)
+                    continue
+                snaps = [self._public(self.jobs[j]) for j in done]
+            for j, snap in zip(done, snaps):
+                pending.remove(j)
+                yield snap
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._heap or self._running >= self.workers):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self.jobs[job_id]
+                if job["status"] != "queued":  # cancelled while waiting
+                    continue
+                job.update(status="running", started=time.time())
+                self._running += 1
+            try:
+                fut = self._pool.submit(execute, job["command"], job["args"])
+            except BrokenProcessPool:
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                fut = self._pool.submit(execute, job["command"], job["args"])
+            fut.add_done_callback(lambda f, job_id=job_id: self._finish(job_id, f))
+
+    def _finish(self, job_id: str, fut):
+        with self._cond:
+            job = self.jobs[job_id]
+            try:
+                job["result"] = fut.result()
+                job["status"] = "done"
+            except Exception as exc:  # a failing job must not take the service down
+                job["error"] = f"{type(exc).__name__}: {exc}"
+                job["status"] = "failed"
+            job["finished"] = time.time()
+            self._running -= 1
+            self._finished.append(job_id)
+            while len(self._finished) > self.keep_finished:
+                self.jobs.pop(self._finished.pop(0), None)
+            self._cond.notify_all()
+
+    def close(self, wait: bool = True):
+        with self._cond:
+            self._closed = True
+            for job in self.jobs.values():
+                if job["status"] == "queued":
+                    job.update(status="cancelled", finished=time.time())
+            self._cond.notify_all()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ---------------------------------------------------------------- HTTP front end
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST /jobs            spec, list of specs or {"jobs": [...]} -> {"ids": [...]}
+    GET  /jobs/<id>       job snapshot
+    DELETE /jobs/<id>     cancel a queued job
+    GET  /results?ids=..  NDJSON stream, one final snapshot per job as it finishes
+    GET  /health          worker count and job counts by status
+    POST /shutdown        stop the server
+    """
+
+    server: "SQDServer"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, obj, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        queue = self.server.queue
+        if url.path == "/health":
+            return self._send_json({"status": "ok", **queue.stats()})
+        if url.path.startswith("/jobs/"):
+            snap = queue.snapshot(url.path[len("/jobs/"):])
+            return self._send_json(snap, 200) if snap else self._send_json({"error": "unknown job"}, 404)
+        if url.path == "/results":
+            qs = parse_qs(url.query)
+            ids = [i for v in qs.get("ids", []) for i in v.split(",") if i]
+            timeout = float(qs["timeout"][0]) if "timeout" in qs else None
+            try:
+                stream = queue.results(ids, timeout)
+                first = next(stream, None)
+            except KeyError as exc:
+                return self._send_json({"error": f"unknown job(s): {exc.args[0]}"}, 404)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()  # no Content-Length: the stream ends when the connection closes
+            for snap in itertools.chain([first] if first else [], stream):
+                self.wfile.write((json.dumps(snap) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            return None
+        return self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/shutdown":
+            self._send_json({"status": "shutting down"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return None
+        if url.path != "/jobs":
+            return self._send_json({"error": "not found"}, 404)
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+            specs = payload.get("jobs") if isinstance(payload, dict) and "jobs" in payload else payload
+            specs = specs if isinstance(specs, list) else [specs]
+            specs = [validate_spec(s, self.server.queue.output_dir) for s in specs]
+        except ValueError as exc:
+            return self._send_json({"error": str(exc)}, 400)
+        return self._send_json({"ids": [self.server.queue.submit(s) for s in specs]})
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/jobs/"):
+            return self._send_json({"error": "not found"}, 404)
+        return self._send_json({"cancelled": self.server.queue.cancel(url.path[len("/jobs/"):])})
+
+
+class SQDServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, queue: JobQueue, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verbose: bool = False):
+        self.queue = queue
+        self.verbose = verbose
+        super().__init__((host, port), _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 1, threads: Optional[int] = None,
+          cache_dir: Optional[str] = None, output_dir: Optional[str] = None, verbose: bool = True) -> None:
+    """Run the job service until POST /shutdown or Ctrl-C."""
+    t0 = time.perf_counter()
+    queue = JobQueue(workers, threads, cache_dir, output_dir=output_dir).start()
+    server = SQDServer(queue, host, port, verbose=verbose)
+    print(f"sqd service on {server.url}: {queue.workers} warm worker(s) x {queue.threads} thread(s), "
+          f"ready in {time.perf_counter() - t0:.1f} s", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        queue.close()
+
+
+# ---------------------------------------------------------------- client
+
+def _request(url: str, method: str = "GET", payload=None, timeout: Optional[float] = 30.0):
+    import urllib.request
+
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def submit_jobs(url: str, specs: List[Dict[str, Any]]) -> List[str]:
+    with _request(f"{url.rstrip('/')}/jobs", "POST", {"jobs": specs}) as resp:
+        return json.load(resp)["ids"]
+
+
+def stream_results(url: str, job_ids: List[str], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Final job snapshots from the service, in completion order."""
+    query = f"ids={','.join(job_ids)}" + (f"&timeout={timeout}" if timeout is not None else "")
+    with _request(f"{url.rstrip('/')}/results?{query}", timeout=None) as resp:
+        for line in resp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def health(url: str) -> Dict[str, Any]:
+    with _request(f"{url.rstrip('/')}/health", timeout=5.0) as resp:
+        return json.load(resp)
+
+
+def shutdown(url: str) -> None:
+    with _request(f"{url.rstrip('/')}/shutdown", "POST", {}, timeout=5.0):
+        pass
@@ -0,0 +1,323 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+import os
+import threading
+import time
+
+_state = threading.local()
+_lock = threading.Lock()
+_roots: List["Span"] = []
+_collecting = 0
+_memory = False
+
+
+class Span:
+    """One timed region: perf_counter_ns start/end, nested children, optional memory peaks."""
+
+    __slots__ = ("name", "attrs", "start_ns", "end_ns", "children",
+                 "mem_start", "mem_peak", "rss_bytes", "rss_hwm_bytes")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.children: List[Span] = []
+        self.mem_start = None
+        self.mem_peak = None
+        self.rss_bytes = None
+        self.rss_hwm_bytes = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def self_seconds(self) -> float:
+        return self.seconds - sum(c.seconds for c in self.children)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"name": self.name, "seconds": self.seconds}
+        if self.attrs:
+            out["attrs"] = dict(self.attrs)
+        if self.mem_peak is not None:
+            out["tracemalloc_peak_bytes"] = self.mem_peak - self.mem_start
+        if self.rss_bytes is not None:
+            out["rss_bytes"] = self.rss_bytes
+            out["rss_hwm_bytes"] = self.rss_hwm_bytes
+        if self.children:
+            out["children"] = [c.to_dict() for c in self.children]
+        return out
+
+
+def _stack() -> List[Span]:
+    st = getattr(_state, "stack", None)
+    if st is None:
+        st = _state.stack = []
+    return st
+
+
+def _rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _rss_hwm() -> Optional[int]:
+    try:
+        import resource
+        import sys
+    except ImportError:  # pragma: no cover
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def enable_memory(enabled: bool = True) -> None:
+    """
+    Track memory per span: the tracemalloc peak above the span's starting allocation,
+    plus current RSS and the process RSS high-water mark at span exit.
+    """
+    global _memory
+    import tracemalloc
+
+    _memory = enabled
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _attach(sp: Span, stack: List[Span]) -> None:
+    if stack:
+        stack[-1].children.append(sp)
+    else:
+        with _lock:
+            if _collecting:
+                _roots.append(sp)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a region (nested under the innermost open span of this thread)."""
+    stack = _stack()
+    sp = Span(name, attrs)
+    _attach(sp, stack)
+    if _memory:
+        import tracemalloc
+
+        cur, peak = tracemalloc.get_traced_memory()
+        if stack and stack[-1].mem_peak is not None:
+            stack[-1].mem_peak = max(stack[-1].mem_peak, peak)
+        tracemalloc.reset_peak()
+        sp.mem_start = sp.mem_peak = cur
+    stack.append(sp)
+    sp.start_ns = time.perf_counter_ns()
+    try:
+        yield sp
+    finally:
+        sp.end_ns = time.perf_counter_ns()
+        stack.pop()
+        if sp.mem_peak is not None:
+            import tracemalloc
+
+            sp.mem_peak = max(sp.mem_peak, tracemalloc.get_traced_memory()[1])
+            if stack and stack[-1].mem_peak is not None:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, sp.mem_peak)
+            tracemalloc.reset_peak()
+            sp.rss_bytes, sp.rss_hwm_bytes = _rss(), _rss_hwm()
+
+
+def traced(name: str):
+    """Decorator: run the function inside span(name)."""
+    import functools
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def current() -> Optional[Span]:
+    """Innermost open span of this thread, if any."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def attached(parent: Optional[Span]):
+    """Nest this thread's spans under `parent` (a span opened by another thread) for the block."""
+    if parent is None:
+        yield
+        return
+    stack = _stack()
+    stack.append(parent)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def annotate(**attrs) -> None:
+    """Attach attributes to the innermost open span (no-op outside any span)."""
+    sp = current()
+    if sp is not None:
+        sp.attrs.update(attrs)
+
+
+def record(name: str, start_ns: int, end_ns: int, **attrs) -> Span:
+    """Add an already-measured region as a child of the current span (no memory data)."""
+    sp = Span(name, attrs)
+    sp.start_ns, sp.end_ns = start_ns, end_ns
+    _attach(sp, _stack())
+    return sp
+
+
+@contextmanager
+def collect():
+    """
+    Keep the top-level span trees started inside the block for roots(). Outside any
+    collect() a finished tree is dropped (callers that want their own subtree read it
+    from current() while it is open), so long-lived processes do not accumulate spans.
+    """
+    global _collecting
+    with _lock:
+        _collecting += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _collecting -= 1
+
+
+def roots() -> List[Span]:
+    """Top-level spans kept by collect() since the last reset()."""
+    with _lock:
+        return list(_roots)
+
+
+def reset() -> None:
+    with _lock:
+        _roots.clear()
+
+
+def render(spans: List[Span], min_seconds: float = 0.0) -> str:
+    """Indented tree: total and self seconds, call count and memory, repeated siblings merged."""
+    lines = [f"{'span':<48} {'total s':>10} {'self s':>10} {'calls':>6} {'peak MiB':>9}"]
+
+    def walk(group: List[Span], depth: int):
+        merged: Dict[str, List[Span]] = {}
+        for sp in group:
+            merged.setdefault(sp.name, []).append(sp)
+        for name, same in merged.items():
+            total = sum(s.seconds for s in same)
+            if total < min_seconds:
+                continue
+            self_s = sum(s.self_seconds for s in same)
+            peaks = [s.mem_peak - s.mem_start for s in same if s.mem_peak is not None]
+            mem = f"{max(peaks) / 2**20:9.1f}" if peaks else f"{'':>9}"
+            label = ("  " * depth + name)[:48]
+            lines.append(f"{label:<48} {total:10.3f} {self_s:10.3f} {len(same):6d} {mem}")
+            walk([c for s in same for c in s.children], depth + 1)
+
+    walk(spans, 0)
+    return "\n".join(lines)
+
+
+def collapsed(spans: List[Span]) -> List[str]:
+    """Flame-graph folded stacks ('a;b;c <self microseconds>') from a span tree."""
+    acc: Dict[str, int] = {}
+
+    def walk(sp: Span, prefix: str):
+        path = f"{prefix};{sp.name}" if prefix else sp.name
+        acc[path] = acc.get(path, 0) + max(0, int(sp.self_seconds * 1e6))
+        for c in sp.children:
+            walk(c, path)
+
+    for sp in spans:
+        walk(sp, "")
+    return [f"{k} {v}" for k, v in acc.items() if v > 0]
+
+
+class StackSampler:
+    """
+    Background thread that samples the Python stacks of all other threads every
+    `interval` seconds and folds them into flame-graph lines ('thread;f1;f2 <microseconds>').
+    cProfile only keeps caller->callee edges, so full stacks come from sampling instead.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqd-stack-sampler", daemon=True)
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _run(self):
+        import sys
+
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                key = ";".join([names.get(ident, str(ident))] + stack[::-1])
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> List[str]:
+        us = int(self.interval * 1e6)
+        return [f"{k} {v * us}" for k, v in self.counts.items()]
+
+
+@contextmanager
+def profiled(prefix: Optional[str]):
+    """
+    With a path prefix, run the block under cProfile and a StackSampler and write
+    <prefix>.pstats, <prefix>.collapsed (sampled stacks) and <prefix>.spans.collapsed.
+    A None prefix is a no-op, so callers can wrap unconditionally.
+    """
+    if prefix is None:
+        yield
+        return
+    import cProfile
+
+    reset()
+    sampler = StackSampler().start()
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        with collect():
+            yield
+    finally:
+        prof.disable()
+        sampler.stop()
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        prof.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.collapsed", "w", encoding="utf-8") as fh:
+            fh.write("\n".join(sampler.collapsed()) + "\n")
+        with open(f"{prefix}.spans.collapsed", "w", encoding="utf-8") as fh:
+            fh.write("\n".join(collapsed(roots())) + "\n")
+        print("\n=== Spans ===")
+        print(render(roots()))
+        print(f"\nProfile written: {prefix}.pstats, {prefix}.collapsed, {prefix}.spans.collapsed")
@@ -0,0 +1,150 @@
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Irrep ids are PySCF's: for the Abelian groups (D2h and subgroups) the direct product of
+# two irreps is the XOR of their ids, and Dooh/Coov ids reduce to D2h/C2v ids mod 10.
+
+
+def string_irreps(strings, orbsym: Sequence[int]) -> np.ndarray:
+    """Irrep of each occupation string (int bitmask, bit p = orbital p): XOR of occupied orbital irreps."""
+    strings = np.asarray(strings, dtype=np.uint64)
+    out = np.zeros(strings.shape, dtype=np.int64)
+    for p, ir in enumerate(np.asarray(orbsym, dtype=np.int64) % 10):
+        if ir:
+            out[(strings >> np.uint64(p)) & np.uint64(1) == 1] ^= ir
+    return out
+
+
+def reference_irrep(orbsym: Sequence[int], nelec: Tuple[int, int]) -> int:
+    """Irrep of the aufbau (HF) determinant: lowest nelec[0] alpha and nelec[1] beta orbitals."""
+    orbsym = np.asarray(orbsym, dtype=np.int64) % 10
+    out = 0
+    for n in nelec:
+        for ir in orbsym[:n]:
+            out ^= int(ir)
+    return out
+
+
+_LINEAR_SUBGROUP = {"Dooh": "D2h", "Coov": "C2v"}
+
+
+def irrep_id(groupname: str, irrep: Union[int, str]) -> int:
+    """
+    XOR-able id of an irrep given by PySCF id or name; linear molecules accept both
+    their own names (e.g. 'A1g' in Dooh) and the D2h/C2v subgroup's (e.g. 'Ag').
+    """
+    if isinstance(irrep, str):
+        from pyscf import symm
+
+        try:
+            irrep = symm.irrep_name2id(groupname, irrep)
+        except symm.PointGroupSymmetryError:
+            if groupname not in _LINEAR_SUBGROUP:
+                raise
+            irrep = symm.irrep_name2id(_LINEAR_SUBGROUP[groupname], irrep)
+    return int(irrep) % 10
+
+
+def irrep_name(groupname: Optional[str], irrep: int) -> str:
+    """Name of an XOR-able irrep id (D2h/C2v subgroup names for linear molecules)."""
+    if not groupname:
+        return str(irrep)
+    from pyscf import symm
+
+    return symm.irrep_id2name(_LINEAR_SUBGROUP.get(groupname, groupname), int(irrep))
+
+
+def prune_strings(strs_a, strs_b, orbsym: Sequence[int], target: int):
+    """
+    Drop alpha (beta) strings that pair with no beta (alpha) string into a `target`-irrep
+    determinant. The ground state of that irrep has no weight on the dropped products, so
+    the eigensolve is unchanged while the product space shrinks.
+    Returns (kept alpha, kept beta, number of target-irrep determinants).
+    """
+    strs_a, strs_b = np.asarray(strs_a), np.asarray(strs_b)
+    ir_a, ir_b = string_irreps(strs_a, orbsym), string_irreps(strs_b, orbsym)
+    keep_a = np.isin(ir_a ^ target, ir_b)
+    keep_b = np.isin(ir_b ^ target, ir_a[keep_a])
+    count_b = np.bincount(ir_b[keep_b], minlength=8)
+    n_symm = int(sum(count_b[ir ^ target] for ir in ir_a[keep_a]))
+    return strs_a[keep_a], strs_b[keep_b], n_symm
+
+
+def solve_sci_symm(ci_strings, one_body_tensor, two_body_tensor, norb: int, nelec: Tuple[int, int],
+                   *, orbsym: Sequence[int], target: int, spin_sq: Optional[float] = None, **kwargs):
+    """
+    qiskit_addon_sqd.fermion.solve_sci with PySCF's symmetry-adapted selected CI: the
+    initial guess lies in the `target` irrep and contract_2e skips symmetry-forbidden
+    integral blocks, so the Davidson iterations stay in that irrep.
+    """
+    from pyscf import fci
+    from pyscf.fci import selected_ci_symm
+    from qiskit_addon_sqd.fermion import SCIResult, SCIState
+
+    myci = selected_ci_symm.SelectedCI()
+    myci.orbsym = np.asarray(orbsym, dtype=np.int64) % 10
+    myci.wfnsym = int(target)
+    if spin_sq is not None:
+        myci = fci.addons.fix_spin_(myci, ss=spin_sq)
+    _, sci_vec = fci.selected_ci.kernel_fixed_space(
+        myci, one_body_tensor, two_body_tensor, norb, nelec, ci_strs=ci_strings, **kwargs
+    )
+    dm1s = myci.make_rdm1s(sci_vec, norb, nelec)
+    dm1 = myci.make_rdm1(sci_vec, norb, nelec)
+    dm2 = myci.make_rdm2(sci_vec, norb, nelec)
+    energy = np.einsum("pr,pr->", dm1, one_body_tensor) + 0.5 * np.einsum("prqs,prqs->", dm2, two_body_tensor)
+    state = SCIState(amplitudes=np.array(sci_vec), ci_strs_a=sci_vec._strs[0], ci_strs_b=sci_vec._strs[1],
+                     norb=norb, nelec=nelec)
+    return SCIResult(energy, state, orbital_occupancies=(np.diagonal(dm1s[0]), np.diagonal(dm1s[1])),
+                     rdm1=dm1, rdm2=dm2)
+
+
+def _skipped_result(strs_a, strs_b, norb: int, nelec: Tuple[int, int]):
+    """Placeholder for a batch with no target-irrep determinant: energy +inf, so it is never the best."""
+    from qiskit_addon_sqd.fermion import SCIResult, SCIState
+
+    state = SCIState(amplitudes=np.zeros((1, 1)), ci_strs_a=np.asarray(strs_a[:1]), ci_strs_b=np.asarray(strs_b[:1]),
+                     norb=norb, nelec=nelec)
+    return SCIResult(np.inf, state, orbital_occupancies=(np.zeros(norb), np.zeros(norb)))
+
+
+class SymmetrySolver:
+    """
+    sci_solver for diagonalize_fermionic_hamiltonian: prunes each batch's strings to
+    the target irrep (prune_strings) and solves with solve_sci_symm. .last holds the
+    (product dim, pruned product dim, target-irrep dim) of each batch of the latest call.
+    A batch with no target-irrep determinant is skipped (an energy +inf result), since
+    solving it without symmetry would return a state of another irrep; ValueError if
+    every batch of a call is skipped.
+    """
+
+    def __init__(self, orbsym: Sequence[int], target: int):
+        self.orbsym = np.asarray(orbsym, dtype=np.int64) % 10
+        self.target = int(target)
+        self.last: List[Tuple[int, int, int]] = []
+
+    def __call__(self, ci_strings, one_body_tensor, two_body_tensor, norb, nelec, **kwargs):
+        out, self.last = [], []
+        for strs_a, strs_b in ci_strings:
+            kept_a, kept_b, n_symm = prune_strings(strs_a, strs_b, self.orbsym, self.target)
+            self.last.append((len(strs_a) * len(strs_b), len(kept_a) * len(kept_b), n_symm))
+            if not n_symm:
+                out.append(_skipped_result(strs_a, strs_b, norb, nelec))
+                continue
+            out.append(solve_sci_symm((kept_a, kept_b), one_body_tensor, two_body_tensor, norb, nelec,
+                                      orbsym=self.orbsym, target=self.target, **kwargs))
+        if not any(n_symm for _, _, n_symm in self.last):
+            raise ValueError(f"no batch holds a determinant of irrep {self.target}; "
+                             "sample more configurations or choose another target_irrep")
+        return out
+
+
+def summarize(history: List[Tuple[int, int, int]]) -> Dict[str, Any]:
+    """Last-iteration subspace sizes and the fraction kept by symmetry."""
+    if not history:
+        return {}
+    product, pruned, symm = history[-1]
+    return {"product_dim": product, "pruned_dim": pruned, "symmetry_dim": symm,
+            "kept_fraction": symm / product if product else 1.0}
@@ -1,8 +1,12 @@
 import numpy as np
+import pytest
 
 from sqd.active_space import (
     choose_active_window,
     slice_t2_active_from_full,
+    mp2_occupations,
+    select_active_orbitals,
+    slice_t2_active,
 )
 
 
@@ -45,3 +49,31 @@ def test_slice_t2_returns_none_when_not_feasible():
 
     t2_act = slice_t2_active_from_full(t2_full, ncore=ncore, ncas=ncas)
     assert t2_act is None
+
+
+def test_select_active_orbitals_non_contiguous_with_budget():
+    # 3 doubly occupied + 4 virtual orbitals; orbitals 1 and 5 carry most correlation
+    occ = np.array([1.999, 1.95, 1.985, 0.002, 0.012, 0.04, 0.001])
+    active, nelecas = select_active_orbitals(occ, (3, 3), threshold=0.01)
+    assert active == [1, 2, 4, 5]
+    assert nelecas == (2, 2)  # orbital 0 becomes core
+
+    active, nelecas = select_active_orbitals(occ, (3, 3), threshold=0.01, max_orbitals=2)
+    assert active == [1, 5] and nelecas == (1, 1)
+
+
+def test_slice_t2_active_by_index():
+    t2_full = np.arange(3 * 3 * 4 * 4, dtype=float).reshape(3, 3, 4, 4)
+    t2_act = slice_t2_active(t2_full, [1, 2, 4, 6])  # occ 1, 2; vir 4, 6 -> 1, 3
+    assert t2_act.shape == (2, 2, 2, 2)
+    assert t2_act[1, 0, 0, 1] == t2_full[2, 1, 1, 3]
+    assert slice_t2_active(t2_full, [0, 1]) is None
+
+
+def test_mp2_occupations_match_pyscf():
+    pyscf = pytest.importorskip("pyscf")
+    from pyscf import gto, scf, mp
+
+    mf = scf.RHF(gto.M(atom="Li 0 0 0; H 0 0 1.6", basis="sto-3g", verbose=0)).run()
+    pt = mp.MP2(mf).run()
+    assert np.allclose(mp2_occupations(pt.t2), np.diag(pt.make_rdm1()), atol=1e-10)
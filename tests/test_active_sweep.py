@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_aer")
+
+from sqd.active_sweep import run_active_space_sweep
+
+
+def test_lih_sweep_one_row_per_size():
+    rows = run_active_space_sweep("Li 0 0 0; H 0 0 1.6", sizes=(2, 4, 99), selection="mp2", shots=1_000,
+                                  samples_per_batch=20, max_iterations=1)
+    assert [r["ncas"] for r in rows] == [2, 4, 6]  # 99 is clipped to the 6 LiH orbitals
+    assert rows[0]["orbitals"] == [1, 5]  # MP2 picks the strongly correlating virtual, not the LUMO
+    full = rows[-1]
+    assert full["e_casci"] == pytest.approx(full["e_sqd"] - full["sqd_vs_casci_mha"] * 1e-3)
+    assert all(r["error_mha"] > -1e-6 for r in rows)  # variational: never below FCI
@@ -6,6 +6,9 @@ from sqd.ansatz import (
     build_ucj,
     build_lucj_proxy,
     build_he,
+    local_t2,
+    build_he_parametric,
+    he_angles,
 )
 
 
@@ -54,3 +57,20 @@ def test_build_he_qubits_and_size():
     qc = build_he(norb, nelec, layers=2, seed=7)
     assert qc.num_qubits == 2 * norb
     assert qc.size() > 0  # HF + HE layers
+
+
+def test_local_t2_keeps_only_windowed_doubles():
+    t2 = np.ones((3, 3, 4, 4))
+    loc = local_t2(t2, k_occ=0, k_vir=1)
+    i, j, a, b = np.nonzero(loc)
+    assert np.all(i == j) and np.all(np.abs(a - b) <= 1)
+    assert np.array_equal(local_t2(t2, k_occ=2, k_vir=3), t2)
+
+
+def test_parametric_he_binds_to_seeded_he():
+    qc = build_he(3, (1, 1), layers=2, seed=11)
+    drawn = [float(inst.operation.params[0]) for inst in qc.data if inst.operation.name == "ry"]
+    assert np.allclose(drawn, he_angles(3, layers=2, seed=11))
+
+    pqc, theta = build_he_parametric(3, (1, 1), layers=2)
+    assert len(theta) == 12 and pqc.num_parameters == 12
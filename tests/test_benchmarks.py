@@ -0,0 +1,33 @@
+import pytest
+
+from sqd import benchmarks
+
+
+def _run(**medians):
+    return {"benchmarks": {k: benchmarks.summarize([v, v, v]) for k, v in medians.items()}}
+
+
+def test_summarize_median_iqr():
+    stats = benchmarks.summarize([0.5, 0.1, 0.3, 0.2, 0.4])
+    assert stats["median"] == pytest.approx(0.3)
+    assert stats["q1"] == pytest.approx(0.2) and stats["q3"] == pytest.approx(0.4)
+    assert stats["iqr"] == pytest.approx(0.2)
+    assert stats["min"] == pytest.approx(0.1) and stats["n"] == 5
+
+
+def test_compare_flags_only_real_regressions():
+    base = _run(a=0.100, b=0.100, tiny=0.0001, gone=0.1)
+    cur = _run(a=0.150, b=0.110, tiny=0.0005, new=0.1)
+    rows, regressed = benchmarks.compare(base, cur, threshold=0.2)
+    assert regressed == ["a"]  # b is within threshold, tiny is below the 1 ms floor
+    status = {r[0]: r[-1] for r in rows}
+    assert status == {"a": "REGRESSED", "b": "ok", "tiny": "ok", "gone": "missing", "new": "new"}
+
+
+def test_toy_stages_roundtrip_baseline(tmp_path):
+    current = benchmarks.run_benchmarks("toy/ingest,toy/ansatz_he", molecules=(), repeat=2, verbose=False)
+    assert set(current["benchmarks"]) == {"toy/ingest", "toy/ansatz_he"}
+    path = tmp_path / "perf.json"
+    benchmarks.save_baseline(path, current)
+    _, regressed = benchmarks.compare(benchmarks.load_baseline(path), current)
+    assert regressed == []
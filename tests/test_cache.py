@@ -0,0 +1,77 @@
+import os
+import time
+
+import numpy as np
+
+from sqd.cache import IntegralCache, cache_key, normalize_geometry
+
+
+def test_normalize_geometry_ignores_formatting():
+    a = normalize_geometry("Li 0 0 0; H 0 0 1.6")
+    b = normalize_geometry("li 0.0 0.0 0.0\nH  0 0 1.60000;")
+    assert a == b
+
+
+def test_cache_key_depends_on_inputs():
+    k = cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "scf")
+    assert k == cache_key("H 0 0 0; H 0 0 0.740", "STO-3G", "scf")
+    assert k != cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "ccsd")
+    assert k != cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "scf", charge=1, spin=1)
+    w1 = cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "casci_active", window=[0, 2, [1, 1]])
+    w2 = cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "casci_active", window=[0, 1, [1, 1]])
+    assert w1 != w2
+
+
+def test_put_get_roundtrip_is_memory_mapped(tmp_path):
+    cache = IntegralCache(tmp_path)
+    h2 = np.arange(16.0).reshape(2, 2, 2, 2)
+    cache.put("ab" * 32, {"h2": h2, "e_core": 1.5, "dets": None})
+
+    out = cache.get("ab" * 32)
+    assert out is not None
+    assert isinstance(out["h2"], np.memmap)
+    np.testing.assert_array_equal(out["h2"], h2)
+    assert out["e_core"] == 1.5 and out["dets"] is None
+    assert cache.get("cd" * 32) is None
+
+
+def test_lru_eviction_respects_size_bound(tmp_path):
+    big = np.zeros(1024)  # 8 KiB + header per bundle
+    cache = IntegralCache(tmp_path, max_bytes=20_000)
+    cache.put("aa" * 32, {"x": big})
+    cache.put("bb" * 32, {"x": big})
+    cache.get("aa" * 32)  # touch: "bb" becomes least recently used
+    stale = time.time() - 60
+    os.utime(tmp_path / "bb" / ("bb" * 32) / "meta.json", (stale, stale))
+    cache.put("cc" * 32, {"x": big})
+
+    assert cache.get("bb" * 32) is None
+    assert cache.get("aa" * 32) is not None
+    assert cache.get("cc" * 32) is not None
+    assert cache.size_bytes() <= 20_000
+
+
+def test_cache_key_tracks_parent_scf():
+    k = cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "ccsd", parent="a")
+    assert k != cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "ccsd", parent="b")
+    assert k != cache_key("H 0 0 0; H 0 0 0.74", "sto-3g", "ccsd")
+
+
+def test_dependent_stages_miss_after_scf_recompute(tmp_path):
+    import pytest
+
+    pytest.importorskip("pyscf")
+    from sqd.compare import CachedChemistry
+
+    geom = "H 0 0 0; H 0 0 0.74"
+    cache = IntegralCache(tmp_path)
+    CachedChemistry(geom, "sto-3g", cache=cache, verbose=False).ccsd()
+    assert CachedChemistry(geom, "sto-3g", cache=cache, verbose=False).ccsd()[1] == 0.0
+
+    # an SCF bundle replaced by a solution with flipped MO phases (e.g. after eviction)
+    scf_key = cache_key(geom, "sto-3g", "scf")
+    scf = cache.get(scf_key)
+    cache.put(scf_key, {**{k: np.array(v) for k, v in scf.items() if isinstance(v, np.ndarray)},
+                        "mo_coeff": -np.array(scf["mo_coeff"]), "e_tot": scf["e_tot"], "nelec": scf["nelec"]})
+    _, dt = CachedChemistry(geom, "sto-3g", cache=cache, verbose=False).ccsd()
+    assert dt > 0.0  # the old t2 was not paired with the new orbitals
@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_aer")
+
+from sqd import checkpoint as ckpt_mod
+from sqd.checkpoint import CheckpointMismatch, read_bundle, write_bundle
+from sqd.compare import run_sqd_benchmark
+from sqd.runner import SamplerSession
+
+LIH = "Li 0 0 0; H 0 0 1.6"
+
+
+def test_bundle_round_trip_keeps_nested_arrays(tmp_path):
+    import numpy as np
+
+    obj = {"e": np.float64(-1.5), "occ": (np.arange(3.0), np.ones(2)), "meta": {"words": np.zeros((2, 1), np.uint64)}}
+    write_bundle(tmp_path / "b", obj)
+    write_bundle(tmp_path / "b", {**obj, "e": -2.0})  # replaced in place
+    back = read_bundle(tmp_path / "b")
+    assert back["e"] == -2.0 and back["meta"]["words"].dtype == np.uint64
+    assert np.array_equal(back["occ"][0], np.arange(3.0))
+    assert read_bundle(tmp_path / "missing") is None
+
+
+def test_resume_skips_finished_jobs_and_continues_iterations(tmp_path, monkeypatch):
+    kwargs = dict(ansatz="he", shots=5_000, samples_per_batch=30, max_iterations=3, verbose=False, render=False,
+                  checkpoint_dir=str(tmp_path / "ck"))
+    save = ckpt_mod.JobCheckpoint.save_iteration
+    seen = {}
+
+    class Preempted(Exception):
+        pass
+
+    def crash_after_second_iteration(self, state):
+        save(self, state)
+        if self.root.name == "active-he" and state["iterations"] == 2:
+            seen["history"] = list(state["energy_history"])
+            raise Preempted
+
+    monkeypatch.setattr(ckpt_mod.JobCheckpoint, "save_iteration", crash_after_second_iteration)
+    with pytest.raises(Preempted):
+        run_sqd_benchmark(LIH, "sto-3g", session=SamplerSession(seed=1), **kwargs)
+    monkeypatch.setattr(ckpt_mod.JobCheckpoint, "save_iteration", save)
+
+    with pytest.raises(CheckpointMismatch):
+        run_sqd_benchmark(LIH, "sto-3g", resume=True, **{**kwargs, "shots": 6_000})
+
+    res = run_sqd_benchmark(LIH, "sto-3g", resume=True, **kwargs)
+    assert res["checkpoint"] == {"dir": str(tmp_path / "ck"), "resumed": True, "done": 1, "sampled": 1}
+    assert res["timings"]["SCF"] == 0.0  # chemistry came from the checkpoint
+    active = res["sqd"]["he"]["active"]["stages"]
+    assert active["energy_history"][:2] == pytest.approx(seen["history"])
+    assert active["iterations"] == 3
+    assert res["sqd"]["he"]["active"]["energy"] <= min(seen["history"]) + 1e-10
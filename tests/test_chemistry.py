@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyscf")
+from pyscf import ao2mo
+
+from sqd.chemistry import expand_h2, iter_h2_blocks
+
+
+def _random_packed_h2(norb: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    npair = norb * (norb + 1) // 2
+    return rng.normal(size=npair * (npair + 1) // 2)  # 8-fold packed
+
+
+def test_expand_h2_matches_dense_restore():
+    norb = 5
+    h2 = _random_packed_h2(norb)
+    dense = ao2mo.restore(1, h2, norb)
+    np.testing.assert_allclose(expand_h2(h2, norb), dense)
+    # dense input passes straight through
+    assert expand_h2(dense, norb) is dense
+
+
+def test_iter_h2_blocks_covers_tensor():
+    norb = 5
+    h2 = _random_packed_h2(norb, seed=1)
+    dense = ao2mo.restore(1, h2, norb)
+    blocks = list(iter_h2_blocks(h2, norb, block=2))
+    assert [(p0, p1) for p0, p1, _ in blocks] == [(0, 2), (2, 4), (4, 5)]
+    np.testing.assert_allclose(np.concatenate([b for _, _, b in blocks]), dense)
+
+
+def test_expand_h2_memory_mapped(tmp_path):
+    norb = 4
+    h2 = _random_packed_h2(norb, seed=2)
+    path = tmp_path / "h2.npy"
+    out = expand_h2(h2, norb, mmap_path=str(path))
+    assert isinstance(out, np.memmap)
+    np.testing.assert_allclose(out, ao2mo.restore(1, h2, norb))
+    np.testing.assert_allclose(expand_h2(str(path), norb), out)
+
+
+def test_chemistry_context_matches_standalone_helpers():
+    from sqd.chemistry import (
+        ChemistryContext,
+        casci_integrals_full,
+        ccsd_energy_and_t2,
+        mp2_energy,
+        rhf_build,
+    )
+
+    mol, mf = rhf_build("Li 0 0 0; H 0 0 1.6", "sto-3g")
+    norb = mf.mo_coeff.shape[1]
+    ctx = ChemistryContext(mf)
+
+    assert ctx.mp2_energy() == pytest.approx(mp2_energy(mf), abs=1e-7)
+    e_cc, t2 = ctx.ccsd()
+    e_ref, t2_ref = ccsd_energy_and_t2(mf)
+    assert e_cc == pytest.approx(e_ref, abs=1e-8)
+    np.testing.assert_allclose(t2, t2_ref, atol=1e-7)
+
+    h1, h2, e_core, e_cas = casci_integrals_full(mf, norb, mol.nelec)
+    h1_ctx, h2_ctx, e_core_ctx = ctx.integrals()
+    np.testing.assert_allclose(h1_ctx, h1, atol=1e-10)
+    np.testing.assert_allclose(expand_h2(h2_ctx, norb), expand_h2(h2, norb), atol=1e-10)
+    assert e_core_ctx == pytest.approx(e_core)
+    assert ctx.full_ci() == pytest.approx(e_cas, abs=1e-8)
+
+    assert {"ao2mo", "mp2", "ccsd", "ci_full"} <= set(ctx.timings)
+
+
+def test_context_casci_non_contiguous_orbitals():
+    from sqd.chemistry import rhf_build, ChemistryContext, casci_integrals_active
+
+    _, mf = rhf_build("Li 0 0 0; H 0 0 1.6", "sto-3g", verbose=0)
+    ctx = ChemistryContext(mf)
+    ref = casci_integrals_active(mf, 1, 4, (1, 1))
+    assert ctx.casci([1, 2, 3, 4], (1, 1))[3] == pytest.approx(ref[3], abs=1e-9)
+    # non-contiguous: skipping virtuals 3-4 for the strongly correlating orbital 5 beats the window
+    assert ctx.casci([1, 2, 5], (1, 1))[3] < ref[3]
+
+
+def test_fold_core_matches_pyscf_casci():
+    from sqd.chemistry import rhf_build, ChemistryContext, casci_integrals_active, fold_core
+
+    _, mf = rhf_build("O 0 0 0; H 0 0.757 0.587; H 0 -0.757 0.587", "sto-3g", verbose=0)
+    ctx = ChemistryContext(mf)
+    h1, h2, e_nuc = ctx.integrals()
+    ref = casci_integrals_active(mf, 2, 4, (3, 3))
+    got = fold_core(h1, h2, e_nuc, ctx.norb, [0, 1], [2, 3, 4, 5])
+    np.testing.assert_allclose(got[0], ref[0], atol=1e-10)
+    np.testing.assert_allclose(ao2mo.restore(1, got[1], 4), ao2mo.restore(1, ref[1], 4), atol=1e-10)
+    assert got[2] == pytest.approx(ref[2], abs=1e-10)
+    assert ctx.casci(range(2, 6), (3, 3))[3] == pytest.approx(ref[3], abs=1e-9)
+    assert ctx.casci(range(1, 7), (4, 4), max_dets=10)[3] is None  # 225 determinants: reference skipped
+
+
+def test_iter_h2_blocks_formats_agree():
+    norb = 4
+    h2 = _random_packed_h2(norb, seed=3)
+    dense = ao2mo.restore(1, h2, norb)
+    for fmt in (ao2mo.restore(4, h2, norb), dense):
+        np.testing.assert_allclose(np.concatenate([b for _, _, b in iter_h2_blocks(fmt, norb, block=3)]), dense)
+
+
+def test_iter_h2_blocks_never_builds_four_fold():
+    import tracemalloc
+
+    norb = 40
+    h2 = _random_packed_h2(norb, seed=4)
+    npair = norb * (norb + 1) // 2
+    blocks = iter_h2_blocks(h2, norb, block=1)
+    tracemalloc.start()
+    try:
+        _, _, first = next(blocks)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert first.shape == (1, norb, norb, norb)
+    assert peak < 8 * npair * npair / 2  # the 4-fold matrix alone would be 8 * npair^2 bytes
+
+
+def test_eri_block_gathers_from_any_format():
+    from sqd.chemistry import eri_block
+
+    norb = 5
+    h2 = _random_packed_h2(norb, seed=5)
+    dense = ao2mo.restore(1, h2, norb)
+    idx = ([4, 0], [1, 3, 2], [0], [2, 4])
+    want = dense[np.ix_(*idx)]
+    for fmt in (h2, ao2mo.restore(4, h2, norb), dense):
+        np.testing.assert_allclose(eri_block(fmt, *idx), want)
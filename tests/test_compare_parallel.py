@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_aer")
+
+from sqd.compare import run_sqd_benchmark
+from sqd.runner import SamplerSession
+
+H2 = "H 0 0 0; H 0 0 0.74"
+
+
+def test_parallel_workers_match_serial_structure():
+    kwargs = dict(ansatz="hf", shots=200, samples_per_batch=5, max_iterations=1, verbose=False)
+    serial = run_sqd_benchmark(H2, "sto-3g", workers=1, **kwargs)
+    parallel = run_sqd_benchmark(H2, "sto-3g", workers=2, **kwargs)
+
+    assert list(parallel["sqd"]) == list(serial["sqd"]) == ["hf"]
+    for space in ("full", "active"):
+        # HF circuit is deterministic: every shot is the HF determinant
+        assert parallel["sqd"]["hf"][space]["energy"] == pytest.approx(
+            serial["sqd"]["hf"][space]["energy"], abs=1e-10
+        )
+        assert set(parallel["sqd"]["hf"][space]["stages"]) >= {"transpile", "simulate", "diag"}
+
+
+def test_batched_sampling_matches_per_job_sampling():
+    kwargs = dict(ansatz="all", shots=1_000, samples_per_batch=5, max_iterations=1, verbose=False, render=False)
+    # seeded: with a few hundred unseeded shots the HE circuits occasionally yield no valid string
+    batched = run_sqd_benchmark(H2, "sto-3g", session=SamplerSession(seed=11), **kwargs)
+    single = run_sqd_benchmark(H2, "sto-3g", batch_sampling=False, session=SamplerSession(seed=11), **kwargs)
+
+    stages = batched["sqd"]["hf"]["full"]["stages"]
+    assert stages["batched_circuits"] == 8 and stages["shots"] == 1_000
+    assert "batched_circuits" not in single["sqd"]["hf"]["full"]["stages"]
+    for space in ("full", "active"):
+        assert batched["sqd"]["hf"][space]["energy"] == pytest.approx(
+            single["sqd"]["hf"][space]["energy"], abs=1e-10
+        )
+
+
+def test_pipelined_benchmark_matches_sequential():
+    kwargs = dict(ansatz="all", shots=1_000, samples_per_batch=5, max_iterations=1, verbose=False, render=False)
+    sequential = run_sqd_benchmark(H2, "sto-3g", batch_sampling=False, session=SamplerSession(seed=11), **kwargs)
+    pipelined = run_sqd_benchmark(H2, "sto-3g", pipeline=True, session=SamplerSession(seed=11), **kwargs)
+
+    assert pipelined["timings"]["SQD_pipeline"]["wall"] > 0
+    for a in ("ucj", "lucj", "he", "hf"):
+        for space in ("full", "active"):
+            got, want = pipelined["sqd"][a][space], sequential["sqd"][a][space]
+            assert got["energy"] == pytest.approx(want["energy"], abs=1e-10)
+            assert got["stages"]["shots"] == 1_000
+
+
+def test_h2_mmap_dir_is_private_per_run_and_cleaned(tmp_path):
+    kwargs = dict(ansatz="hf", shots=200, samples_per_batch=5, max_iterations=1, verbose=False, render=False)
+    plain = run_sqd_benchmark(H2, "sto-3g", **kwargs)
+    (tmp_path / "h2_full.npy").write_bytes(b"not an array")  # a stale/foreign file is never touched
+    mapped = run_sqd_benchmark(H2, "sto-3g", h2_mmap_dir=str(tmp_path), **kwargs)
+    for space in ("full", "active"):
+        assert mapped["sqd"]["hf"][space]["energy"] == pytest.approx(plain["sqd"]["hf"][space]["energy"], abs=1e-10)
+    assert [p.name for p in tmp_path.iterdir()] == ["h2_full.npy"]
+
+
+def test_batched_sampling_caps_parallel_experiments_to_budget(monkeypatch):
+    import sqd.jobs as jobs
+
+    calls = []
+
+    def recording(circuits, shots, session=None, **kw):
+        calls.append(kw["max_parallel"])
+        return real(circuits, shots, session, **kw)
+
+    real = jobs.sample_circuits
+    monkeypatch.setattr(jobs, "sample_circuits", recording)
+    kwargs = dict(ansatz="hf", shots=200, samples_per_batch=5, max_iterations=1, verbose=False, render=False)
+    budget = 5_000
+    out = run_sqd_benchmark(H2, "sto-3g", mem_budget_gb=budget / 1024**3, **kwargs)
+    peak = max(row["plan"]["peak_bytes"] for row in out["preflight"]["rows"])
+    assert calls == [budget // peak] and calls[0] >= 1
+
+    calls.clear()
+    run_sqd_benchmark(H2, "sto-3g", **kwargs)
+    assert calls == [0]  # no budget: Aer picks the parallelism
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_aer")
+
+from sqd.lucj_sweep import run_lucj_sweep, pareto_frontier, cheapest_within
+
+
+def test_frontier_and_cheapest_window():
+    rows = [
+        {"k_occ": 0, "two_qubit_gates": 100, "error_mha": 3.0},
+        {"k_occ": 1, "two_qubit_gates": 200, "error_mha": 1.0},
+        {"k_occ": 2, "two_qubit_gates": 250, "error_mha": -2.0},  # dominated by k_occ=1
+        {"k_occ": 3, "two_qubit_gates": 300, "error_mha": 0.1},
+    ]
+    assert [r["k_occ"] for r in pareto_frontier(rows)] == [0, 1, 3]
+    assert cheapest_within(rows, 1.6)["k_occ"] == 1
+    assert cheapest_within(rows, 0.01) is None
+
+
+def test_lih_sweep_shares_identical_windows():
+    out = run_lucj_sweep("Li 0 0 0; H 0 0 1.6", k_occ=(0, 1, 5), k_vir=(0,), shots=2_000,
+                         samples_per_batch=20, max_iterations=1, seed=3, tolerance_mha=None)
+    rows = {(r["k_occ"], r["k_vir"]): r for r in out["rows"]}
+    assert len(rows) == 3
+    # LiH has 2 occupied orbitals: k_occ=5 keeps the same doubles as k_occ=1
+    assert rows[(5, 0)]["shared_with"] == (1, 0) and rows[(5, 0)]["energy"] == rows[(1, 0)]["energy"]
+    assert rows[(0, 0)]["two_qubit_gates"] < rows[(1, 0)]["two_qubit_gates"]
+    assert out["frontier"] and out["reference"]["name"] == "FCI"
+
+
+def test_sweep_prints_nothing_without_render(capsys):
+    run_lucj_sweep("H 0 0 0; H 0 0 0.74", k_occ=(0,), k_vir=(0,), shots=500, samples_per_batch=5,
+                   max_iterations=1, tolerance_mha=None, render=False)
+    assert capsys.readouterr().out == ""
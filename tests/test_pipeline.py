@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+from sqd.pipeline import run_pipeline
+
+
+def test_pipeline_keeps_order_and_bounds_queue():
+    alive, peak, lock = [0], [0], threading.Lock()
+
+    def produce(i):
+        with lock:
+            alive[0] += 1
+            peak[0] = max(peak[0], alive[0])
+        return i * i
+
+    def consume(i, sq):
+        time.sleep(0.01)
+        with lock:
+            alive[0] -= 1
+        return (i, sq)
+
+    out, t = run_pipeline(range(8), produce, consume, depth=1)
+    assert out == [(i, i * i) for i in range(8)]
+    assert peak[0] <= 3  # queued + being produced + being consumed
+    assert t["wall"] > 0 and t["consume"] >= 0.08
+
+
+def test_pipeline_reraises_producer_and_consumer_errors():
+    def bad_produce(i):
+        if i == 2:
+            raise RuntimeError("sampling failed")
+        return i
+
+    with pytest.raises(RuntimeError, match="sampling failed"):
+        run_pipeline(range(5), bad_produce, lambda i, x: x)
+
+    produced = []
+
+    def produce(i):
+        produced.append(i)
+        return i
+
+    def bad_consume(i, x):
+        raise KeyError(i)
+
+    with pytest.raises(KeyError):
+        run_pipeline(range(100), produce, bad_consume, depth=2)
+    assert len(produced) < 100
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("qiskit_aer")
+pytest.importorskip("qiskit_addon_sqd")
+
+from sqd.active_space import choose_active_window
+from sqd.ansatz import build_he
+from sqd.preflight import (
+    PreflightError, estimate_job, plan_simulation, backend_options, fit_active,
+)
+from sqd.runner import run_sqd_once, SamplerSession
+
+
+def test_plan_falls_back_double_single_mps_then_refuses():
+    est = estimate_job(13, (5, 5), shots=1000, samples_per_batch=100)
+    fixed = est["h2_dense_bytes"] + est["sci_bytes"] + est["sample_bytes"]
+    assert plan_simulation(est, est["statevector_bytes"] + fixed)["precision"] == "double"
+    single = plan_simulation(est, est["statevector_single_bytes"] + fixed)
+    assert (single["method"], single["precision"]) == ("statevector", "single")
+    mps = plan_simulation(est, 2**28)
+    assert mps["method"] == "matrix_product_state" and not mps["exact"]
+    assert mps["peak_bytes"] <= 2**28
+    assert plan_simulation(est, 2**25, backend="ffsim")["backend"] == "ffsim"
+    with pytest.raises(PreflightError):
+        plan_simulation(est, fixed)
+    with pytest.raises(PreflightError):
+        plan_simulation(est, 2**28, allow_mps=False)
+
+
+def test_fit_active_downsizes_or_refuses():
+    def window(n):
+        ncore, ncas, nelecas = choose_active_window(13, (5, 5), n)
+        return list(range(ncore, ncore + ncas)), nelecas
+
+    budget = 2**22
+    orbitals, nelecas, downsized_from = fit_active(window, 12, budget, shots=1000, samples_per_batch=100)
+    assert downsized_from == 12 and 0 < len(orbitals) < 12
+    assert fit_active(window, len(orbitals), budget, shots=1000, samples_per_batch=100)[2] is None
+    with pytest.raises(PreflightError):
+        fit_active(window, 12, budget, oversize="refuse", shots=1000, samples_per_batch=100)
+
+
+def test_run_sqd_once_uses_planned_precision():
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb,) * 4)
+    qc = build_he(norb, nelec, layers=1, seed=123)
+    qc.measure_all()
+    est = estimate_job(norb, nelec, shots=2000, samples_per_batch=20)
+    budget = est["statevector_single_bytes"] + est["h2_dense_bytes"] + est["sci_bytes"] + est["sample_bytes"]
+    session = SamplerSession(seed=3)
+    e, info = run_sqd_once(h1, h2, 0.0, norb, nelec, qc, shots=2000, samples_per_batch=20,
+                           max_iterations=2, verbose=False, session=session, mem_budget=budget)
+    assert info["preflight"]["plan"]["precision"] == "single"
+    assert info["preflight"]["depth"] > 0
+    assert session.variant(**backend_options(info["preflight"]["plan"])).backend.options.precision == "single"
+    assert np.isclose(e, 1.0)
+
+
+def test_mps_variant_samples():
+    qc = build_he(2, (1, 1), layers=1, seed=123)
+    qc.measure_all()
+    est = estimate_job(2, (1, 1), shots=500, samples_per_batch=20)
+    plan = {**plan_simulation(est, 2**30), "method": "matrix_product_state", "max_bond_dimension": 4}
+    session = SamplerSession(seed=1).variant(**backend_options(plan))
+    tqc, _ = session.transpile(qc)
+    assert session.sample([tqc], 500)[0].num_shots == 500
+
+
+def test_preflight_transpiles_wide_jobs_for_the_planned_method():
+    pytest.importorskip("pyscf")
+    from sqd.data import get_case
+    from sqd.preflight import preflight_molecule
+
+    # CO2/sto-3g full space is 30 qubits: past Aer's statevector target on small machines,
+    # so it must be planned (matrix_product_state) before it is transpiled
+    rows = {r["job"]: r for r in preflight_molecule(get_case("CO2")["geom"], ansatz="he", n_act_orb=8,
+                                                    budget_bytes=2**31)}
+    full = rows["full/he"]
+    assert full["qubits"] == 30 and full["plan"]["method"] == "matrix_product_state"
+    assert full["two_qubit_gates"] > 0
+    assert rows["active/he"]["plan"]["method"] == "statevector"
+
+    refused = {r["job"]: r for r in preflight_molecule(get_case("CO2")["geom"], ansatz="he", n_act_orb=8,
+                                                       budget_bytes=2**20)}["full/he"]
+    assert refused["error"] and refused["plan"] is None and "depth" not in refused
+
+
+def test_variant_cache_is_keyed_by_target_and_counts_shared():
+    qc = build_he(2, (1, 1), layers=1, seed=123)
+    qc.measure_all()
+    session = SamplerSession(seed=1)
+    session.transpile(qc)
+    mps = session.variant(method="matrix_product_state")
+    mps.transpile(qc)  # different target: transpiled again
+    session.variant(precision="single").transpile(qc)  # same target as the parent: cached
+    assert (session.misses, session.hits) == (2, 1)
+    assert (mps.misses, mps.hits) == (2, 1)
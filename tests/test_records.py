@@ -0,0 +1,49 @@
+import json
+import multiprocessing
+
+import pytest
+
+from sqd.records import append_jsonl, iter_records, flatten_record
+
+
+def _append_many(path, worker, n):
+    for i in range(n):
+        append_jsonl(path, {"worker": worker, "i": i, "pad": "x" * 5000})
+
+
+def test_concurrent_appends_keep_whole_lines(tmp_path):
+    path = tmp_path / "runs.jsonl"
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_append_many, args=(str(path), w, 20)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    records = list(iter_records(path))
+    assert len(records) == 60
+    assert sorted((r["worker"], r["i"]) for r in records) == [(w, i) for w in range(3) for i in range(20)]
+
+
+def test_silent_benchmark_writes_record(tmp_path, capsys):
+    pytest.importorskip("pyscf")
+    pytest.importorskip("qiskit_aer")
+    from sqd.compare import run_sqd_benchmark
+
+    path = tmp_path / "runs.jsonl"
+    run_sqd_benchmark("H 0 0 0; H 0 0 0.74", "sto-3g", ansatz="hf", shots=200, samples_per_batch=5,
+                      max_iterations=1, verbose=False, render=False, record_path=str(path))
+    out = capsys.readouterr().out
+    assert "Energy & Time Comparison" not in out and "RUN START" not in out
+
+    (rec,) = iter_records(path)
+    json.dumps(rec)
+    assert rec["inputs"]["ansatz"] == "hf" and rec["inputs"]["shots"] == 200
+    assert rec["host"]["packages"]["pyscf"]
+    assert rec["peak_rss_bytes"]["self"] > 0
+    jobs = {(j["ansatz"], j["space"]): j for j in rec["sqd"]}
+    assert set(jobs) == {("hf", "full"), ("hf", "active")}
+    assert jobs[("hf", "full")]["unique_configs"] == 1
+    assert len(jobs[("hf", "full")]["energy_history"]) == jobs[("hf", "full")]["iterations"]
+
+    rows = flatten_record(rec)
+    assert len(rows) == 2 and all("error_mha" in r for r in rows)
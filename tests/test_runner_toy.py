@@ -5,8 +5,8 @@ import pytest
 pytest.importorskip("qiskit_aer")
 pytest.importorskip("qiskit_addon_sqd")
 
-from sqd.ansatz import build_he  # lightweight, deterministic angles via seed
-from sqd.runner import run_sqd_once
+from sqd.ansatz import build_he, he_angles  # lightweight, deterministic angles via seed
+from sqd.runner import run_sqd_once, run_he_ensemble, SamplerSession, circuit_fingerprint
 
 
 def test_runner_on_toy_hamiltonian():
@@ -53,5 +53,245 @@ def test_runner_on_toy_hamiltonian():
 
     assert isinstance(timings, dict)
     assert "simulate" in timings and "diag" in timings
+    assert timings["transpile"] >= 0.0
     assert timings["simulate"] >= 0.0
     assert timings["diag"] >= 0.0
+
+
+def test_ffsim_backend_matches_hf_energy():
+    """HF circuit on the ffsim backend samples only the HF determinant."""
+    from sqd.ansatz import build_hf
+
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb, norb, norb, norb))
+    qc = build_hf(norb, nelec)
+    qc.measure_all()
+
+    energy, timings = run_sqd_once(
+        h1, h2, 0.0, norb, nelec, qc,
+        shots=500, samples_per_batch=10, max_iterations=1,
+        verbose=False, backend="ffsim", seed=11,
+    )
+    assert abs(energy - 1.0) < 1e-10
+    assert timings["simulate"] >= 0.0
+
+
+def test_ffsim_backend_falls_back_for_he():
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb, norb, norb, norb))
+    qc = build_he(norb, nelec, layers=1, seed=123)
+    qc.measure_all()
+
+    energy, _ = run_sqd_once(
+        h1, h2, 0.0, norb, nelec, qc,
+        shots=2_000, samples_per_batch=20, max_iterations=2,
+        verbose=False, backend="ffsim",
+    )
+    assert np.isfinite(energy)
+
+
+def test_invalid_backend_raises():
+    norb, nelec = 2, (1, 1)
+    qc = build_he(norb, nelec, layers=1, seed=123)
+    qc.measure_all()
+    with pytest.raises(ValueError):
+        run_sqd_once(np.eye(2), np.zeros((2, 2, 2, 2)), 0.0, norb, nelec, qc,
+                     shots=10, verbose=False, backend="gpu")
+
+
+def test_fingerprint_tracks_circuit_structure():
+    from sqd.ansatz import build_ucj
+
+    assert circuit_fingerprint(build_he(2, (1, 1), layers=1, seed=1)) == \
+        circuit_fingerprint(build_he(2, (1, 1), layers=1, seed=1))
+    assert circuit_fingerprint(build_he(2, (1, 1), layers=1, seed=1)) != \
+        circuit_fingerprint(build_he(2, (1, 1), layers=1, seed=2))
+
+    t2 = np.full((1, 1, 1, 1), 0.05)
+    assert circuit_fingerprint(build_ucj(2, (1, 1), t2)) == \
+        circuit_fingerprint(build_ucj(2, (1, 1), t2.copy()))
+    assert circuit_fingerprint(build_ucj(2, (1, 1), t2)) != \
+        circuit_fingerprint(build_ucj(2, (1, 1), 2 * t2))
+
+
+def test_fingerprint_sees_deeply_nested_state():
+    from qiskit.circuit import Gate, QuantumCircuit
+
+    def circuit(payload):
+        gate = Gate("deep", 1, [])
+        gate.payload = payload
+        qc = QuantumCircuit(1)
+        qc.append(gate, [0])
+        return qc
+
+    def nest(value, levels=12):
+        for _ in range(levels):
+            value = [value]
+        return value
+
+    assert circuit_fingerprint(circuit(nest(1))) == circuit_fingerprint(circuit(nest(1)))
+    assert circuit_fingerprint(circuit(nest(1))) != circuit_fingerprint(circuit(nest(2)))
+    with pytest.raises(TypeError):
+        circuit_fingerprint(circuit(nest(lambda: None)))
+
+
+def test_seed_overrides_session_seed():
+    from sqd.runner import sample_configurations
+
+    qc = build_he(2, (1, 1), layers=1, seed=123)
+    qc.measure_all()
+    a, _ = sample_configurations(qc, 2, (1, 1), shots=300, verbose=False, seed=9, session=SamplerSession(seed=1))
+    b, _ = sample_configurations(qc, 2, (1, 1), shots=300, verbose=False, seed=9, session=SamplerSession(seed=2))
+    np.testing.assert_array_equal(a.counts, b.counts)
+
+
+def test_session_skips_repeated_transpile():
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb, norb, norb, norb))
+    session = SamplerSession(seed=5)
+    for _ in range(2):
+        qc = build_he(norb, nelec, layers=1, seed=123)
+        qc.measure_all()
+        _, timings = run_sqd_once(
+            h1, h2, 0.0, norb, nelec, qc,
+            shots=500, samples_per_batch=10, max_iterations=1,
+            verbose=False, session=session,
+        )
+    assert session.misses == 1 and session.hits == 1
+    assert timings["transpile"] == 0.0
+
+
+def test_session_transpile_cache_is_lru_bounded():
+    session = SamplerSession(seed=5, max_circuits=2)
+    circuits = []
+    for seed in (1, 2, 3):
+        qc = build_he(2, (1, 1), layers=1, seed=seed)
+        qc.measure_all()
+        circuits.append(qc)
+    session.transpile(circuits[0])
+    session.transpile(circuits[1])
+    session.transpile(circuits[0])          # hit: circuit 0 becomes most recent
+    session.transpile(circuits[2])          # evicts circuit 1, the least recently used
+    assert (session.hits, session.misses) == (1, 3)
+    assert session.transpile(circuits[0])[1] == 0.0
+    session.transpile(circuits[1])
+    assert (session.hits, session.misses) == (2, 4)
+    assert len(session.variant(method="statevector")._cache["circuits"]) == 2  # variants share the cap
+
+
+def test_chunked_sampling_stops_when_saturated():
+    """HF is deterministic: the second chunk adds nothing new, so sampling stops early."""
+    from sqd.ansatz import build_hf
+
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb, norb, norb, norb))
+    qc = build_hf(norb, nelec)
+    qc.measure_all()
+
+    energy, timings = run_sqd_once(
+        h1, h2, 0.0, norb, nelec, qc,
+        shots=10_000, chunk_shots=1_000, samples_per_batch=10, max_iterations=1,
+        verbose=False, backend="ffsim", seed=3,
+    )
+    assert abs(energy - 1.0) < 1e-10
+    assert timings["chunk_shots"] == [1_000, 1_000]
+    assert timings["chunk_new_valid"] == [1, 0]
+    assert timings["shots"] == 2_000
+
+
+def test_chunked_aer_sampling_uses_distinct_chunk_seeds():
+    from sqd.runner import sample_until_saturated
+
+    norb, nelec = 2, (1, 1)
+    qc = build_he(norb, nelec, layers=1, seed=123)
+    qc.measure_all()
+    session = SamplerSession(seed=5)
+    tqc, _ = session.transpile(qc)
+    first = session.sample([tqc], 50)[0]
+    assert first == session.sample([tqc], 50, seed=5)[0]
+    assert first != session.sample([tqc], 50, seed=6)[0]
+
+    store, chunks, _ = sample_until_saturated(
+        lambda k, n: session.sample([tqc], n, seed=5 + k)[0], norb, nelec,
+        max_shots=250, chunk_shots=100, saturation_rate=0.0,
+    )
+    assert chunks == [100, 100, 50]
+    assert store.num_shots == 250
+
+
+def test_convergence_criteria_stop_iterations_and_warm_start():
+    norb, nelec = 2, (1, 1)
+    h1 = np.diag([0.5, 0.7])
+    h2 = np.zeros((norb, norb, norb, norb))
+    qc = build_he(norb, nelec, layers=1, seed=123)
+    qc.measure_all()
+    kwargs = dict(shots=1_000, samples_per_batch=20, max_iterations=5, verbose=False, seed=2)
+
+    _, info = run_sqd_once(h1, h2, 0.0, norb, nelec, qc, time_limit=0.0, **kwargs)
+    assert info["iterations"] == 1
+    assert info["stop_reason"].startswith("time limit")
+
+    e, info = run_sqd_once(h1, h2, 0.0, norb, nelec, qc, energy_tol=1.0, **kwargs)
+    assert info["iterations"] == 2
+    assert len(info["energy_history"]) == 2
+    assert e == pytest.approx(min(info["energy_history"]))
+
+    occ_a, occ_b = info["warm_start"]["occupancies"]
+    assert occ_a.shape == (norb,) and occ_b.shape == (norb,)
+    e_warm, _ = run_sqd_once(h1, h2, 0.0, norb, nelec, qc, warm_start=info["warm_start"], **kwargs)
+    assert e_warm <= e + 1e-10
+
+
+def test_callback_exception_escapes_diagonalizer():
+    # early stopping (runner._Converged) relies on the library letting a callback's
+    # exception propagate unchanged after that iteration; fail loudly if it ever stops doing so
+    from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian
+
+    class Stop(Exception):
+        pass
+
+    calls = []
+
+    def callback(results):
+        calls.append(results)
+        raise Stop
+
+    bools = np.array([[0, 1, 0, 1], [1, 0, 1, 0], [0, 1, 1, 0]], dtype=bool)
+    with pytest.raises(Stop):
+        diagonalize_fermionic_hamiltonian(np.diag([0.5, 0.7]), np.zeros((2, 2, 2, 2)), bools,
+                                          samples_per_batch=3, norb=2, nelec=(1, 1), max_iterations=5,
+                                          callback=callback, seed=0)
+    assert len(calls) == 1
+
+
+def test_max_iterations_must_be_positive():
+    from sqd.runner import diagonalize_samples
+    from sqd.samples import SampleStore
+
+    store = SampleStore.from_bool_array(np.array([[0, 1, 0, 1]], dtype=bool), norb=2, nelec=(1, 1))
+    with pytest.raises(ValueError, match="max_iterations"):
+        diagonalize_samples(np.eye(2), np.zeros((2, 2, 2, 2)), 0.0, 2, (1, 1), store,
+                            max_iterations=0, verbose=False)
+
+
+def test_he_ensemble_transpiles_once_and_matches_seeded_circuit():
+    norb, nelec = 2, (1, 1)
+    h1, h2 = np.diag([0.5, 0.7]), np.zeros((norb,) * 4)
+    session = SamplerSession(seed=5)
+    e_best, info = run_he_ensemble(
+        h1, h2, 0.0, norb, nelec, seeds=[1, 2, 3], layers=1, shots=500, session=session,
+        samples_per_batch=20, max_iterations=1, verbose=False,
+    )
+    assert session.misses == 1 and len(info["members"]) == 3
+    assert e_best == min(m["energy"] for m in info["members"])
+    assert all(m["shots"] == 500 for m in info["members"])
+
+    # same parametric circuit again: transpile cache hit
+    angles = np.stack([he_angles(norb, 1, s) for s in (1, 2)])
+    run_he_ensemble(h1, h2, 0.0, norb, nelec, angles=angles, layers=1, shots=500,
+                    session=session, pool=True, samples_per_batch=20, max_iterations=1, verbose=False)
+    assert session.hits == 1 and session.misses == 1
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("qiskit")
+from qiskit.primitives import BitArray
+
+from sqd.samples import SampleStore
+
+
+def _bools(rows):
+    return np.array([[c == "1" for c in r] for r in rows], dtype=bool)
+
+
+def test_dedup_counts_and_particle_number():
+    # norb=2: bits are [b1 b0 a1 a0]
+    rows = ["0101", "0101", "0101", "1010", "0011", "0011"]
+    store = SampleStore.from_bool_array(_bools(rows), norb=2, nelec=(1, 1))
+    assert store.num_shots == 6
+    assert store.num_unique == 3
+    # "0011" has two alpha electrons and no beta -> invalid for (1, 1)
+    assert store.num_unique_valid == 2
+    assert store.postselect().num_shots == 4
+    np.testing.assert_array_equal(store.alpha, [3, 1, 2])
+    np.testing.assert_array_equal(store.beta, [0, 1, 2])
+
+
+def test_unique_rows_match_numpy_order_multiword():
+    rng = np.random.default_rng(0)
+    norb = 35  # 70 bits -> two uint64 words
+    pool = rng.random((40, 2 * norb)) < 0.5
+    bools = pool[rng.integers(0, 40, size=500)]
+    store = SampleStore.from_bit_array(BitArray.from_bool_array(bools, order="big"), norb, (10, 10))
+
+    rows, counts = np.unique(bools, axis=0, return_counts=True)
+    assert store.num_words == 2
+    np.testing.assert_array_equal(store.unique_bool_rows(), rows)
+    np.testing.assert_array_equal(store.counts, counts)
+
+
+def test_diagonalizer_input_reproduces_shots():
+    rows = ["0101", "0101", "1010"]
+    store = SampleStore.from_bool_array(_bools(rows), norb=2, nelec=(1, 1))
+    feed = store.to_diagonalizer_input()
+    assert isinstance(feed, BitArray) and feed.num_shots == 3 and feed.num_bits == 4
+    assert feed.get_counts() == {"0101": 2, "1010": 1}
+
+
+def test_diagonalizer_energy_matches_raw_bitstrings():
+    pytest.importorskip("qiskit_addon_sqd")
+    pytest.importorskip("pyscf")
+    from pyscf import ao2mo
+    from qiskit_addon_sqd.fermion import diagonalize_fermionic_hamiltonian
+
+    rng = np.random.default_rng(7)
+    norb, nelec = 5, (2, 2)  # 10 bits: rows span two bytes
+    h1 = rng.normal(size=(norb, norb))
+    h1 = h1 + h1.T
+    npair = norb * (norb + 1) // 2
+    h2 = ao2mo.restore(1, 0.1 * rng.normal(size=npair * (npair + 1) // 2), norb)
+    bools = (rng.random((60, 2 * norb)) < 0.4)[rng.integers(0, 60, size=400)]
+    store = SampleStore.from_bool_array(bools, norb, nelec)
+
+    def energy(samples):
+        return diagonalize_fermionic_hamiltonian(h1, h2, samples, samples_per_batch=30, norb=norb, nelec=nelec,
+                                                 max_iterations=2, seed=11).energy
+
+    assert energy(store.to_diagonalizer_input()) == pytest.approx(energy(bools), abs=1e-12)
+
+
+def test_merge_accumulates_counts():
+    a = SampleStore.from_bool_array(_bools(["0101", "1010"]), norb=2, nelec=(1, 1))
+    b = SampleStore.from_bool_array(_bools(["0101", "0110"]), norb=2, nelec=(1, 1))
+    m = a.merge(b)
+    assert m.num_shots == 4 and m.num_unique == 3
+    assert m.counts[list(m.alpha).index(1)] == 2
+
+
+def test_filter_irrep_keeps_target_and_invalid_configs():
+    # norb=2 with orbital irreps [0, 1]: alpha/beta string irrep = 1 iff orbital 1 is occupied
+    rows = ["0101", "1010", "0110", "0011"]
+    store = SampleStore.from_bool_array(_bools(rows), norb=2, nelec=(1, 1))
+    kept = store.filter_irrep([0, 1], target=0)
+    # "0110" (alpha in orbital 1, beta in orbital 0) has irrep 1; "0011" is kept for recovery
+    assert kept.num_unique == 3 and kept.num_unique_valid == 2
+    assert store.filter_irrep([0, 1], target=1).num_unique_valid == 1
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_addon_sqd")
+
+from sqd.scan import geometry_at, run_sqd_scan
+
+
+def test_geometry_template_requires_placeholder():
+    assert geometry_at("H 0 0 0; H 0 0 {r}", 0.74) == "H 0 0 0; H 0 0 0.74"
+    with pytest.raises(ValueError):
+        geometry_at("H 0 0 0; H 0 0 0.74", 0.74)
+
+
+def test_warm_started_scan_matches_cold_scan():
+    kwargs = dict(ansatz="ucj", backend="ffsim", shots=2_000, samples_per_batch=20,
+                  max_iterations=2, verbose=False, seed=4)
+    cold = run_sqd_scan("Li 0 0 0; H 0 0 {r}", [1.5, 1.6], warm_start=False, **kwargs)
+    warm = run_sqd_scan("Li 0 0 0; H 0 0 {r}", [1.5, 1.6], warm_start=True,
+                        seed_configurations=True, **kwargs)
+
+    assert [row["r"] for row in warm] == [1.5, 1.6]
+    for c, w in zip(cold, warm):
+        assert w["e_rhf"] == pytest.approx(c["e_rhf"], abs=1e-8)
+        assert w["e_ccsd"] == pytest.approx(c["e_ccsd"], abs=1e-6)
+        assert np.isfinite(w["e_sqd"]) and w["e_sqd"] >= w["e_fci"] - 1e-8
+    assert warm[1]["scf_cycles"] <= cold[1]["scf_cycles"]
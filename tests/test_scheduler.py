@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("pyscf")
+
+from sqd.scheduler import estimate_case, statevector_bytes, orbital_counts, run_suite
+
+
+def test_statevector_bytes_by_backend():
+    assert statevector_bytes(4, (2, 2), "aer") == 16 * 2**8
+    assert statevector_bytes(4, (2, 2), "ffsim") == 16 * 6 * 6
+
+
+def test_orbital_counts_without_scf():
+    norb, nelec = orbital_counts("Li 0 0 0; H 0 0 1.6", "sto-3g")
+    assert norb == 6 and nelec == (2, 2)
+
+
+def test_estimate_grows_with_system_size():
+    small = estimate_case({"id": "LiH", "geom": "Li 0 0 0; H 0 0 1.6", "shots": 1000})
+    big = estimate_case({"id": "N2", "geom": "N 0 0 -0.55; N 0 0 0.55", "shots": 1000})
+    assert small["mem_bytes"] < big["mem_bytes"]
+    assert small["cores"] == 1 and big["cores"] >= small["cores"]
+    assert estimate_case({"id": "N2", "geom": "N 0 0 -0.55; N 0 0 0.55"}, backend="ffsim")["cores"] == 1
+
+
+def test_bad_case_fails_alone_before_scheduling():
+    out = list(run_suite([{"id": "bad", "geom": "Xx 0 0 0"}], max_cores=1, max_mem_bytes=1 << 30))
+    assert len(out) == 1
+    cfg, results = out[0]
+    assert cfg["id"] == "bad" and "error" in results
+
+
+def test_estimate_honours_charge_and_spin():
+    neutral = estimate_case({"id": "LiH", "geom": "Li 0 0 0; H 0 0 1.6"})
+    cation = estimate_case({"id": "LiH+", "geom": "Li 0 0 0; H 0 0 1.6", "charge": 1, "spin": 1})
+    assert neutral["nelec"] == (2, 2) and cation["nelec"] == (2, 1)
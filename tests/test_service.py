@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_aer")
+
+from sqd.service import JobQueue, SQDServer, health, shutdown, stream_results, submit_jobs, validate_spec
+
+H2 = "H 0 0 0; H 0 0 0.74"
+
+
+def _run_spec(priority=0, **args):
+    return {"command": "run", "priority": priority,
+            "args": {"geom": H2, "ansatz": "hf", "shots": 200, "samples_per_batch": 5, "max_iterations": 1, **args}}
+
+
+def test_validate_spec_rejects_bad_specs():
+    assert validate_spec({"args": {"geom": H2}}) == {"command": "run", "args": {"geom": H2}, "priority": 0}
+    for bad in ([], {"command": "scan", "args": {"geom": H2}}, {"args": {}}, {"args": {"geom": H2}, "priority": "hi"}):
+        with pytest.raises(ValueError):
+            validate_spec(bad)
+
+
+def test_service_runs_prioritized_jobs_and_streams_results():
+    queue = JobQueue(workers=1, threads=1).start()
+    server = SQDServer(queue, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert health(server.url)["workers"] == 1
+        # one worker: the first job starts at once, the rest wait and run by priority
+        ids = submit_jobs(server.url, [_run_spec(shots=20_000), _run_spec(), _run_spec(priority=5),
+                                       _run_spec(bogus=1), {"command": "bench", "args": {"geom": H2, "ansatz": "hf",
+                                                                "shots": 200, "max_iterations": 1}}])
+        snaps = {s["id"]: s for s in stream_results(server.url, ids)}
+        assert set(snaps) == set(ids)
+        first, low, high, bad, bench = (snaps[i] for i in ids)
+        assert bad["status"] == "failed" and "bogus" in bad["error"]
+        for s in (first, low, high):
+            assert s["status"] == "done"
+            assert s["result"]["energy"] == pytest.approx(first["result"]["energy"], abs=1e-10)
+        assert high["queue_s"] < low["queue_s"]
+        assert bench["status"] == "done" and bench["result"]["reference"]["name"] == "FCI"
+        assert len(bench["result"]["sqd"]) == 2
+    finally:
+        shutdown(server.url)
+        thread.join(10)
+        server.server_close()
+        queue.close()
+
+
+def test_validate_spec_confines_file_arguments(tmp_path):
+    spec = {"command": "bench", "args": {"geom": H2, "record": "runs/a.jsonl"}}
+    with pytest.raises(ValueError, match="output directory"):
+        validate_spec(spec)  # no output_dir on the server: file arguments refused
+    out = validate_spec(spec, str(tmp_path))
+    assert out["args"]["record"] == str(tmp_path.resolve() / "runs" / "a.jsonl")
+    assert validate_spec(out, str(tmp_path)) == out  # already-resolved paths stay valid
+    for escape in ("../x.jsonl", "/etc/passwd", "runs/../../x"):
+        with pytest.raises(ValueError, match="inside"):
+            validate_spec({"args": {"geom": H2, "checkpoint_dir": escape}}, str(tmp_path))
+    with pytest.raises(ValueError, match="cache_dir"):
+        validate_spec({"args": {"geom": H2, "cache_dir": str(tmp_path)}}, str(tmp_path))
@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+import pytest
+
+from sqd import spans
+
+
+def _names(sp):
+    return [sp.name] + [n for c in sp.children for n in _names(c)]
+
+
+def test_nested_spans_render_and_collapse():
+    spans.reset()
+    with spans.collect():
+        with spans.span("outer", case="x"):
+            with spans.span("inner"):
+                time.sleep(0.01)
+            with spans.span("inner"):
+                pass
+    (root,) = spans.roots()
+    assert root.attrs == {"case": "x"}
+    assert [c.name for c in root.children] == ["inner", "inner"]
+    assert root.seconds >= root.children[0].seconds >= 0.01
+
+    table = spans.render(spans.roots())
+    assert "  inner" in table and table.splitlines()[2].split()[-1] == "2"  # merged calls
+    folded = dict(line.rsplit(" ", 1) for line in spans.collapsed(spans.roots()))
+    assert int(folded["outer;inner"]) >= 10_000
+
+
+def test_memory_peak_per_span():
+    spans.reset()
+    spans.enable_memory()
+    try:
+        with spans.collect(), spans.span("alloc"):
+            buf = np.ones(4 * 2**20 // 8)  # 4 MiB
+            del buf
+    finally:
+        spans.enable_memory(False)
+    (root,) = spans.roots()
+    assert root.to_dict()["tracemalloc_peak_bytes"] >= 4 * 2**20
+
+
+def test_runner_emits_phase_spans():
+    pytest.importorskip("qiskit_aer")
+    from sqd.ansatz import build_he
+    from sqd.runner import run_sqd_once
+
+    qc = build_he(2, (1, 1), layers=1, seed=123)
+    qc.measure_all()
+    spans.reset()
+    with spans.collect():
+        run_sqd_once(np.diag([0.5, 0.7]), np.zeros((2, 2, 2, 2)), 0.0, 2, (1, 1), qc,
+                     shots=500, samples_per_batch=10, max_iterations=2, verbose=False)
+    (root,) = spans.roots()
+    names = _names(root)
+    assert root.name == "sqd_run"
+    for phase in ("transpile", "sample", "ingest", "diagonalize", "subsample", "eigensolve"):
+        assert phase in names
+
+
+def test_profiled_writes_outputs(tmp_path):
+    prefix = tmp_path / "prof" / "run"
+    with spans.profiled(str(prefix)):
+        with spans.span("work"):
+            sum(i * i for i in range(200_000))
+            time.sleep(0.05)
+    for suffix in (".pstats", ".collapsed", ".spans.collapsed"):
+        assert (tmp_path / "prof" / f"run{suffix}").exists()
+    assert "work" in (tmp_path / "prof" / "run.spans.collapsed").read_text()
+
+
+def test_roots_kept_only_while_collecting():
+    @spans.traced("job")
+    def job():
+        with spans.span("step"):
+            pass
+
+    spans.reset()
+    for _ in range(1000):
+        job()
+    assert spans.roots() == []
+    with spans.collect():
+        job()
+    job()
+    assert [r.name for r in spans.roots()] == ["job"]
+    spans.reset()
@@ -0,0 +1,35 @@
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+HEAVY = ("pyscf", "qiskit", "qiskit_aer", "qiskit_addon_sqd", "ffsim", "numpy")
+
+
+def _run(*args):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, cwd=ROOT)
+    return out, time.perf_counter() - t0
+
+
+def test_cli_import_loads_no_scientific_stack():
+    code = (
+        "import sys, sqd.cli, sqd.data; "
+        f"print(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY!r})))"
+    )
+    out, _ = _run("-c", code)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "[]"
+
+
+def test_cli_startup_time():
+    """Listing cases must cost little more than importing typer itself."""
+    base, t_base = _run("-c", "import typer")
+    assert base.returncode == 0
+    out, t_cli = _run("-m", "sqd.cli", "cases")
+    assert out.returncode == 0, out.stderr
+    assert "LiH" in out.stdout
+    assert t_cli < t_base + 1.0, f"sqd cases took {t_cli:.2f} s (bare typer import {t_base:.2f} s)"
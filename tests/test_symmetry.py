@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyscf")
+pytest.importorskip("qiskit_addon_sqd")
+
+from sqd.ansatz import build_ucj
+from sqd.chemistry import rhf_build, orbital_irreps, ChemistryContext
+from sqd.runner import ffsim_state, sample_ffsim, diagonalize_samples
+from sqd.samples import SampleStore
+from sqd.symmetry import prune_strings, reference_irrep, string_irreps
+
+WATER = "O 0 0 0; H 0 0.757 0.587; H 0 -0.757 0.587"
+
+
+def test_prune_strings_keeps_every_target_determinant():
+    orbsym = [0, 1, 2, 3]
+    strs_a = np.array([0b0011, 0b0101, 0b1001])  # irreps 1, 2, 3
+    strs_b = np.array([0b0011, 0b0110])          # irreps 1, 3
+    kept_a, kept_b, n_symm = prune_strings(strs_a, strs_b, orbsym, target=0)
+    np.testing.assert_array_equal(kept_a, [0b0011, 0b1001])
+    np.testing.assert_array_equal(kept_b, [0b0011, 0b0110])
+    assert n_symm == 2
+    ir = string_irreps(kept_a, orbsym)[:, None] ^ string_irreps(kept_b, orbsym)[None, :]
+    assert (ir == 0).sum() == n_symm
+
+
+def test_symmetry_fold_matches_plain_eigensolve():
+    mol, mf = rhf_build(WATER, "sto-3g", verbose=0, symmetry=True)
+    assert mol.groupname == "C2v"
+    orbsym = orbital_irreps(mol, mf.mo_coeff)
+    ctx = ChemistryContext(mf)
+    h1, h2, e_core = ctx.integrals()
+    norb, nelec = ctx.norb, tuple(mol.nelec)
+    assert reference_irrep(orbsym, nelec) == 0
+    _, t2 = ctx.ccsd()
+    qc = build_ucj(norb, nelec, t2)
+    store = SampleStore.from_bit_array(sample_ffsim(ffsim_state(qc, norb, nelec), 3000, seed=5), norb, nelec)
+    # one batch holding every sampled configuration -> deterministic subspace
+    kwargs = dict(samples_per_batch=10 * store.num_unique, max_iterations=1, verbose=False)
+    e_plain, _ = diagonalize_samples(h1, h2, e_core, norb, nelec, store, **kwargs)
+    e_symm, info = diagonalize_samples(h1, h2, e_core, norb, nelec, store, orbsym=orbsym, **kwargs)
+    assert e_symm == pytest.approx(e_plain, abs=1e-8)
+    sym = info["symmetry"]
+    assert sym["target_irrep"] == 0
+    assert 0 < sym["symmetry_dim"] < sym["product_dim"]
+
+
+def test_solver_skips_batches_without_target_irrep():
+    from itertools import combinations
+
+    from pyscf import ao2mo, fci
+    from sqd.symmetry import SymmetrySolver
+
+    mol, mf = rhf_build(WATER, "sto-3g", verbose=0, symmetry=True)
+    orbsym = orbital_irreps(mol, mf.mo_coeff)
+    ctx = ChemistryContext(mf)
+    h1, h2, _ = ctx.integrals()
+    norb, nelec = ctx.norb, tuple(mol.nelec)
+    target = 2  # B1; the ground state is A1
+    assert reference_irrep(orbsym, nelec) != target
+    e_target, _ = fci.direct_spin1_symm.FCI(mol).kernel(h1, h2, norb, nelec, orbsym=orbsym, wfnsym=target)
+
+    hf = np.array([(1 << nelec[0]) - 1])
+    every = np.array(sorted(sum(1 << p for p in occ) for occ in combinations(range(norb), nelec[0])))
+    solver = SymmetrySolver(orbsym, target)
+    h2_dense = ao2mo.restore(1, h2, norb)
+    # the HF-only batch holds no B1 determinant; its plain eigensolve would be the lower A1 energy
+    out = solver([(hf, hf), (every, every)], h1, h2_dense, norb, nelec)
+    assert out[0].energy == np.inf and solver.last[0][2] == 0
+    assert out[1].energy == pytest.approx(e_target, abs=1e-8)
+    assert min(r.energy for r in out) == out[1].energy
+
+    with pytest.raises(ValueError, match="irrep 2"):
+        solver([(hf, hf)], h1, h2_dense, norb, nelec)